@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,6 +19,8 @@ class Config:
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     IMAGE_MAX_SIZE = 1200
     IMAGE_QUALITY = 85
+    IMAGE_CREATE_THUMBNAILS = True
+    IMAGE_THUMB_SIZE = 300
 
     ITEMS_PER_PAGE_DEFAULT = int(os.environ.get('ITEMS_PER_PAGE_DEFAULT', 24))
     ITEMS_PER_PAGE_RECETTES = int(os.environ.get('ITEMS_PER_PAGE_RECETTES', 20))
@@ -25,8 +28,13 @@ class Config:
     API_KEY = os.environ.get('API_KEY') or 'dev-api-key-CHANGE-IN-PRODUCTION'
 
     SEND_FILE_MAX_AGE_DEFAULT = 31536000
-    CACHE_TYPE = 'SimpleCache'
+    # RefCache (mémoire, sans pickle) est propre à chaque processus : avec
+    # plusieurs workers, utiliser RedisCache (CACHE_REDIS_URL) ou FileSystemCache (CACHE_DIR)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'utils.cache_backends.RefCache')
     CACHE_DEFAULT_TIMEOUT = 300
+    CACHE_STALE_TTL = 600  # Fenêtre stale-while-revalidate (secondes)
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'frigo_cache')
 
     COMPRESS_MIMETYPES = [
         'text/html',
@@ -68,6 +76,10 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     SQLALCHEMY_ECHO = False
+    # Cache partagé entre les workers
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or (
+        'RedisCache' if os.environ.get('CACHE_REDIS_URL') else 'FileSystemCache'
+    )
 
     @classmethod
     def init_app(cls, app):
@@ -99,6 +111,7 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
     SQLALCHEMY_ECHO = False
+    CACHE_TYPE = 'utils.cache_backends.RefCache'
 
 
 config_by_name = {
@@ -0,0 +1,66 @@
+"""
+Migration : Ajout des colonnes de coût/nutrition précalculés à la table Recette
+
+À exécuter avec :
+flask --app manage.py db migrate -m "Ajout cout/nutrition precalcules"
+flask --app manage.py db upgrade
+
+Ou manuellement avec ce script (ajout des colonnes + calcul initial)
+"""
+
+from models.models import db, Recette, NUTRIMENTS
+from sqlalchemy import text
+
+COLONNES = ['cout_cache'] + [f'{nom}_cache' for nom in NUTRIMENTS]
+
+
+def add_cout_nutrition_columns(app):
+    """
+    Ajoute les colonnes *_cache à la table recette puis les remplit
+    """
+    with app.app_context():
+        try:
+            existantes = {
+                row[0] for row in db.session.execute(text(
+                    "SELECT name FROM pragma_table_info('recette')"
+                ))
+            }
+
+            for colonne in COLONNES:
+                if colonne in existantes:
+                    print(f"✓ La colonne {colonne} existe déjà")
+                    continue
+                db.session.execute(text(
+                    f"ALTER TABLE recette ADD COLUMN {colonne} FLOAT"
+                ))
+                print(f"✓ Colonne {colonne} ajoutée")
+
+            ids = db.session.scalars(db.select(Recette.id)).all()
+            Recette.recalculer_cout_nutrition(ids)
+            db.session.commit()
+
+            print(f"✓ Coût et nutrition calculés pour {len(ids)} recettes")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Erreur lors de la migration : {e}")
+            return False
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    app = create_app()
+
+    print("=" * 50)
+    print("MIGRATION : Coût et nutrition précalculés")
+    print("=" * 50)
+
+    success = add_cout_nutrition_columns(app)
+
+    if success:
+        print("\n✓ Migration réussie !")
+    else:
+        print("\n✗ La migration a échoué")
+        print("Vérifiez les erreurs ci-dessus")
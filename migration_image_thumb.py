@@ -0,0 +1,100 @@
+"""
+Migration : Ajout du champ image_thumb à la table Recette
+
+À exécuter avec :
+flask --app manage.py db migrate -m "Ajout image_thumb"
+flask --app manage.py db upgrade
+
+Ou manuellement avec ce script (ajout de la colonne + miniatures des
+images déjà uploadées)
+"""
+
+import os
+from models.models import db, Recette
+from sqlalchemy import text
+
+def add_image_thumb_column(app):
+    """
+    Ajoute la colonne image_thumb à la table recette
+    """
+    with app.app_context():
+        try:
+            # Vérifier si la colonne existe déjà
+            result = db.session.execute(text(
+                "SELECT COUNT(*) FROM pragma_table_info('recette') WHERE name='image_thumb'"
+            ))
+            exists = result.scalar() > 0
+
+            if exists:
+                print("✓ La colonne image_thumb existe déjà")
+                return True
+
+            # Ajouter la colonne
+            db.session.execute(text(
+                "ALTER TABLE recette ADD COLUMN image_thumb VARCHAR(200)"
+            ))
+            db.session.commit()
+
+            print("✓ Colonne image_thumb ajoutée avec succès")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Erreur lors de l'ajout de la colonne : {e}")
+            return False
+
+
+def generer_miniatures_manquantes(app):
+    """
+    Génère la miniature des recettes qui ont une image mais pas de miniature
+    (images uploadées avant l'ajout des miniatures)
+    """
+    from utils.images import PILLOW_AVAILABLE, creer_miniature, get_thumbnail_path
+
+    if not PILLOW_AVAILABLE:
+        print("✗ Pillow n'est pas installé : miniatures non générées")
+        return False
+
+    from PIL import Image, ImageOps
+
+    with app.app_context():
+        taille = app.config.get('IMAGE_THUMB_SIZE', 300)
+        recettes = Recette.query.filter(
+            Recette.image.isnot(None), Recette.image_thumb.is_(None)
+        ).all()
+
+        generees = 0
+        for recette in recettes:
+            chemin = os.path.join(app.root_path, recette.image)
+            try:
+                with Image.open(chemin) as source:
+                    creer_miniature(ImageOps.exif_transpose(source), chemin, taille)
+            except Exception as e:
+                print(f"✗ {recette.nom} : {e}")
+                continue
+
+            recette.image_thumb = get_thumbnail_path(recette.image)
+            generees += 1
+
+        db.session.commit()
+        print(f"✓ {generees}/{len(recettes)} miniatures générées")
+        return True
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    app = create_app()
+
+    print("=" * 50)
+    print("MIGRATION : Ajout du champ image_thumb")
+    print("=" * 50)
+
+    success = add_image_thumb_column(app) and generer_miniatures_manquantes(app)
+
+    if success:
+        print("\n✓ Migration réussie !")
+        print("\nLes images de recettes ont une miniature pour la liste.")
+    else:
+        print("\n✗ La migration a échoué")
+        print("Vérifiez les erreurs ci-dessus")
@@ -0,0 +1,45 @@
+"""
+Migration : Index inverse sur la table d'association recette_sub_recette
+
+À exécuter avec :
+flask --app manage.py db migrate -m "Index sous_recette_id"
+flask --app manage.py db upgrade
+
+Ou manuellement avec ce script
+"""
+
+from models.models import db, recette_sub_recette
+
+
+def add_index_sous_recettes(app):
+    """
+    Crée les index de recette_sub_recette absents de la base
+    """
+    with app.app_context():
+        try:
+            for index in recette_sub_recette.indexes:
+                index.create(db.engine, checkfirst=True)
+                print(f"✓ Index {index.name} présent")
+            return True
+
+        except Exception as e:
+            print(f"✗ Erreur lors de la création de l'index : {e}")
+            return False
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    app = create_app()
+
+    print("=" * 50)
+    print("MIGRATION : Index inverse des sous-recettes")
+    print("=" * 50)
+
+    success = add_index_sous_recettes(app)
+
+    if success:
+        print("\n✓ Migration réussie !")
+    else:
+        print("\n✗ La migration a échoué")
+        print("Vérifiez les erreurs ci-dessus")
@@ -0,0 +1,83 @@
+"""
+Migration : Index trigramme pour la recherche de recettes (PostgreSQL)
+
+La recherche par nom utilise ILIKE '%terme%', que les index B-tree ne
+peuvent pas servir. Avec pg_trgm, un index GIN répond à ces requêtes
+sans parcourir toute la table.
+
+Sur SQLite, crée la table FTS5 recette_fts (tokenizer trigram), ses
+triggers de synchronisation, et l'alimente avec les recettes existantes.
+
+À exécuter avec :
+python migration_recherche_trigram.py
+"""
+
+from models.models import db, DDL_RECHERCHE_SQLITE
+from sqlalchemy import text
+
+
+def add_recherche_fts_sqlite(app):
+    """
+    Crée la table FTS5 recette_fts et ses triggers (SQLite)
+    """
+    with app.app_context():
+        try:
+            for instruction in DDL_RECHERCHE_SQLITE:
+                db.session.execute(text(instruction))
+            db.session.execute(text(
+                "INSERT INTO recette_fts(recette_fts) VALUES ('rebuild')"
+            ))
+            db.session.commit()
+
+            print("✓ Table recette_fts créée et alimentée")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Erreur lors de la création de recette_fts : {e}")
+            return False
+
+def add_trigram_index(app):
+    """
+    Crée l'extension pg_trgm et l'index GIN sur recette.nom
+    """
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            return add_recherche_fts_sqlite(app)
+        if db.engine.dialect.name != 'postgresql':
+            print("✓ Base ni PostgreSQL ni SQLite : rien à faire")
+            return True
+
+        try:
+            db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            db.session.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_recette_nom_trgm "
+                "ON recette USING gin (nom gin_trgm_ops)"
+            ))
+            db.session.commit()
+
+            print("✓ Index idx_recette_nom_trgm créé")
+            return True
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Erreur lors de la création de l'index : {e}")
+            return False
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    app = create_app()
+
+    print("=" * 50)
+    print("MIGRATION : Index de recherche sur recette.nom")
+    print("=" * 50)
+
+    success = add_trigram_index(app)
+
+    if success:
+        print("\n✓ Migration réussie !")
+    else:
+        print("\n✗ La migration a échoué")
+        print("Vérifiez les erreurs ci-dessus")
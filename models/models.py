@@ -1,5 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, update, bindparam, func, event, case, cast, inspect, DDL, Float, Numeric
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from operator import attrgetter
+import sqlite3
 
 db = SQLAlchemy()
 
@@ -8,6 +14,54 @@ def _utc_now():
     return datetime.now(timezone.utc)
 
 
+# Colonnes nutritionnelles d'Ingredient (valeurs pour 100 g)
+NUTRIMENTS = ('calories', 'proteines', 'glucides', 'lipides', 'fibres', 'sucres', 'sel')
+_valeurs_nutritionnelles = attrgetter(*NUTRIMENTS)
+
+
+def prix_ligne(quantite: float, prix_unitaire: float, poids_piece: float, en_pieces: bool) -> float:
+    """
+    Prix d'une quantité en unité native, arrondi au centime comme
+    Ingredient.expression_prix() (voir arrondi).
+
+    Arguments dans l'ordre de Ingredient.parametres_prix().
+    """
+    if quantite <= 0 or prix_unitaire <= 0:
+        return 0.0
+    if en_pieces and poids_piece > 0:
+        return arrondi(quantite * poids_piece * prix_unitaire)
+    return arrondi(quantite * prix_unitaire)
+
+
+def arrondi_sql(expression, decimales: int = 2):
+    """
+    Équivalent SQL de round() pour une expression flottante.
+
+    PostgreSQL ne définit round(x, n) que pour numeric : l'expression est
+    convertie en NUMERIC avant l'arrondi, puis reconvertie en flottant.
+    """
+    return cast(func.round(cast(expression, Numeric), decimales), Float)
+
+
+def arrondi(valeur: float, decimales: int = 2) -> float:
+    """
+    Équivalent Python de arrondi_sql().
+
+    round() arrondit la valeur binaire au pair le plus proche (round(2.675, 2)
+    vaut 2.67) ; SQLite et PostgreSQL arrondissent la valeur décimale en
+    éloignant les demis de zéro (2.68).
+    """
+    return float(Decimal(repr(valeur)).quantize(Decimal(1).scaleb(-decimales), rounding=ROUND_HALF_UP))
+
+
+# Extension requise par les index trigrammes (gin_trgm_ops)
+event.listen(
+    db.Model.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+
 class IngredientSaison(db.Model):
     """
     Table d'association pour les saisons des ingrédients.
@@ -104,13 +158,36 @@ class Ingredient(db.Model):
         Returns:
             Prix en euros, arrondi à 2 décimales
         """
-        if quantite_native <= 0 or not self.prix_unitaire or self.prix_unitaire <= 0:
-            return 0.0
+        return prix_ligne(quantite_native, *self.parametres_prix())
 
-        if self.unite == 'pièce' and self.poids_piece and self.poids_piece > 0:
-            return round(quantite_native * self.poids_piece * self.prix_unitaire, 2)
+    @classmethod
+    def expression_prix(cls, quantite):
+        """
+        Équivalent SQL de calculer_prix() pour une colonne de quantité,
+        à utiliser dans une requête jointe à Ingredient.
 
-        return round(quantite_native * self.prix_unitaire, 2)
+        Args:
+            quantite: Expression SQL de la quantité en unité native
+
+        Returns:
+            Expression SQL du prix arrondi au centime (0 sans prix)
+        """
+        en_pieces = (cls.unite == 'pièce') & (cls.poids_piece > 0)
+        prix = case(
+            (en_pieces, quantite * cls.poids_piece * cls.prix_unitaire),
+            else_=quantite * cls.prix_unitaire
+        )
+        return case(((quantite > 0) & (cls.prix_unitaire > 0), arrondi_sql(prix)), else_=0.0)
+
+    def parametres_prix(self) -> tuple:
+        """
+        Paramètres du calcul de prix, à extraire une fois par ingrédient
+        avant une boucle (voir prix_ligne).
+
+        Returns:
+            Tuple (prix_unitaire, poids_piece, en_pieces) sans None
+        """
+        return (self.prix_unitaire or 0.0, self.poids_piece or 0.0, self.unite == 'pièce')
 
     def get_saisons(self) -> list:
         """
@@ -236,7 +313,10 @@ class StockFrigo(db.Model):
 recette_sub_recette = db.Table(
     'recette_sub_recette',
     db.Column('recette_id', db.Integer, db.ForeignKey('recette.id', ondelete='CASCADE'), primary_key=True),
-    db.Column('sous_recette_id', db.Integer, db.ForeignKey('recette.id', ondelete='CASCADE'), primary_key=True)
+    db.Column('sous_recette_id', db.Integer, db.ForeignKey('recette.id', ondelete='CASCADE'), primary_key=True),
+    # La clé primaire sert la recherche par recette_id ; cet index sert le
+    # sens inverse (recettes utilisant une sous-recette, CTE des ancêtres)
+    db.Index('idx_sous_recette_recette', 'sous_recette_id', 'recette_id')
 )
 
 
@@ -246,10 +326,22 @@ class Recette(db.Model):
     nom = db.Column(db.String(100), nullable=False)
     instructions = db.Column(db.Text)
     image = db.Column(db.String(200), nullable=True)
+    image_thumb = db.Column(db.String(200), nullable=True)
     type_recette = db.Column(db.String(50), nullable=True)
     temps_preparation = db.Column(db.Integer, nullable=True)
     temps_cuisson = db.Column(db.Integer, nullable=True)
 
+    # Coût et nutrition précalculés (sous-recettes incluses), NULL = à calculer.
+    # Tenus à jour par les listeners de session en fin de fichier.
+    cout_cache = db.Column(db.Float, nullable=True)
+    calories_cache = db.Column(db.Float, nullable=True)
+    proteines_cache = db.Column(db.Float, nullable=True)
+    glucides_cache = db.Column(db.Float, nullable=True)
+    lipides_cache = db.Column(db.Float, nullable=True)
+    fibres_cache = db.Column(db.Float, nullable=True)
+    sucres_cache = db.Column(db.Float, nullable=True)
+    sel_cache = db.Column(db.Float, nullable=True)
+
     ingredients = db.relationship('IngredientRecette', backref='recette',
                                  cascade='all, delete-orphan')
     etapes = db.relationship('EtapeRecette', backref='recette',
@@ -266,6 +358,15 @@ class Recette(db.Model):
         backref=db.backref('utilisee_dans', lazy='select')
     )
 
+    __table_args__ = (
+        db.Index('idx_recette_nom', 'nom', 'id'),
+        db.Index('idx_recette_type_nom', 'type_recette', 'nom', 'id'),
+        # Recherche par sous-chaîne (ILIKE '%...%') : index trigramme, PostgreSQL uniquement
+        db.Index('idx_recette_nom_trgm', 'nom',
+                 postgresql_using='gin',
+                 postgresql_ops={'nom': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
     def get_tous_ingredients_recursif(self, visited=None):
         """Retourne tous les IngredientRecette de la recette et ses sous-recettes (récursif)."""
         if visited is None:
@@ -298,13 +399,20 @@ class Recette(db.Model):
         """
         Calcule le coût estimé de la recette, sous-recettes incluses.
 
+        Lit la valeur précalculée (cout_cache) si elle existe ; sinon la
+        calcule sans la mémoriser (la colonne n'est écrite que par
+        recalculer_cout_nutrition, une lecture ne marque pas l'objet modifié).
+
         Returns:
             Coût total en euros, arrondi à 2 décimales
         """
-        return round(sum(
+        if self.cout_cache is not None:
+            return self.cout_cache
+
+        return arrondi(sum(
             ing_rec.ingredient.calculer_prix(ing_rec.quantite)
             for ing_rec in self.get_tous_ingredients_recursif()
-        ), 2)
+        ))
 
     def calculer_disponibilite_ingredients(self) -> dict:
         """
@@ -314,7 +422,28 @@ class Recette(db.Model):
             Dict avec realisable, pourcentage_disponibilite, ingredients_manquants, ingredients_disponibles
         """
         tous_ingredients = self.get_tous_ingredients_recursif()
+        stock_map = {
+            ing_rec.ingredient_id: ing_rec.ingredient.stock.quantite
+            for ing_rec in tous_ingredients
+            if ing_rec.ingredient.stock
+        }
+        return self._disponibilite(tous_ingredients, stock_map)
+
+    def calculer_disponibilite_ingredients_from_map(self, stock_map: dict) -> dict:
+        """
+        Variante de calculer_disponibilite_ingredients() sans accès au stock en base.
+
+        Args:
+            stock_map: Dict {ingredient_id: quantite} préchargé (ex: charger_stock_map())
+
+        Returns:
+            Même dict que calculer_disponibilite_ingredients()
+        """
+        return self._disponibilite(self.get_tous_ingredients_recursif(), stock_map)
 
+    @staticmethod
+    def _disponibilite(tous_ingredients: list, stock_map: dict) -> dict:
+        """Compare les quantités requises au stock {ingredient_id: quantite}."""
         if not tous_ingredients:
             return {
                 'realisable': True,
@@ -326,15 +455,15 @@ class Recette(db.Model):
         manquants = []
         disponibles = []
 
+        stock_get = stock_map.get
         for ing_rec in tous_ingredients:
-            stock = ing_rec.ingredient.stock
-            quantite_dispo = stock.quantite if stock else 0
+            quantite = ing_rec.quantite
+            quantite_dispo = stock_get(ing_rec.ingredient_id, 0)
 
-            if quantite_dispo >= ing_rec.quantite:
+            if quantite_dispo >= quantite:
                 disponibles.append(ing_rec)
             else:
-                quantite_manquante = ing_rec.quantite - quantite_dispo
-                ing_rec.quantite_manquante = quantite_manquante
+                ing_rec.quantite_manquante = quantite - quantite_dispo
                 manquants.append(ing_rec)
 
         total = len(tous_ingredients)
@@ -383,18 +512,17 @@ class Recette(db.Model):
         """
         Calcule les valeurs nutritionnelles totales, sous-recettes incluses.
 
+        Lit les valeurs précalculées (<nutriment>_cache) si elles existent ;
+        sinon les calcule sans les mémoriser (cf. calculer_cout).
+
         Returns:
             Dict avec calories, proteines, glucides, lipides, fibres, sucres, sel
         """
-        nutrition = {
-            'calories': 0.0,
-            'proteines': 0.0,
-            'glucides': 0.0,
-            'lipides': 0.0,
-            'fibres': 0.0,
-            'sucres': 0.0,
-            'sel': 0.0
-        }
+        caches = _nutrition_cache(self)
+        if None not in caches:
+            return dict(zip(NUTRIMENTS, caches))
+
+        totaux = [0.0] * len(NUTRIMENTS)
 
         for ing_rec in self.get_tous_ingredients_recursif():
             ing = ing_rec.ingredient
@@ -402,20 +530,214 @@ class Recette(db.Model):
 
             if ing.unite == 'pièce' and ing.poids_piece:
                 quantite_g = ing_rec.quantite * ing.poids_piece
-            elif ing.unite == 'ml':
-                quantite_g = ing_rec.quantite
 
             ratio = quantite_g / 100.0
 
-            if ing.calories: nutrition['calories'] += ing.calories * ratio
-            if ing.proteines: nutrition['proteines'] += ing.proteines * ratio
-            if ing.glucides: nutrition['glucides'] += ing.glucides * ratio
-            if ing.lipides: nutrition['lipides'] += ing.lipides * ratio
-            if ing.fibres: nutrition['fibres'] += ing.fibres * ratio
-            if ing.sucres: nutrition['sucres'] += ing.sucres * ratio
-            if ing.sel: nutrition['sel'] += ing.sel * ratio
+            for i, valeur in enumerate(_valeurs_nutritionnelles(ing)):
+                if valeur:
+                    totaux[i] += valeur * ratio
+
+        return {nom: arrondi(total, 1) for nom, total in zip(NUTRIMENTS, totaux)}
+
+    @classmethod
+    def agreger_cout_nutrition(cls, recette_id: int):
+        """
+        Calcule coût et nutrition d'une recette en une seule requête SQL.
+
+        Équivalent à calculer_cout() + calculer_nutrition() (sous-recettes
+        incluses, chacune comptée une fois) sans parcourir les collections
+        en Python.
+
+        Args:
+            recette_id: ID de la recette
+
+        Returns:
+            Tuple (cout, nutrition) au même format que calculer_cout()
+            et calculer_nutrition()
+        """
+        return cls.agreger_cout_nutrition_multi([recette_id]).get(
+            recette_id, (0.0, dict.fromkeys(NUTRIMENTS, 0.0))
+        )
+
+    @classmethod
+    def _arbre_sous_recettes(cls, recette_ids=None):
+        """
+        CTE récursive (racine, id) : chaque recette et toutes ses sous-recettes.
+
+        UNION => chaque sous-recette comptée une fois par racine,
+        comme le parcours de get_tous_ingredients_recursif().
+
+        Args:
+            recette_ids: IDs des racines (None = toutes les recettes)
+        """
+        racines = select(cls.id.label('racine'), cls.id.label('id'))
+        if recette_ids is not None:
+            racines = racines.where(cls.id.in_(recette_ids))
+        arbre = racines.cte('arbre', recursive=True)
+        return arbre.union(
+            select(arbre.c.racine, recette_sub_recette.c.sous_recette_id)
+            .where(recette_sub_recette.c.recette_id == arbre.c.id)
+        )
+
+    @classmethod
+    def disponibilite_multi(cls, recette_ids=None) -> dict:
+        """
+        Disponibilité des ingrédients (sous-recettes incluses) de plusieurs
+        recettes en une requête : même comptage que
+        calculer_disponibilite_ingredients(), sans charger les recettes.
+
+        Args:
+            recette_ids: IDs des recettes (None = toutes les recettes)
+
+        Returns:
+            Dict {recette_id: (nb_ingredients, nb_disponibles)} ; une
+            recette sans ingrédient est absente du résultat
+        """
+        arbre = cls._arbre_sous_recettes(recette_ids)
+        disponible = case((StockFrigo.quantite >= IngredientRecette.quantite, 1), else_=0)
+
+        lignes = db.session.execute(
+            select(arbre.c.racine, func.count(IngredientRecette.id), func.sum(disponible))
+            .select_from(arbre)
+            .join(IngredientRecette, IngredientRecette.recette_id == arbre.c.id)
+            .outerjoin(StockFrigo, StockFrigo.ingredient_id == IngredientRecette.ingredient_id)
+            .group_by(arbre.c.racine)
+        )
+        return {racine: (nb, nb_disponibles) for racine, nb, nb_disponibles in lignes}
+
+    @classmethod
+    def scores_saisonniers_multi(cls, saison: str) -> dict:
+        """
+        Saisonnalité des ingrédients directs de toutes les recettes en une
+        requête : même comptage que calculer_score_saisonnier(), sans
+        charger les recettes ni les saisons de leurs ingrédients.
+
+        Args:
+            saison: Saison de référence
+
+        Returns:
+            Dict {recette_id: (nb_ingredients, nb_de_saison)} ; une recette
+            sans ingrédient direct est absente du résultat
+        """
+        saisons = IngredientSaison.ingredient_id == IngredientRecette.ingredient_id
+        # Sans saison renseignée : disponible toute l'année (cf. est_de_saison)
+        de_saison = case(
+            (~select(IngredientSaison.id).where(saisons).exists(), 1),
+            (select(IngredientSaison.id).where(saisons, IngredientSaison.saison == saison).exists(), 1),
+            else_=0
+        )
+
+        lignes = db.session.execute(
+            select(IngredientRecette.recette_id, func.count(IngredientRecette.id), func.sum(de_saison))
+            .group_by(IngredientRecette.recette_id)
+        )
+        return {recette_id: (nb, nb_de_saison) for recette_id, nb, nb_de_saison in lignes}
+
+    @classmethod
+    def agreger_cout_nutrition_multi(cls, recette_ids) -> dict:
+        """
+        Variante groupée de agreger_cout_nutrition() : une requête pour N recettes.
+
+        Args:
+            recette_ids: IDs des recettes
+
+        Returns:
+            Dict {recette_id: (cout, nutrition)} ; une recette sans
+            ingrédient (ou inexistante) est absente du résultat
+        """
+        if not recette_ids:
+            return {}
+
+        arbre = cls._arbre_sous_recettes(recette_ids)
+
+        en_pieces = (Ingredient.unite == 'pièce') & (Ingredient.poids_piece > 0)
+        quantite_g = case(
+            (en_pieces, IngredientRecette.quantite * Ingredient.poids_piece),
+            else_=IngredientRecette.quantite
+        )
+        prix = case(
+            ((IngredientRecette.quantite > 0) & (Ingredient.prix_unitaire > 0),
+             arrondi_sql(quantite_g * Ingredient.prix_unitaire)),
+            else_=0
+        )
+
+        lignes = db.session.execute(
+            select(
+                arbre.c.racine,
+                func.coalesce(func.sum(prix), 0),
+                *(func.coalesce(func.sum(
+                    func.coalesce(getattr(Ingredient, nom), 0) * quantite_g / 100.0
+                ), 0) for nom in NUTRIMENTS)
+            )
+            .select_from(arbre)
+            .join(IngredientRecette, IngredientRecette.recette_id == arbre.c.id)
+            .join(Ingredient, Ingredient.id == IngredientRecette.ingredient_id)
+            .group_by(arbre.c.racine)
+        )
+
+        return {
+            racine: (
+                arrondi(float(cout)),
+                {nom: arrondi(float(val), 1) for nom, val in zip(NUTRIMENTS, valeurs)}
+            )
+            for racine, cout, *valeurs in lignes
+        }
+
+    @classmethod
+    def recalculer_cout_nutrition(cls, recette_ids):
+        """
+        Met à jour cout_cache / <nutriment>_cache des recettes données
+        et de toutes les recettes qui les utilisent comme sous-recette.
+
+        Appelé automatiquement après un flush qui touche les ingrédients
+        d'une recette ; à appeler explicitement après une écriture hors ORM
+        (insert/delete Core sur IngredientRecette).
 
-        return {k: round(v, 1) for k, v in nutrition.items()}
+        Args:
+            recette_ids: IDs des recettes modifiées
+        """
+        if not recette_ids:
+            return
+
+        # Les recettes parentes héritent du coût de leurs sous-recettes
+        ancetres = (
+            select(cls.id.label('id'))
+            .where(cls.id.in_(recette_ids))
+            .cte('ancetres', recursive=True)
+        )
+        ancetres = ancetres.union(
+            select(recette_sub_recette.c.recette_id)
+            .where(recette_sub_recette.c.sous_recette_id == ancetres.c.id)
+        )
+        ids = db.session.scalars(select(ancetres.c.id)).all()
+        if not ids:
+            return
+
+        agregats = cls.agreger_cout_nutrition_multi(ids)
+        vide = (0.0, dict.fromkeys(NUTRIMENTS, 0.0))
+
+        lignes = []
+        for recette_id in ids:
+            cout, nutrition = agregats.get(recette_id, vide)
+            ligne = {'b_id': recette_id, 'cout_cache': cout}
+            ligne.update((f'{nom}_cache', valeur) for nom, valeur in nutrition.items())
+            lignes.append(ligne)
+
+        table = cls.__table__
+        db.session.execute(
+            update(table)
+            .where(table.c.id == bindparam('b_id'))
+            .values({col: bindparam(col) for col in _COLONNES_CACHE}),
+            lignes
+        )
+
+        # Instances déjà chargées : mise à jour sans marquer l'objet modifié
+        valeurs = {ligne['b_id']: ligne for ligne in lignes}
+        for obj in list(db.session.identity_map.values()):
+            ligne = valeurs.get(obj.id) if isinstance(obj, cls) else None
+            if ligne:
+                for col in _COLONNES_CACHE:
+                    set_committed_value(obj, col, ligne[col])
 
     def to_dict(self, include_ingredients=False, include_etapes=False,
                 include_nutrition=False, include_cout=False,
@@ -426,6 +748,7 @@ class Recette(db.Model):
             'nom': self.nom,
             'instructions': self.instructions,
             'image': self.image,
+            'image_thumb': self.image_thumb,
             'type_recette': self.type_recette,
             'temps_preparation': self.temps_preparation,
             'temps_cuisson': self.temps_cuisson,
@@ -500,12 +823,152 @@ class IngredientRecette(db.Model):
 
     __table_args__ = (
         db.Index('idx_ing_recette_composite', 'recette_id', 'ingredient_id'),
+        db.Index('idx_ing_recette_ingredient_recette', 'ingredient_id', 'recette_id'),
     )
 
     def __repr__(self):
         return f'<IngredientRecette R:{self.recette_id} I:{self.ingredient_id}>'
 
 
+# Recherche par sous-chaîne sur SQLite : table FTS5 (tokenizer trigram) sur
+# recette.nom, tenue à jour par triggers. L'équivalent PostgreSQL est
+# l'index idx_recette_nom_trgm.
+DDL_RECHERCHE_SQLITE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recette_fts USING fts5("
+    "nom, content='recette', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS recette_fts_ai AFTER INSERT ON recette BEGIN "
+    "INSERT INTO recette_fts(rowid, nom) VALUES (new.id, new.nom); END",
+    "CREATE TRIGGER IF NOT EXISTS recette_fts_ad AFTER DELETE ON recette BEGIN "
+    "INSERT INTO recette_fts(recette_fts, rowid, nom) VALUES ('delete', old.id, old.nom); END",
+    "CREATE TRIGGER IF NOT EXISTS recette_fts_au AFTER UPDATE OF nom ON recette BEGIN "
+    "INSERT INTO recette_fts(recette_fts, rowid, nom) VALUES ('delete', old.id, old.nom); "
+    "INSERT INTO recette_fts(rowid, nom) VALUES (new.id, new.nom); END",
+)
+
+# Tokenizer trigram : SQLite >= 3.34, compilé avec FTS5
+SQLITE_VERSION_MIN_TRIGRAMME = (3, 34, 0)
+
+
+def _recherche_fts_supportee(ddl, target, bind, **kw) -> bool:
+    """
+    Indique si la base SQLite peut créer la table FTS5 trigramme.
+
+    Sinon la table n'est pas créée et la recherche repasse par LIKE
+    (voir utils.queries._recherche_fts_disponible).
+    """
+    version = bind.exec_driver_sql('SELECT sqlite_version()').scalar()
+    if tuple(int(n) for n in version.split('.')[:3]) < SQLITE_VERSION_MIN_TRIGRAMME:
+        return False
+    return bool(bind.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar())
+
+
+for _instruction in DDL_RECHERCHE_SQLITE:
+    event.listen(Recette.__table__, 'after_create',
+                 DDL(_instruction).execute_if(dialect='sqlite', callable_=_recherche_fts_supportee))
+event.listen(Recette.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS recette_fts').execute_if(dialect='sqlite'))
+
+
+# Attente (ms) d'un verrou SQLite avant "database is locked" : SQLite
+# patiente lui-même au lieu de faire échouer la transaction.
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+@event.listens_for(Engine, 'connect')
+def _configurer_connexion_sqlite(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.close()
+
+
+# ============================================
+# COÛT / NUTRITION PRÉCALCULÉS
+# ============================================
+
+_COLONNES_CACHE = ('cout_cache',) + tuple(f'{nom}_cache' for nom in NUTRIMENTS)
+_nutrition_cache = attrgetter(*_COLONNES_CACHE[1:])
+
+# Colonnes d'Ingredient dont dépendent coût et nutrition
+_COLONNES_INGREDIENT_COUT = ('prix_unitaire', 'unite', 'poids_piece') + NUTRIMENTS
+
+
+def _a_change(obj, attributs) -> bool:
+    """Indique si l'un des attributs de obj a un historique de modification."""
+    etat = inspect(obj)
+    return any(etat.attrs[nom].history.has_changes() for nom in attributs)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _collecter_recettes_a_recalculer(session, flush_context, instances):
+    """
+    Repère les recettes dont le coût/la nutrition change avec ce flush.
+
+    Les IDs ne sont résolus qu'après le flush (objets nouveaux sans ID).
+    """
+    liens, recettes, recette_ids, ingredient_ids = [], [], set(), set()
+
+    for obj in session.new:
+        if isinstance(obj, IngredientRecette):
+            liens.append(obj)
+
+    for obj in session.dirty:
+        if isinstance(obj, IngredientRecette):
+            if _a_change(obj, ('quantite', 'ingredient_id', 'recette_id', 'ingredient')):
+                liens.append(obj)
+                # Ancienne recette si le lien a été déplacé
+                recette_ids.update(inspect(obj).attrs.recette_id.history.deleted)
+        elif isinstance(obj, Ingredient):
+            if _a_change(obj, _COLONNES_INGREDIENT_COUT):
+                ingredient_ids.add(obj.id)
+        elif isinstance(obj, Recette):
+            if _a_change(obj, ('sous_recettes', 'ingredients')):
+                recettes.append(obj)
+
+    for obj in session.deleted:
+        if isinstance(obj, IngredientRecette):
+            recette_ids.add(obj.recette_id)
+        elif isinstance(obj, Recette):
+            # Les recettes parentes perdent cette sous-recette
+            recette_ids.update(session.scalars(
+                select(recette_sub_recette.c.recette_id)
+                .where(recette_sub_recette.c.sous_recette_id == obj.id)
+            ))
+
+    if ingredient_ids:
+        recette_ids.update(session.scalars(
+            select(IngredientRecette.recette_id)
+            .where(IngredientRecette.ingredient_id.in_(ingredient_ids))
+            .distinct()
+        ))
+
+    if liens or recettes or recette_ids:
+        a_recalculer = session.info.setdefault('recettes_a_recalculer', [])
+        a_recalculer.append((liens, recettes, recette_ids))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _recalculer_cout_nutrition(session, flush_context):
+    """Met à jour les colonnes précalculées des recettes repérées avant le flush."""
+    a_recalculer = session.info.pop('recettes_a_recalculer', None)
+    if not a_recalculer:
+        return
+
+    ids = set()
+    for liens, recettes, recette_ids in a_recalculer:
+        ids.update(lien.recette_id for lien in liens)
+        ids.update(recette.id for recette in recettes)
+        ids.update(recette_ids)
+    ids.discard(None)
+
+    Recette.recalculer_cout_nutrition(ids)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _oublier_recettes_a_recalculer(session, previous_transaction):
+    session.info.pop('recettes_a_recalculer', None)
+
+
 class RecettePlanifiee(db.Model):
     """Modèle pour les recettes planifiées."""
     id = db.Column(db.Integer, primary_key=True)
@@ -5,6 +5,9 @@ from sqlalchemy.orm import joinedload
 from datetime import datetime
 from utils.calculs import calculer_budget_courses, calculer_prix_item
 from utils.stock import ajouter_au_stock
+from utils.cache import cle_versionnee, versions_partagees
+from utils.cache_middleware import generate_etag, conditional_response, conditional_response_lazy
+from utils.queries import get_courses_non_achetees
 
 api_bp = Blueprint('api', __name__)
 
@@ -75,16 +78,14 @@ def get_courses():
     Récupérer la liste des courses à faire.
     """
     try:
-        items = ListeCourses.query.options(
-            joinedload(ListeCourses.ingredient)
-        ).filter_by(achete=False).all()
+        items = get_courses_non_achetees()
 
         budget = calculer_budget_courses(items, include_details=True)
 
         courses_list = []
         for item, detail in zip(items, budget.details):
             courses_list.append({
-                **detail,
+                **detail.to_dict(),
                 'image': item.ingredient.image,
                 'categorie': item.ingredient.categorie,
                 'achete': False,
@@ -206,33 +207,41 @@ def get_frigo():
     Récupérer le contenu du frigo.
     """
     try:
-        stocks = StockFrigo.query.options(
-            joinedload(StockFrigo.ingredient)
-        ).filter(StockFrigo.quantite > 0).all()
-
-        frigo_list = []
-        for stock in stocks:
-            frigo_list.append({
-                'id': stock.id,
-                'ingredient_id': stock.ingredient_id,
-                'ingredient_nom': stock.ingredient.nom,
-                'quantite': stock.quantite,
-                'unite': stock.ingredient.unite,
-                'image': stock.ingredient.image,
-                'categorie': stock.ingredient.categorie
-            })
+        if not versions_partagees():
+            return conditional_response(_frigo_json())
 
-        return jsonify({
-            'success': True,
-            'items': frigo_list,
-            'count': len(frigo_list)
-        })
+        etag = generate_etag(cle_versionnee('api_frigo', 'stock', 'ingredients'))
+        return conditional_response_lazy(etag, _frigo_json)
 
     except Exception as e:
         current_app.logger.error(f'Erreur dans get_frigo: {str(e)}')
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def _frigo_json():
+    stocks = StockFrigo.query.options(
+        joinedload(StockFrigo.ingredient)
+    ).filter(StockFrigo.quantite > 0).all()
+
+    frigo_list = []
+    for stock in stocks:
+        frigo_list.append({
+            'id': stock.id,
+            'ingredient_id': stock.ingredient_id,
+            'ingredient_nom': stock.ingredient.nom,
+            'quantite': stock.quantite,
+            'unite': stock.ingredient.unite,
+            'image': stock.ingredient.image,
+            'categorie': stock.ingredient.categorie
+        })
+
+    return jsonify({
+        'success': True,
+        'items': frigo_list,
+        'count': len(frigo_list)
+    })
+
+
 @api_bp.route('/ingredients', methods=['GET'])
 @require_api_key
 def get_ingredients():
@@ -240,25 +249,33 @@ def get_ingredients():
     Récupérer la liste de tous les ingrédients.
     """
     try:
-        ingredients = Ingredient.query.order_by(Ingredient.nom).all()
-
-        ingredients_list = []
-        for ing in ingredients:
-            ingredients_list.append({
-                'id': ing.id,
-                'nom': ing.nom,
-                'unite': ing.unite,
-                'prix_unitaire': ing.prix_unitaire,
-                'image': ing.image,
-                'categorie': ing.categorie
-            })
+        if not versions_partagees():
+            return conditional_response(_ingredients_json())
 
-        return jsonify({
-            'success': True,
-            'items': ingredients_list,
-            'count': len(ingredients_list)
-        })
+        etag = generate_etag(cle_versionnee('api_ingredients', 'ingredients'))
+        return conditional_response_lazy(etag, _ingredients_json)
 
     except Exception as e:
         current_app.logger.error(f'Erreur dans get_ingredients: {str(e)}')
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _ingredients_json():
+    ingredients = Ingredient.query.order_by(Ingredient.nom).all()
+
+    ingredients_list = []
+    for ing in ingredients:
+        ingredients_list.append({
+            'id': ing.id,
+            'nom': ing.nom,
+            'unite': ing.unite,
+            'prix_unitaire': ing.prix_unitaire,
+            'image': ing.image,
+            'categorie': ing.categorie
+        })
+
+    return jsonify({
+        'success': True,
+        'items': ingredients_list,
+        'count': len(ingredients_list)
+    })
@@ -1,10 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from models.models import db, ListeCourses, Ingredient
-from utils.database import db_transaction_with_flash
+from utils.database import db_transaction, db_transaction_with_flash
 from utils.calculs import calculer_budget_courses
+from utils.cache import get_ingredients_options
 from utils.forms import parse_positive_float, parse_checkbox
 from utils.stock import ajouter_au_stock
-from utils.queries import get_courses_non_achetees, get_course_by_ingredient, nettoyer_courses_orphelines
+from utils.queries import (
+    get_courses_non_achetees, get_course_by_ingredient, nettoyer_courses_orphelines, supprimer_courses
+)
 
 courses_bp = Blueprint('courses', __name__)
 
@@ -72,6 +75,7 @@ def liste():
     try:
         nb_orphelins = nettoyer_courses_orphelines()
         if nb_orphelins > 0:
+            db.session.commit()
             current_app.logger.warning(
                 f'Nettoyage automatique: {nb_orphelins} item(s) orphelin(s) supprimé(s) de la liste de courses'
             )
@@ -80,7 +84,7 @@ def liste():
 
         budget = calculer_budget_courses(items)
 
-        all_ingredients = Ingredient.query.order_by(Ingredient.nom).all()
+        all_ingredients = get_ingredients_options()
 
         return render_template(
             'courses.html',
@@ -138,20 +142,14 @@ def vider():
     Vider complètement la liste de courses (items non achetés).
     """
     try:
-        items = ListeCourses.query.filter_by(achete=False).all()
-        nb_items = len(items)
+        with db_transaction_with_flash(error_message='Erreur lors du vidage de la liste'):
+            nb_items = supprimer_courses(achete=False)
 
         if nb_items == 0:
             flash('La liste de courses est déjà vide.', 'info')
             return redirect(url_for('courses.liste'))
 
-        with db_transaction_with_flash(
-            success_message=f'{nb_items} article(s) supprimé(s) de la liste.',
-            error_message='Erreur lors du vidage de la liste'
-        ):
-            for item in items:
-                db.session.delete(item)
-
+        flash(f'{nb_items} article(s) supprimé(s) de la liste.', 'success')
         current_app.logger.info(f'Liste de courses vidée: {nb_items} items')
 
     except Exception as e:
@@ -167,20 +165,14 @@ def vider_historique():
     Vider l'historique des courses achetées.
     """
     try:
-        items_achetes = ListeCourses.query.filter_by(achete=True).all()
-        nb_items = len(items_achetes)
+        with db_transaction_with_flash(error_message='Erreur lors du vidage de l\'historique'):
+            nb_items = supprimer_courses(achete=True)
 
         if nb_items == 0:
             flash('L\'historique est déjà vide.', 'info')
             return redirect(url_for('courses.liste'))
 
-        with db_transaction_with_flash(
-            success_message=f'{nb_items} article(s) supprimé(s) de l\'historique.',
-            error_message='Erreur lors du vidage de l\'historique'
-        ):
-            for item in items_achetes:
-                db.session.delete(item)
-
+        flash(f'{nb_items} article(s) supprimé(s) de l\'historique.', 'success')
         current_app.logger.info(f'Historique des courses vidé: {nb_items} items')
 
     except Exception as e:
@@ -240,7 +232,8 @@ def nettoyer():
     Route manuelle pour nettoyer les items orphelins.
     """
     try:
-        nb_orphelins = nettoyer_courses_orphelines()
+        with db_transaction():
+            nb_orphelins = nettoyer_courses_orphelines()
 
         if nb_orphelins > 0:
             flash(f'{nb_orphelins} article(s) orphelin(s) supprimé(s).', 'success')
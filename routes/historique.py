@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 
 from models import db, RecettePlanifiee, Recette, Ingredient, IngredientRecette
+from utils.cache import get_historique_stats_cached
 
 historique_bp = Blueprint('historique', __name__, url_prefix='/historique')
 
@@ -190,21 +191,11 @@ def liste():
     .limit(10)\
     .all()
 
-    stats_counts = db.session.query(
-        func.count(RecettePlanifiee.id).label('total'),
-        func.sum(case(
-            (RecettePlanifiee.date_preparation >= debut_mois, 1),
-            else_=0
-        )).label('mois'),
-        func.sum(case(
-            (RecettePlanifiee.date_preparation >= debut_semaine, 1),
-            else_=0
-        )).label('semaine')
-    ).filter(RecettePlanifiee.preparee == True).first()
+    stats_counts = get_historique_stats_cached()
 
-    total_recettes = stats_counts.total or 0
-    recettes_mois = stats_counts.mois or 0
-    recettes_semaine = stats_counts.semaine or 0
+    total_recettes = stats_counts['total']
+    recettes_mois = stats_counts['mois']
+    recettes_semaine = stats_counts['semaine']
 
     stats_couts = db.session.query(
         func.sum(IngredientRecette.quantite * Ingredient.prix_unitaire).label('cout_total'),
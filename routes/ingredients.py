@@ -1,15 +1,15 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from models.models import db, Ingredient, IngredientSaison
-from utils.files import save_uploaded_file, delete_file
-from utils.database import db_transaction_with_flash, paginate_query
+from utils.files import save_uploaded_file, delete_file_after_commit
+from utils.database import db_transaction_with_flash, paginate_query, estimer_nombre_lignes
 from utils.forms import (
     parse_float, parse_float_or_none, clean_string,
     clean_string_or_none, parse_nutrition_values,
     validate_unique_ingredient, validate_categorie
 )
 from utils.saisons import get_saison_actuelle, get_ingredients_de_saison
+from utils.cache import get_categories_count_cached
 from constants import CATEGORIES, SAISONS_NOMS, SAISONS_VALIDES
-from utils.queries import get_categories_count
 
 ingredients_bp = Blueprint('ingredients', __name__)
 
@@ -146,9 +146,14 @@ def liste():
 
     query = query.order_by(Ingredient.nom)
 
-    pagination = paginate_query(query, page, items_per_page)
+    # Catalogue complet au-delà de la 1re page : estimation au lieu d'un COUNT
+    total_estime = None
+    if page > 1 and not (search_query or categorie_filter or stock_filter or saison_filter):
+        total_estime = estimer_nombre_lignes(Ingredient.__tablename__)
 
-    categories_count = get_categories_count()
+    pagination = paginate_query(query, page, items_per_page, total_estime=total_estime)
+
+    categories_count = get_categories_count_cached()
 
     saison_actuelle = get_saison_actuelle()
 
@@ -200,10 +205,10 @@ def modifier(id):
                 if 'image' in request.files:
                     file = request.files['image']
                     if file and file.filename:
-                        if ingredient.image:
-                            delete_file(ingredient.image)
                         filepath = save_uploaded_file(file, prefix=f'ing_{nouveau_nom}')
                         if filepath:
+                            if ingredient.image:
+                                delete_file_after_commit(db.session, ingredient.image)
                             ingredient.image = filepath
 
                 saisons = parse_saisons_list(request.form)
@@ -238,7 +243,7 @@ def supprimer(id):
 
     try:
         if ingredient.image:
-            delete_file(ingredient.image)
+            delete_file_after_commit(db.session, ingredient.image)
 
         db.session.delete(ingredient)
         db.session.commit()
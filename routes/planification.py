@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models.models import db, RecettePlanifiee
 from datetime import datetime
 from utils.courses import retirer_ingredients_courses, deduire_ingredients_frigo
+from utils.database import db_transaction
 
 planification_bp = Blueprint('planification', __name__)
 
@@ -16,12 +17,13 @@ def liste():
 def preparer(id):
     """Marquer une recette planifiée comme préparée et mettre à jour le frigo."""
     plan = RecettePlanifiee.query.get_or_404(id)
-    plan.preparee = True
-    plan.date_preparation = datetime.utcnow()
 
-    nb_deduits = deduire_ingredients_frigo(plan.recette_id)
+    # Préparation et déduction du stock : un seul commit, tout ou rien
+    with db_transaction():
+        plan.preparee = True
+        plan.date_preparation = datetime.utcnow()
+        deduire_ingredients_frigo(plan.recette_id)
 
-    db.session.commit()
     flash(f'Recette "{plan.recette_ref.nom}" marquée comme préparée ! Le frigo a été mis à jour.', 'success')
     return redirect(url_for('recettes.cuisiner_avec_frigo'))
 
@@ -33,10 +35,9 @@ def annuler(id):
     plan = RecettePlanifiee.query.get_or_404(id)
     nom_recette = plan.recette_ref.nom
 
-    resultat = retirer_ingredients_courses(plan.recette_id)
-
-    db.session.delete(plan)
-    db.session.commit()
+    with db_transaction():
+        resultat = retirer_ingredients_courses(plan.recette_id)
+        db.session.delete(plan)
 
     message = f'Planification de "{nom_recette}" annulée.'
 
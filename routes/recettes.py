@@ -1,18 +1,33 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify
-from sqlalchemy.orm import joinedload
-from models.models import db, Recette, Ingredient, IngredientRecette, RecettePlanifiee, EtapeRecette, StockFrigo, ListeCourses
-from constants import TYPES_RECETTES, SAISONS_NOMS, SAISONS_VALIDES, SAISONS_EMOJIS
-from utils.files import delete_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
+from sqlalchemy import delete
+from sqlalchemy.orm import joinedload, load_only
+from models.models import db, Recette, IngredientRecette, EtapeRecette, RecettePlanifiee
+from constants import TYPES_RECETTES, SAISONS_EMOJIS
+from utils.files import delete_file_after_commit
 from utils.courses import ajouter_ingredients_manquants_courses
 from utils.forms import parse_recette_form, validate_unique_recette, validate_type_recette
-from utils.recommandation import (MoteurRecommandation, get_historique_recettes_ids, get_cout_max_recettes, get_temps_max_recettes)
+from utils.recommandation import (get_moteur_recommandation, get_historique_recettes_ids, get_cout_max_recettes, get_temps_max_recettes,
+                                  options_chargement_recettes, get_recommandations_cached,
+                                  cle_recommandations)
 from utils.saisons import get_saison_actuelle
 from utils.recette_service import creer_recette, modifier_recette
-from utils.database import db_transaction_with_flash, paginate_query
-import os
+from utils.database import db_transaction, db_transaction_with_flash, paginate_keyset
+from utils.cache import (get_ingredients_options, get_cout_nutrition_recette_cached,
+                         invalidate_recettes_cache)
+from utils.queries import get_recettes_candidates, filtre_nom_recette
 
 recettes_bp = Blueprint('recettes', __name__)
 
+# Poids par défaut des critères de la page "Cuisiner avec mon frigo"
+_POIDS_DEFAULTS = (
+    ('disponibilite', 1.0),
+    ('saison', 0.7),
+    ('variete', 0.6),
+    ('cout', 0.4),
+    ('temps', 0.3),
+    ('nutrition', 0.2),
+)
+
 
 @recettes_bp.route('/', methods=['GET', 'POST'])
 def liste():
@@ -32,37 +47,47 @@ def liste():
             success_message=None,
             error_message='Erreur lors de la création de la recette.'
         ):
-            recette = creer_recette(request.form, request.files)
+            recette = creer_recette(request.form, request.files, recette_data)
             flash(f'Recette "{recette.nom}" créée !', 'success')
+        # Après le commit : une requête concurrente ne peut pas remettre en
+        # cache, sous la nouvelle version, des données non commitées
+        invalidate_recettes_cache()
 
         return redirect(url_for('recettes.liste'))
 
     search_query = request.args.get('search', '')
     type_filter = request.args.get('type', '')
-    ingredient_filter_str = request.args.get('ingredient', '')
-    ingredient_filter = int(ingredient_filter_str) if ingredient_filter_str else None
-    page = request.args.get('page', 1, type=int)
+    ingredient_filter = request.args.get('ingredient', type=int)
+    after = request.args.get('after')
+    after_id = request.args.get('after_id', type=int)
 
     items_per_page = current_app.config.get('ITEMS_PER_PAGE_RECETTES', 20)
 
     query = Recette.query.options(joinedload(Recette.ingredients).joinedload(IngredientRecette.ingredient))
 
     if search_query:
-        query = query.filter(Recette.nom.ilike(f'%{search_query}%'))
+        query = query.filter(filtre_nom_recette(search_query))
 
     if type_filter:
         query = query.filter(Recette.type_recette == type_filter)
 
     if ingredient_filter:
-        query = query.join(IngredientRecette).filter(IngredientRecette.ingredient_id == ingredient_filter)
+        # Semi-jointure EXISTS : une recette contenant deux fois l'ingrédient
+        # n'apparaît qu'une fois (pagination et total exacts)
+        query = query.filter(Recette.ingredients.any(IngredientRecette.ingredient_id == ingredient_filter))
 
-    query = query.order_by(Recette.nom)
+    pagination = paginate_keyset(query, Recette.nom, Recette.id,
+                                 after=after, after_id=after_id,
+                                 per_page=items_per_page)
 
-    pagination = paginate_query(query, page, items_per_page)
+    if search_query or type_filter or ingredient_filter:
+        pagination['total'] = query.order_by(None).count()
 
-    ingredients = Ingredient.query.order_by(Ingredient.nom).all()
+    ingredients = get_ingredients_options()
 
-    toutes_recettes = Recette.query.order_by(Recette.nom).all()
+    toutes_recettes = Recette.query.options(
+        load_only(Recette.id, Recette.nom)
+    ).order_by(Recette.nom).all()
 
     return render_template('recettes.html',
                          recettes=pagination['items'],
@@ -77,9 +102,8 @@ def liste():
 
 @recettes_bp.route('/<int:id>')
 def detail(id):
-    recette = Recette.query.get_or_404(id)
-    cout_estime = recette.calculer_cout()
-    nutrition = recette.calculer_nutrition()
+    recette = db.session.get(Recette, id) or abort(404)
+    cout_estime, nutrition = get_cout_nutrition_recette_cached(recette)
 
     return render_template('recette_detail.html',
                          recette=recette,
@@ -90,13 +114,12 @@ def detail(id):
 @recettes_bp.route('/planifier-rapide/<int:id>', methods=['POST'])
 def planifier_rapide(id):
     """Planifier rapidement une recette depuis la liste."""
-    recette = Recette.query.get_or_404(id)
-
-    planifiee = RecettePlanifiee(recette_id=recette.id)
-    db.session.add(planifiee)
+    recette = db.session.get(Recette, id) or abort(404)
 
-    resultat = ajouter_ingredients_manquants_courses(recette.id)
-    db.session.commit()
+    # Planification et ajout aux courses : un seul commit, tout ou rien
+    with db_transaction():
+        db.session.add(RecettePlanifiee(recette_id=recette.id))
+        resultat = ajouter_ingredients_manquants_courses(recette.id)
 
     nb_ajoutes = resultat['ajoutes']
     nb_maj = resultat['maj']
@@ -123,10 +146,10 @@ def planifier_rapide(id):
 
 @recettes_bp.route('/modifier/<int:id>', methods=['GET', 'POST'])
 def modifier(id):
-    recette = Recette.query.options(
+    recette = db.session.get(Recette, id, options=[
         joinedload(Recette.ingredients).joinedload(IngredientRecette.ingredient),
         joinedload(Recette.etapes)
-    ).get_or_404(id)
+    ]) or abort(404)
 
     if request.method == 'POST':
         try:
@@ -143,10 +166,11 @@ def modifier(id):
             error_message='Erreur lors de la modification de la recette.'
         ):
             modifier_recette(recette, request.form, request.files)
+        invalidate_recettes_cache()
 
         return redirect(url_for('recettes.detail', id=recette.id))
 
-    ingredients = Ingredient.query.order_by(Ingredient.nom).all()
+    ingredients = get_ingredients_options()
     toutes_recettes = Recette.query.filter(Recette.id != id).order_by(Recette.nom).all()
 
     return render_template(
@@ -166,24 +190,31 @@ def supprimer(id):
     Args:
         id: ID de la recette
     """
-    recette = Recette.query.get_or_404(id)
+    recette = db.session.get(Recette, id) or abort(404)
     nom = recette.nom
 
     with db_transaction_with_flash(
         success_message=f'Recette "{nom}" supprimée !',
         error_message=f'Erreur lors de la suppression de "{nom}"'
     ):
-        planifications = RecettePlanifiee.query.filter_by(recette_id=id).all()
-        if planifications:
-            flash(f'{len(planifications)} planification(s) associée(s) supprimée(s).', 'info')
-            for plan in planifications:
-                db.session.delete(plan)
+        nb_planifications = db.session.execute(
+            delete(RecettePlanifiee).where(RecettePlanifiee.recette_id == id)
+        ).rowcount
+        if nb_planifications:
+            flash(f'{nb_planifications} planification(s) associée(s) supprimée(s).', 'info')
+
+        # Lignes enfants en une instruction chacune plutôt qu'un DELETE par ligne
+        db.session.execute(delete(IngredientRecette).where(IngredientRecette.recette_id == id))
+        db.session.execute(delete(EtapeRecette).where(EtapeRecette.recette_id == id))
+        db.session.expire(recette, ['ingredients', 'etapes', 'planifications'])
 
         if recette.image:
-            delete_file(recette.image)
+            delete_file_after_commit(db.session, recette.image)
 
         db.session.delete(recette)
 
+    invalidate_recettes_cache()
+
     return redirect(url_for('recettes.liste'))
 
 
@@ -198,35 +229,38 @@ def cuisiner_avec_frigo():
     limit = request.args.get('limit', 20, type=int)
 
     poids_config = {
-        'disponibilite': float(request.args.get('poids_disponibilite', 1.0)),
-        'saison': float(request.args.get('poids_saison', 0.7)),
-        'variete': float(request.args.get('poids_variete', 0.6)),
-        'cout': float(request.args.get('poids_cout', 0.4)),
-        'temps': float(request.args.get('poids_temps', 0.3)),
-        'nutrition': float(request.args.get('poids_nutrition', 0.2))
+        critere: request.args.get(f'poids_{critere}', defaut, type=float)
+        for critere, defaut in _POIDS_DEFAULTS
     }
 
-    moteur = MoteurRecommandation()
-
-    moteur.set_contexte(
-        saison=saison,
-        cout_max=get_cout_max_recettes(),
-        temps_max=get_temps_max_recettes(),
-        historique_recettes=get_historique_recettes_ids(14)
-    )
-
+    moteur = get_moteur_recommandation()
     moteur.configurer_criteres(poids_config)
-
-    recettes = Recette.query.options(
-        joinedload(Recette.ingredients).joinedload(IngredientRecette.ingredient)
-    ).all()
-
-    recommandations = moteur.recommander(
-        recettes,
-        limit=limit,
-        filtre_realisable=realisable_only,
-        filtre_type=type_filter if type_filter else None
-    )
+    moteur.set_contexte(saison=saison)
+
+    def calculer_recommandations():
+        moteur.set_contexte(
+            cout_max=get_cout_max_recettes(),
+            temps_max=get_temps_max_recettes(),
+            historique_recettes=get_historique_recettes_ids(14)
+        )
+
+        # Type et ingrédients directs manquants sont filtrés en SQL ; le moteur
+        # vérifie encore la réalisabilité avec les sous-recettes.
+        recettes = get_recettes_candidates(
+            *options_chargement_recettes(),
+            type_recette=type_filter or None,
+            realisable_only=realisable_only
+        ).all()
+
+        return moteur.recommander(
+            recettes,
+            limit=limit,
+            filtre_realisable=realisable_only
+        )
+
+    cle = cle_recommandations('cuisiner', moteur, type=type_filter,
+                              realisable=realisable_only, limit=limit)
+    recommandations = get_recommandations_cached(cle, calculer_recommandations)
 
     nb_realisables = sum(
         1 for r in recommandations
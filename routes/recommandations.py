@@ -1,18 +1,62 @@
-from flask import Blueprint, render_template, request, jsonify, current_app
-from sqlalchemy.orm import joinedload
-from models.models import Recette, IngredientRecette
+from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for
+from models.models import Recette
 from utils.recommandation import (
-    MoteurRecommandation,
     creer_moteur_recommandation_standard,
-    get_historique_recettes_ids,
-    get_cout_max_recettes,
-    get_temps_max_recettes
+    options_chargement_recettes,
+    cle_recommandations,
+    get_recommandations_cached
 )
+from utils.cache import get_ou_calculer
 from utils.saisons import get_saison_actuelle
-from constants import TYPES_RECETTES, SAISONS_NOMS, SAISONS_VALIDES
+from constants import TYPES_RECETTES, SAISONS_EMOJIS
 
 recommandations_bp = Blueprint('recommandations', __name__)
 
+# Paramètres de requête appliqués par /presets/<preset>
+_PRESETS = {
+    'saison': {
+        'poids_saison': '1.0',
+        'poids_disponibilite': '0.7',
+        'poids_variete': '0.5',
+        'poids_cout': '0.3',
+        'poids_temps': '0.2',
+        'poids_nutrition': '0.3'
+    },
+    'economique': {
+        'poids_cout': '1.0',
+        'poids_disponibilite': '0.8',
+        'poids_saison': '0.5',
+        'poids_variete': '0.4',
+        'poids_temps': '0.3',
+        'poids_nutrition': '0.2'
+    },
+    'rapide': {
+        'poids_temps': '1.0',
+        'poids_disponibilite': '0.8',
+        'poids_saison': '0.4',
+        'poids_cout': '0.3',
+        'poids_variete': '0.3',
+        'poids_nutrition': '0.2'
+    },
+    'frigo': {
+        'poids_disponibilite': '1.0',
+        'poids_saison': '0.6',
+        'poids_variete': '0.5',
+        'poids_cout': '0.3',
+        'poids_temps': '0.4',
+        'poids_nutrition': '0.2',
+        'realisable': '1'
+    },
+    'equilibre': {
+        'poids_saison': '0.6',
+        'poids_disponibilite': '0.6',
+        'poids_variete': '0.6',
+        'poids_cout': '0.6',
+        'poids_temps': '0.6',
+        'poids_nutrition': '0.6'
+    }
+}
+
 
 def parse_poids_criteres(form_or_args) -> dict:
     """
@@ -65,16 +109,18 @@ def index():
             'nutrition': 0.3
         })
 
-    recettes = Recette.query.options(
-        joinedload(Recette.ingredients).joinedload(IngredientRecette.ingredient)
-    ).all()
+    def calculer_recommandations():
+        recettes = Recette.query.options(*options_chargement_recettes()).all()
+        return moteur.recommander(
+            recettes,
+            limit=limit,
+            filtre_realisable=realisable_only,
+            filtre_type=type_filter if type_filter else None
+        )
 
-    recommandations = moteur.recommander(
-        recettes,
-        limit=limit,
-        filtre_realisable=realisable_only,
-        filtre_type=type_filter if type_filter else None
-    )
+    cle = cle_recommandations('recommandations', moteur, type=type_filter,
+                              realisable=realisable_only, limit=limit)
+    recommandations = get_recommandations_cached(cle, calculer_recommandations)
 
     return render_template(
         'recommandations.html',
@@ -82,7 +128,7 @@ def index():
         criteres_config=moteur.get_config(),
         saison=saison,
         saison_actuelle=get_saison_actuelle(),
-        saisons=SAISONS_VALIDES,
+        saisons=SAISONS_EMOJIS.items(),
         types_recettes=TYPES_RECETTES,
         type_filter=type_filter,
         realisable_only=realisable_only,
@@ -90,6 +136,36 @@ def index():
     )
 
 
+def serialiser_recommandation(reco) -> dict:
+    """
+    Projection d'une recommandation pour l'API JSON.
+
+    Args:
+        reco: ScoreRecette (ingrédients de la recette déjà chargés)
+
+    Returns:
+        Dict sérialisable
+    """
+    recette = reco.recette
+    return {
+        'recette': {
+            'id': recette.id,
+            'nom': recette.nom,
+            'type_recette': recette.type_recette,
+            'temps_preparation': recette.temps_preparation,
+            'image': recette.image,
+            'image_thumb': recette.image_thumb,
+            'nb_ingredients': len(recette.ingredients)
+        },
+        'score_total': reco.score_total,
+        'scores_details': reco.scores_details,
+        'meta': {
+            k: v for k, v in reco.meta.items()
+            if k in ['saison', 'disponibilite', 'cout']
+        }
+    }
+
+
 @recommandations_bp.route('/api', methods=['GET', 'POST'])
 def api_recommandations():
     """
@@ -125,36 +201,20 @@ def api_recommandations():
         if poids_criteres:
             moteur.configurer_criteres(poids_criteres)
 
-        recettes = Recette.query.options(
-            joinedload(Recette.ingredients).joinedload(IngredientRecette.ingredient)
-        ).all()
-
-        recommandations = moteur.recommander(
-            recettes,
-            limit=limit,
-            filtre_realisable=realisable_only,
-            filtre_type=type_filter
-        )
-
-        result = []
-        for reco in recommandations:
-            recette = reco.recette
-            result.append({
-                'recette': {
-                    'id': recette.id,
-                    'nom': recette.nom,
-                    'type_recette': recette.type_recette,
-                    'temps_preparation': recette.temps_preparation,
-                    'image': recette.image,
-                    'nb_ingredients': len(recette.ingredients)
-                },
-                'score_total': reco.score_total,
-                'scores_details': reco.scores_details,
-                'meta': {
-                    k: v for k, v in reco.meta.items()
-                    if k in ['saison', 'disponibilite', 'cout']
-                }
-            })
+        def calculer_resultat():
+            recettes = Recette.query.options(*options_chargement_recettes()).all()
+            recommandations = moteur.recommander(
+                recettes,
+                limit=limit,
+                filtre_realisable=realisable_only,
+                filtre_type=type_filter
+            )
+            return [serialiser_recommandation(reco) for reco in recommandations]
+
+        # Le résultat sérialisé est mis en cache : un hit ne charge aucune recette
+        cle = cle_recommandations('api_recommandations', moteur, type=type_filter or '',
+                                  realisable=bool(realisable_only), limit=limit)
+        result = get_ou_calculer(cle, calculer_resultat, timeout=600)
 
         return jsonify({
             'success': True,
@@ -180,52 +240,6 @@ def preset(preset: str):
     Args:
         preset: 'saison', 'economique', 'rapide', 'frigo' ou 'equilibre'
     """
-    from flask import redirect, url_for
-
-    presets = {
-        'saison': {
-            'poids_saison': '1.0',
-            'poids_disponibilite': '0.7',
-            'poids_variete': '0.5',
-            'poids_cout': '0.3',
-            'poids_temps': '0.2',
-            'poids_nutrition': '0.3'
-        },
-        'economique': {
-            'poids_cout': '1.0',
-            'poids_disponibilite': '0.8',
-            'poids_saison': '0.5',
-            'poids_variete': '0.4',
-            'poids_temps': '0.3',
-            'poids_nutrition': '0.2'
-        },
-        'rapide': {
-            'poids_temps': '1.0',
-            'poids_disponibilite': '0.8',
-            'poids_saison': '0.4',
-            'poids_cout': '0.3',
-            'poids_variete': '0.3',
-            'poids_nutrition': '0.2'
-        },
-        'frigo': {
-            'poids_disponibilite': '1.0',
-            'poids_saison': '0.6',
-            'poids_variete': '0.5',
-            'poids_cout': '0.3',
-            'poids_temps': '0.4',
-            'poids_nutrition': '0.2',
-            'realisable': '1'
-        },
-        'equilibre': {
-            'poids_saison': '0.6',
-            'poids_disponibilite': '0.6',
-            'poids_variete': '0.6',
-            'poids_cout': '0.6',
-            'poids_temps': '0.6',
-            'poids_nutrition': '0.6'
-        }
-    }
-
-    params = presets.get(preset, presets['equilibre'])
+    params = _PRESETS.get(preset, _PRESETS['equilibre'])
 
     return redirect(url_for('recommandations.index', **params))
@@ -46,3 +46,33 @@ def recette(app, ingredient):
     _db.session.add(EtapeRecette(recette_id=r.id, ordre=1, description='Couper les tomates'))
     _db.session.commit()
     return r
+
+
+@pytest.fixture
+def compter_requetes(app):
+    """
+    Context manager qui relève les requêtes SQL exécutées dans son bloc.
+
+    Usage:
+        with compter_requetes() as requetes:
+            ...
+        assert len(requetes) <= 4
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def compter():
+        requetes = []
+
+        def relever(conn, cursor, statement, parameters, context, executemany):
+            requetes.append(statement)
+
+        engine = _db.engine
+        event.listen(engine, 'before_cursor_execute', relever)
+        try:
+            yield requetes
+        finally:
+            event.remove(engine, 'before_cursor_execute', relever)
+
+    return compter
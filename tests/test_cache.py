@@ -0,0 +1,165 @@
+"""Tests des fonctions de cache."""
+import threading
+import time
+import utils.cache
+from models.models import db, Ingredient, ListeCourses, RecettePlanifiee, StockFrigo
+from utils.cache import (cache, stale_while_revalidate, get_categories_count_cached, get_historique_stats_cached,
+                         get_recettes_count_cached, get_version_cache, incrementer_version_cache)
+
+
+def _attendre_rafraichissement(prefixe):
+    for thread in threading.enumerate():
+        if thread.name == f'swr:{prefixe}':
+            thread.join(timeout=5)
+
+
+class TestStaleWhileRevalidate:
+    def test_valeur_perimee_servie_puis_rafraichie(self, app, monkeypatch):
+        appels = []
+
+        @stale_while_revalidate('test_swr', timeout=300)
+        def calcul():
+            appels.append(1)
+            return len(appels)
+
+        assert calcul() == 1
+        assert calcul() == 1
+
+        # Dans la fenêtre de péremption : valeur périmée, recalcul en arrière-plan
+        maintenant = time.time()
+        monkeypatch.setattr(utils.cache.time, 'time', lambda: maintenant + 400)
+        assert calcul() == 1
+        _attendre_rafraichissement('test_swr')
+        assert calcul() == 2
+
+    def test_recalcul_synchrone_apres_expiration(self, app, monkeypatch):
+        appels = []
+
+        @stale_while_revalidate('test_swr_expire', timeout=300)
+        def calcul():
+            appels.append(1)
+            return len(appels)
+
+        calcul()
+        maintenant = time.time()
+        monkeypatch.setattr(utils.cache.time, 'time', lambda: maintenant + 700)
+        # Au-delà de la fenêtre de péremption : recalcul immédiat
+        assert calcul() == 2
+        assert not any(t.name == 'swr:test_swr_expire' for t in threading.enumerate())
+
+    def test_categories_invalidees_par_un_ajout(self, app, ingredient):
+        avant = get_categories_count_cached()
+        db.session.add(Ingredient(nom='Poivre', unite='g', categorie='Épices'))
+        db.session.commit()
+
+        assert get_categories_count_cached() != avant
+
+    def test_historique_invalide_par_une_preparation(self, app, recette):
+        assert get_historique_stats_cached()['total'] == 0
+        db.session.add(RecettePlanifiee(recette_id=recette.id, preparee=True))
+        db.session.commit()
+
+        assert get_historique_stats_cached()['total'] == 1
+
+
+class TestCompteurs:
+    def test_recettes_count(self, app, recette):
+        db.session.add_all([RecettePlanifiee(recette_id=recette.id),
+                            RecettePlanifiee(recette_id=recette.id, preparee=True)])
+        db.session.commit()
+
+        assert get_recettes_count_cached() == {'total': 1, 'planifiees': 1}
+
+
+class TestVersions:
+    def test_non_evincees_au_dela_du_seuil(self, app):
+        version = get_version_cache('test_seuil')
+        for i in range(app.config.get('CACHE_THRESHOLD', 500) + 10):
+            cache.set(f'cle:{i}', i)
+
+        assert get_version_cache('test_seuil') == version
+        incrementer_version_cache('test_seuil')
+        assert get_version_cache('test_seuil') == version + 1
+
+    def test_backend_partage_monotone_apres_eviction(self, app, monkeypatch):
+        monkeypatch.setattr(utils.cache, '_versions_hors_cache', lambda: False)
+        version = get_version_cache('test_partage')
+        for _ in range(3):
+            incrementer_version_cache('test_partage')
+        assert cache.get('version:test_partage') == version + 3
+
+        # Compteur évincé : la nouvelle graine dépasse toutes les versions servies
+        cache.delete('version:test_partage')
+        assert get_version_cache('test_partage') > version + 3
+
+
+class TestVersionsRequetesGroupees:
+    def test_incrementee_au_commit(self, app, ingredient_avec_stock):
+        version = get_version_cache('stock')
+        StockFrigo.query.delete()
+        assert get_version_cache('stock') == version
+
+        db.session.commit()
+        assert get_version_cache('stock') == version + 1
+
+    def test_ignoree_apres_rollback(self, app, ingredient_avec_stock):
+        version = get_version_cache('stock')
+        StockFrigo.query.delete()
+        db.session.rollback()
+        db.session.commit()
+        assert get_version_cache('stock') == version
+
+    def test_ignoree_sans_ligne_modifiee(self, app, ingredient_avec_stock):
+        version = get_version_cache('stock')
+        StockFrigo.query.filter(StockFrigo.quantite < 0).delete()
+        db.session.commit()
+        assert get_version_cache('stock') == version
+
+
+class TestVersionsAuCommit:
+    """Les modifications ORM n'invalident le cache qu'une fois commitées."""
+
+    def test_ingredients(self, app, ingredient):
+        version, version_processus = get_version_cache('ingredients'), utils.cache._ingredients_version
+        ingredient.prix_unitaire = 0.8
+        db.session.flush()
+        assert get_version_cache('ingredients') == version
+
+        db.session.commit()
+        assert get_version_cache('ingredients') == version + 1
+        assert utils.cache._ingredients_version == version_processus + 1
+
+    def test_ingredients_rollback(self, app, ingredient):
+        version = get_version_cache('ingredients')
+        ingredient.prix_unitaire = 0.8
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert get_version_cache('ingredients') == version
+
+    def test_stock(self, app, ingredient_avec_stock):
+        version = get_version_cache('stock')
+        ingredient_avec_stock.stock.quantite = 10
+        db.session.flush()
+        assert get_version_cache('stock') == version
+
+        db.session.commit()
+        assert get_version_cache('stock') == version + 1
+
+    def test_planifications(self, app, recette):
+        version = get_version_cache('planifications')
+        db.session.add(RecettePlanifiee(recette_id=recette.id))
+        db.session.flush()
+        assert get_version_cache('planifications') == version
+
+        db.session.commit()
+        assert get_version_cache('planifications') == version + 1
+
+    def test_courses(self, app, ingredient):
+        version = get_version_cache('courses')
+        db.session.add(ListeCourses(ingredient_id=ingredient.id, quantite=1))
+        db.session.flush()
+        assert get_version_cache('courses') == version
+
+        db.session.commit()
+        assert get_version_cache('courses') == version + 1
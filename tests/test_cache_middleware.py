@@ -0,0 +1,115 @@
+"""Tests des réponses conditionnelles (ETag)."""
+from datetime import datetime
+from flask import jsonify
+import routes.api
+from models.models import db
+from utils.cache_middleware import add_cache_control, conditional_response, generate_etag
+
+
+class TestAddCacheControl:
+    def test_stale_while_revalidate_desactive_par_defaut(self, app):
+        with app.test_request_context('/'):
+            resp = add_cache_control(max_age=600)(lambda: 'ok')()
+            assert resp.cache_control.max_age == 600
+            assert 'stale-while-revalidate' not in resp.headers['Cache-Control']
+
+    def test_stale_while_revalidate_explicite(self, app):
+        with app.test_request_context('/'):
+            resp = add_cache_control(max_age=600, swr=60)(lambda: 'ok')()
+            assert 'stale-while-revalidate=60' in resp.headers['Cache-Control']
+
+    def test_jamais_avec_must_revalidate(self, app):
+        with app.test_request_context('/'):
+            resp = add_cache_control(max_age=600, must_revalidate=True, swr=60)(lambda: 'ok')()
+            assert resp.cache_control.must_revalidate
+            assert 'stale-while-revalidate' not in resp.headers['Cache-Control']
+
+
+class TestConditionalResponse:
+    def test_etag_calcule_sur_le_corps(self, app):
+        with app.test_request_context('/'):
+            resp = jsonify({'a': 1})
+            etag = conditional_response(resp).headers['ETag']
+            assert etag == generate_etag(resp.get_data())
+
+    def test_304_si_etag_identique(self, app):
+        with app.test_request_context('/'):
+            etag = conditional_response('contenu').headers['ETag']
+        with app.test_request_context('/', headers={'If-None-Match': etag}):
+            resp = conditional_response('contenu')
+            assert resp.status_code == 304
+            assert resp.get_data() == b''
+
+    def test_etag_faible_depuis_la_version(self, app):
+        with app.test_request_context('/', headers={'If-None-Match': 'W/"v42"'}):
+            assert conditional_response('contenu', version=42).status_code == 304
+        with app.test_request_context('/', headers={'If-None-Match': 'W/"v41"'}):
+            resp = conditional_response('contenu', version=42)
+            assert resp.status_code == 200
+            assert resp.headers['ETag'] == 'W/"v42"'
+
+    def test_if_modified_since(self, app):
+        mtime = datetime(2024, 5, 1, 12, 0, 0, 500000)
+        with app.test_request_context('/'):
+            last_modified = conditional_response('contenu', version=1, mtime=mtime).headers['Last-Modified']
+        with app.test_request_context('/', headers={'If-Modified-Since': last_modified}):
+            assert conditional_response('contenu', version=1, mtime=mtime).status_code == 304
+        with app.test_request_context('/', headers={'If-Modified-Since': last_modified}):
+            plus_recent = datetime(2024, 5, 1, 12, 0, 1)
+            assert conditional_response('contenu', version=2, mtime=plus_recent).status_code == 200
+
+
+class TestApiEtag:
+    def _get(self, client, app, url, etag=None):
+        headers = {'X-API-Key': app.config['API_KEY']}
+        if etag:
+            headers['If-None-Match'] = etag
+        return client.get(url, headers=headers)
+
+    def test_ingredients_304_puis_200_apres_modification(self, client, app, ingredient):
+        etag = self._get(client, app, '/api/v1/ingredients').headers['ETag']
+        assert self._get(client, app, '/api/v1/ingredients', etag).status_code == 304
+
+        ingredient.prix_unitaire = 0.8
+        db.session.commit()
+
+        resp = self._get(client, app, '/api/v1/ingredients', etag)
+        assert resp.status_code == 200
+        assert resp.get_json()['items'][0]['prix_unitaire'] == 0.8
+
+    def test_frigo_etag_change_avec_le_stock(self, client, app, ingredient_avec_stock):
+        etag = self._get(client, app, '/api/v1/frigo').headers['ETag']
+        assert self._get(client, app, '/api/v1/frigo', etag).status_code == 304
+
+        ingredient_avec_stock.stock.quantite = 10
+        db.session.commit()
+
+        assert self._get(client, app, '/api/v1/frigo', etag).status_code == 200
+
+    def test_frigo_etag_de_contenu_avec_versions_du_processus(self, client, app, ingredient_avec_stock):
+        resp = self._get(client, app, '/api/v1/frigo')
+        assert resp.headers['ETag'] == generate_etag(resp.get_data())
+
+    def test_frigo_etag_de_version_avec_versions_partagees(self, client, app, ingredient_avec_stock, monkeypatch):
+        monkeypatch.setattr(routes.api, 'versions_partagees', lambda: True)
+        etag = self._get(client, app, '/api/v1/frigo').headers['ETag']
+        assert self._get(client, app, '/api/v1/frigo', etag).status_code == 304
+
+        ingredient_avec_stock.stock.quantite = 10
+        db.session.commit()
+
+        assert self._get(client, app, '/api/v1/frigo', etag).status_code == 200
+
+    def test_ingredients_etag_de_contenu_avec_versions_du_processus(self, client, app, ingredient):
+        resp = self._get(client, app, '/api/v1/ingredients')
+        assert resp.headers['ETag'] == generate_etag(resp.get_data())
+
+    def test_ingredients_etag_de_version_avec_versions_partagees(self, client, app, ingredient, monkeypatch):
+        monkeypatch.setattr(routes.api, 'versions_partagees', lambda: True)
+        etag = self._get(client, app, '/api/v1/ingredients').headers['ETag']
+        assert self._get(client, app, '/api/v1/ingredients', etag).status_code == 304
+
+        ingredient.prix_unitaire = 0.8
+        db.session.commit()
+
+        assert self._get(client, app, '/api/v1/ingredients', etag).status_code == 200
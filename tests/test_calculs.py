@@ -0,0 +1,120 @@
+"""Tests unitaires des calculs (budget, valeur du stock, formatage)."""
+import pytest
+from models.models import db, Ingredient, ListeCourses, StockFrigo
+from utils.calculs import calculer_budget_courses, calculer_budget_courses_sql, calculer_cout_recette, formater_quantite, formater_prix_unitaire
+from utils.cache import get_stock_value_cached
+
+
+@pytest.fixture
+def courses(app, ingredient):
+    oeuf = Ingredient(nom='Oeuf', unite='pièce', poids_piece=60, prix_unitaire=0.005)
+    sel = Ingredient(nom='Sel', unite='g')
+    db.session.add_all([oeuf, sel])
+    db.session.flush()
+    items = [
+        ListeCourses(ingredient_id=ingredient.id, quantite=200),
+        ListeCourses(ingredient_id=oeuf.id, quantite=6),
+        ListeCourses(ingredient_id=sel.id, quantite=10),
+    ]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+class TestBudgetCourses:
+    def test_liste_vide(self, app):
+        budget = calculer_budget_courses([])
+        assert budget.total_estime == 0
+        assert budget.items_avec_prix == 0 and budget.items_sans_prix == 0
+
+    def test_totaux(self, courses):
+        # 200 g × 0.5 €/g + 6 pièces × 60 g × 0.005 €/g
+        budget = calculer_budget_courses(courses)
+        assert budget.total_estime == pytest.approx(101.8)
+        assert budget.items_avec_prix == 2
+        assert budget.items_sans_prix == 1
+        assert budget.details == []
+
+    def test_details(self, courses):
+        details = calculer_budget_courses(courses, include_details=True).details
+        assert [d.prix_total for d in details] == pytest.approx([100.0, 1.8, 0])
+        assert details[2].prix_unitaire == 0
+        assert details[0].to_dict()['ingredient_nom'] == 'Tomate'
+
+    def test_agregation_sql_identique(self, courses):
+        db.session.add(ListeCourses(ingredient_id=courses[0].ingredient_id, quantite=50, achete=True))
+        db.session.commit()
+
+        budget = calculer_budget_courses_sql()
+        assert budget == calculer_budget_courses(courses)
+
+    def test_agregation_sql_identique_sur_un_demi_centime(self, app):
+        # 2.675 : round() donne 2.67 (valeur binaire), SQL 2.68
+        ing = Ingredient(nom='Safran', unite='g', prix_unitaire=2.675)
+        db.session.add(ing)
+        db.session.flush()
+        items = [ListeCourses(ingredient_id=ing.id, quantite=1)]
+        db.session.add_all(items)
+        db.session.commit()
+
+        assert calculer_budget_courses(items).total_estime == 2.68
+        assert calculer_budget_courses_sql() == calculer_budget_courses(items)
+
+    def test_agregation_sql_liste_vide(self, app):
+        budget = calculer_budget_courses_sql()
+        assert (budget.total_estime, budget.items_avec_prix, budget.items_sans_prix) == (0, 0, 0)
+
+
+class TestCoutRecette:
+    def test_identique_au_cout_du_modele(self, recette):
+        assert calculer_cout_recette(recette) == pytest.approx(recette.calculer_cout())
+
+    def test_recette_absente(self):
+        assert calculer_cout_recette(None) == 0
+
+
+class TestValeurStock:
+    def test_valeur_sql_identique_au_calcul_python(self, app, ingredient_avec_stock):
+        oeuf = Ingredient(nom='Oeuf', unite='pièce', poids_piece=60, prix_unitaire=0.005)
+        sel = Ingredient(nom='Sel', unite='g')
+        db.session.add_all([oeuf, sel])
+        db.session.flush()
+        db.session.add_all([StockFrigo(ingredient_id=oeuf.id, quantite=4),
+                            StockFrigo(ingredient_id=sel.id, quantite=500)])
+        db.session.commit()
+
+        attendu = sum(s.ingredient.calculer_prix(s.quantite) for s in StockFrigo.query)
+        assert get_stock_value_cached() == pytest.approx(attendu)
+
+
+class TestFormaterQuantite:
+    @pytest.mark.parametrize('unite, quantite, attendu', [
+        ('pièce', 1, '1 pièce'),
+        ('pièce', 3, '3 pièces'),
+        ('pièce', 1.5, '1.5 pièces'),
+        ('g', 250, '250g'),
+        ('g', 12.5, '12.5g'),
+        ('g', 1500, '1.50kg'),
+        ('ml', 2000, '2.00L'),
+        ('cs', 2, '2 cs'),
+    ])
+    def test_formats(self, unite, quantite, attendu):
+        assert formater_quantite(quantite, Ingredient(unite=unite)) == attendu
+
+    def test_quantite_nulle(self):
+        assert formater_quantite(0, None) == '0'
+
+
+class TestFormaterPrixUnitaire:
+    @pytest.mark.parametrize('unite, prix, poids_piece, attendu', [
+        ('g', 0.0155, None, '15.50€/kg'),
+        ('g', 0.0155, 100, '15.50€/kg'),
+        ('ml', 0.0023, None, '2.30€/L'),
+        ('pièce', 0.005, 270, '1.35€/pièce'),
+        ('pièce', 1.2, None, '1.20€/pièce'),
+        ('cs', 0.25, None, '0.2500€/cs'),
+        ('g', 0, None, 'Prix non renseigné'),
+    ])
+    def test_formats(self, unite, prix, poids_piece, attendu):
+        ingredient = Ingredient(unite=unite, prix_unitaire=prix, poids_piece=poids_piece)
+        assert formater_prix_unitaire(ingredient) == attendu
@@ -0,0 +1,169 @@
+"""Tests des fonctions de courses liées à la planification."""
+import pytest
+from models.models import db, Ingredient, Recette, IngredientRecette, StockFrigo, ListeCourses, RecettePlanifiee
+from utils.courses import (
+    ajouter_ingredients_manquants_courses, deduire_ingredients_frigo, retirer_ingredients_courses
+)
+
+
+@pytest.fixture
+def recette_composee(app, recette, ingredient):
+    """Recette utilisant 'Salade tomate' comme sous-recette, avec 100 g de tomate en plus."""
+    r = Recette(nom='Assiette')
+    r.sous_recettes.append(recette)
+    db.session.add(r)
+    db.session.flush()
+    db.session.add(IngredientRecette(recette_id=r.id, ingredient_id=ingredient.id, quantite=100))
+    db.session.commit()
+    return r
+
+
+@pytest.fixture
+def grande_recette(app):
+    """Recette de 10 ingrédients, la moitié en stock, avec une sous-recette de 2 ingrédients."""
+    ingredients = [Ingredient(nom=f'Ingrédient {i}', unite='g', prix_unitaire=0.01) for i in range(12)]
+    sous_recette = Recette(nom='Sauce')
+    r = Recette(nom='Grande recette')
+    r.sous_recettes.append(sous_recette)
+    db.session.add_all(ingredients + [r, sous_recette])
+    db.session.flush()
+    for i, ing in enumerate(ingredients):
+        db.session.add(IngredientRecette(recette_id=(r if i < 10 else sous_recette).id,
+                                         ingredient_id=ing.id, quantite=100))
+        if i % 2:
+            db.session.add(StockFrigo(ingredient_id=ing.id, quantite=40))
+    db.session.commit()
+    recette_id = r.id
+    db.session.expunge_all()
+    return recette_id
+
+
+class TestNombreDeRequetes:
+    """Le nombre de requêtes ne dépend pas du nombre d'ingrédients."""
+
+    def test_ajouter_ingredients_manquants(self, app, grande_recette, compter_requetes):
+        with compter_requetes() as requetes:
+            resultat = ajouter_ingredients_manquants_courses(grande_recette)
+            db.session.flush()
+
+        assert resultat['ajoutes'] == 12
+        # Chargement de la recette et de sa sous-recette (5), stock, courses, INSERT
+        assert len(requetes) <= 8
+        assert sum(r.startswith('INSERT') for r in requetes) == 1
+
+    def test_deduire_ingredients_frigo(self, app, grande_recette, compter_requetes):
+        with compter_requetes() as requetes:
+            assert deduire_ingredients_frigo(grande_recette) == 6
+
+        # Chargement de la recette (5), stock, DELETE des stocks épuisés
+        assert len(requetes) <= 7
+
+
+class TestAjouterIngredientsManquants:
+    def test_ingredient_present_deux_fois(self, app, recette_composee, ingredient):
+        resultat = ajouter_ingredients_manquants_courses(recette_composee.id)
+        db.session.commit()
+
+        assert (resultat['ajoutes'], resultat['maj']) == (1, 1)
+        assert resultat['cout_total'] == pytest.approx(150.0)
+        course = ListeCourses.query.one()
+        assert (course.quantite, course.achete) == (300, False)
+
+
+class TestDeduireIngredientsFrigo:
+    def test_deduit_le_stock(self, app, recette, ingredient_avec_stock):
+        assert deduire_ingredients_frigo(recette.id) == 1
+        assert StockFrigo.query.one().quantite == 100
+
+    def test_ingredient_present_deux_fois(self, app, recette_composee, ingredient_avec_stock):
+        # 100 g + 200 g (sous-recette) sur un stock de 300 g
+        assert deduire_ingredients_frigo(recette_composee.id) == 2
+        db.session.commit()
+        assert StockFrigo.query.count() == 0
+
+    def test_recette_inexistante(self, app):
+        assert deduire_ingredients_frigo(9999) == 0
+
+
+class TestRetirerIngredientsCourses:
+    def test_reduit_puis_supprime(self, app, recette_composee, ingredient):
+        db.session.add(ListeCourses(ingredient_id=ingredient.id, quantite=250))
+        db.session.commit()
+
+        # 100 g retirés (réduction) puis 200 g sur les 150 g restants (suppression)
+        assert retirer_ingredients_courses(recette_composee.id) == {'supprimes': 1, 'reduits': 1}
+        db.session.commit()
+        assert ListeCourses.query.count() == 0
+
+    def test_ignore_les_items_achetes(self, app, recette, ingredient):
+        db.session.add(ListeCourses(ingredient_id=ingredient.id, quantite=500, achete=True))
+        db.session.commit()
+
+        assert retirer_ingredients_courses(recette.id) == {'supprimes': 0, 'reduits': 0}
+
+
+class TestRoutesVider:
+    def test_vider_historique_garde_la_liste_en_cours(self, client, app, ingredient):
+        db.session.add_all([ListeCourses(ingredient_id=ingredient.id, quantite=1, achete=True),
+                            ListeCourses(ingredient_id=ingredient.id, quantite=2, achete=True),
+                            ListeCourses(ingredient_id=ingredient.id, quantite=3)])
+        db.session.commit()
+
+        resp = client.get('/courses/vider-historique', follow_redirects=True)
+        assert '2 article(s) supprimé(s)' in resp.get_data(as_text=True)
+        assert [c.quantite for c in ListeCourses.query] == [3]
+
+    def test_vider_liste_deja_vide(self, client, app):
+        resp = client.get('/courses/vider', follow_redirects=True)
+        assert 'déjà vide' in resp.get_data(as_text=True)
+
+
+class TestRoutesPlanification:
+    def test_preparer_deduit_le_stock(self, client, app, recette, ingredient_avec_stock):
+        plan = RecettePlanifiee(recette_id=recette.id)
+        db.session.add(plan)
+        db.session.commit()
+
+        client.get(f'/planification/preparer/{plan.id}')
+        assert db.session.get(RecettePlanifiee, plan.id).preparee is True
+        assert StockFrigo.query.one().quantite == 100
+
+    def test_annuler_retire_les_courses(self, client, app, recette):
+        client.post(f'/recettes/planifier-rapide/{recette.id}')
+        plan = RecettePlanifiee.query.one()
+
+        client.get(f'/planification/annuler/{plan.id}')
+        assert RecettePlanifiee.query.count() == 0
+        assert ListeCourses.query.count() == 0
+
+
+class TestNettoyerOrphelins:
+    def test_supprime_les_items_sans_ingredient(self, client, app, ingredient):
+        db.session.add_all([ListeCourses(ingredient_id=ingredient.id, quantite=1),
+                            ListeCourses(ingredient_id=9999, quantite=1)])
+        db.session.commit()
+
+        resp = client.get('/courses/nettoyer', follow_redirects=True)
+        assert '1 article(s) orphelin(s)' in resp.get_data(as_text=True)
+        assert [c.ingredient_id for c in ListeCourses.query] == [ingredient.id]
+
+    def test_liste_sans_orphelin_sans_ecriture(self, client, app, ingredient, compter_requetes):
+        db.session.add(ListeCourses(ingredient_id=ingredient.id, quantite=1))
+        db.session.commit()
+
+        with compter_requetes() as requetes:
+            assert client.get('/courses/').status_code == 200
+        assert not any(r.startswith('DELETE') for r in requetes)
+
+
+class TestApiCourses:
+    def test_budget_et_details(self, client, app, ingredient):
+        db.session.add_all([ListeCourses(ingredient_id=ingredient.id, quantite=10),
+                            ListeCourses(ingredient_id=ingredient.id, quantite=5, achete=True)])
+        db.session.commit()
+
+        data = client.get('/api/v1/courses', headers={'X-API-Key': app.config['API_KEY']}).get_json()
+        assert data['count'] == 1
+        assert data['total_estime'] == 5.0
+        assert data['items'][0]['ingredient_nom'] == 'Tomate'
+        assert data['items'][0]['categorie'] == 'Légumes'
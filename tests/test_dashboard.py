@@ -0,0 +1,218 @@
+"""Tests du service de données du dashboard."""
+import threading
+from datetime import datetime, timedelta
+import pytest
+from flask import current_app
+from sqlalchemy import inspect
+import utils.dashboard
+from models.models import db, Ingredient, IngredientRecette, ListeCourses, Recette, RecettePlanifiee, StockFrigo
+from utils.queries import supprimer_courses
+from utils.saisons import get_saison_actuelle
+from utils.dashboard import (_calculer_en_parallele, calculer_stats_activite, calculer_stats_frigo,
+                             calculer_stats_recettes, detecter_alertes_stock, get_dashboard_data,
+                             get_recettes_planifiees_a_venir, get_suggestions_recettes)
+
+
+def _planifier(recette, date_preparation=None):
+    plan = RecettePlanifiee(recette_id=recette.id, preparee=date_preparation is not None,
+                            date_preparation=date_preparation)
+    db.session.add(plan)
+    return plan
+
+
+class TestStatsFrigo:
+    def test_valeur_et_categories(self, app, ingredient_avec_stock):
+        oeuf = Ingredient(nom='Oeuf', unite='pièce', poids_piece=60, prix_unitaire=0.005)
+        sel = Ingredient(nom='Sel', unite='g', categorie='')
+        db.session.add_all([oeuf, sel])
+        db.session.flush()
+        db.session.add_all([StockFrigo(ingredient_id=oeuf.id, quantite=4),
+                            StockFrigo(ingredient_id=sel.id, quantite=500)])
+        db.session.commit()
+
+        stats = calculer_stats_frigo()
+        attendu = sum(s.ingredient.calculer_prix(s.quantite) for s in StockFrigo.query)
+        assert stats.nb_items == 3
+        assert stats.valeur_totale == pytest.approx(attendu)
+        assert stats.categories == {'Légumes': 1, 'Autres': 2}
+
+    def test_frigo_vide(self, app):
+        stats = calculer_stats_frigo()
+        assert (stats.nb_items, stats.valeur_totale, stats.categories) == (0, 0, {})
+
+
+class TestStatsRecettes:
+    def test_realisables(self, app, recette, ingredient_avec_stock):
+        composee = Recette(nom='Assiette')
+        composee.sous_recettes.append(recette)
+        db.session.add_all([composee, Recette(nom='Vide')])
+        _planifier(recette)
+        db.session.commit()
+
+        stats = calculer_stats_recettes()
+        assert (stats.nb_total, stats.nb_realisables, stats.nb_planifiees) == (3, 2, 1)
+
+        ingredient_avec_stock.stock.quantite = 50
+        db.session.commit()
+        assert calculer_stats_recettes().nb_realisables == 0
+
+
+class TestAlertesStock:
+    def test_tri_et_limite(self, app):
+        quantites = {'g': [50, 10, 99, 100, 0, 30], 'ml': [200], 'pièce': [1, 3]}
+        for unite, valeurs in quantites.items():
+            for i, quantite in enumerate(valeurs):
+                ing = Ingredient(nom=f'{unite} {i}', unite=unite)
+                db.session.add(ing)
+                db.session.flush()
+                db.session.add(StockFrigo(ingredient_id=ing.id, quantite=quantite))
+        db.session.commit()
+
+        alertes = detecter_alertes_stock()
+        assert [(a.quantite_actuelle, a.unite) for a in alertes] == \
+            [(10, 'g'), (30, 'g'), (50, 'g'), (1, 'pièce'), (200, 'ml')]
+        assert [a.pourcentage_restant for a in alertes] == [10.0, 30.0, 50.0, 50.0, 80.0]
+        assert alertes[0].seuil_alerte == 100
+
+    def test_seuils_personnalises(self, app, ingredient_avec_stock):
+        alertes = detecter_alertes_stock({'g': 400})
+        assert [(a.seuil_alerte, a.pourcentage_restant) for a in alertes] == [(400, 75.0)]
+
+
+class TestSuggestions:
+    def test_recette_recente_penalisee(self, app, recette, ingredient_avec_stock):
+        assert get_suggestions_recettes()[0].score_disponibilite == 100
+        _planifier(recette, datetime.utcnow())
+        _planifier(recette, datetime.utcnow())
+        db.session.commit()
+
+        assert get_suggestions_recettes()[0].score_disponibilite == 50
+
+
+    def test_classement(self, app, recette, ingredient_avec_stock):
+        sans_stock = Ingredient(nom='Basilic', unite='g')
+        composee = Recette(nom='Assiette')
+        partielle = Recette(nom='Salade basilic')
+        db.session.add_all([sans_stock, composee, partielle])
+        db.session.flush()
+        sans_stock.set_saisons(['ete' if get_saison_actuelle() != 'ete' else 'hiver'])
+        db.session.add_all([
+            IngredientRecette(recette_id=composee.id, ingredient_id=ingredient_avec_stock.id, quantite=50),
+            IngredientRecette(recette_id=partielle.id, ingredient_id=ingredient_avec_stock.id, quantite=50),
+            IngredientRecette(recette_id=partielle.id, ingredient_id=sans_stock.id, quantite=5),
+        ])
+        composee.sous_recettes.append(recette)
+        db.session.add(Recette(nom='Vide'))
+        db.session.commit()
+
+        suggestions = get_suggestions_recettes(limite=5)
+        assert [s.recette.nom for s in suggestions] == ['Salade tomate', 'Assiette', 'Salade basilic']
+        derniere = suggestions[-1]
+        assert (derniere.score_disponibilite, derniere.nb_ingredients_manquants) == (50, 1)
+        assert derniere.est_de_saison is False
+        assert suggestions[0].cout_estime == pytest.approx(100.0)
+
+
+class TestRecettesPlanifieesAVenir:
+    def test_colonnes_affichees_seulement(self, app, recette):
+        for _ in range(6):
+            _planifier(recette)
+        _planifier(recette, datetime.utcnow())
+        db.session.commit()
+        db.session.expunge_all()
+
+        plans = get_recettes_planifiees_a_venir()
+        assert len(plans) == 5
+        assert plans[0].recette_ref.nom == 'Salade tomate'
+        assert {'preparee', 'date_preparation'} <= inspect(plans[0]).unloaded
+        assert 'instructions' in inspect(plans[0].recette_ref).unloaded
+
+
+class TestStatsActivite:
+    def test_semaine_et_mois(self, app, recette):
+        _planifier(recette, datetime.utcnow())
+        _planifier(recette, datetime.utcnow() - timedelta(days=40))
+        _planifier(recette)
+        db.session.commit()
+
+        stats = calculer_stats_activite()
+        assert (stats.recettes_semaine, stats.recettes_mois) == (1, 1)
+        assert stats.cout_semaine == pytest.approx(100.0)
+        assert stats.cout_mois == pytest.approx(100.0)
+        assert stats.derniere_recette.recette_id == recette.id
+
+    def test_sans_activite(self, app):
+        stats = calculer_stats_activite()
+        assert (stats.recettes_semaine, stats.recettes_mois, stats.cout_mois) == (0, 0, 0)
+        assert stats.derniere_recette is None
+
+
+class TestDashboard:
+    def test_page_accueil(self, client, recette, ingredient_avec_stock):
+        assert client.get('/').status_code == 200
+
+    def test_donnees_completes(self, app, recette, ingredient_avec_stock):
+        data = get_dashboard_data()
+        assert data.stats_frigo.nb_items == 1
+        assert data.suggestions_recettes[0].recette.id == recette.id
+
+
+class TestCacheDashboard:
+    def test_statistiques_reutilisees(self, app, recette, ingredient_avec_stock, monkeypatch):
+        appels = []
+        calcul = utils.dashboard.calculer_stats_frigo
+        monkeypatch.setattr(utils.dashboard, 'calculer_stats_frigo',
+                            lambda: appels.append(1) or calcul())
+
+        premier = get_dashboard_data()
+        assert get_dashboard_data().stats_frigo is premier.stats_frigo
+        assert len(appels) == 1
+
+    def test_invalidees_par_une_modification(self, app, ingredient):
+        assert get_dashboard_data().stats_courses.nb_items == 0
+
+        db.session.add(ListeCourses(ingredient_id=ingredient.id, quantite=10))
+        db.session.commit()
+        assert get_dashboard_data().stats_courses.nb_items == 1
+
+        db.session.add(StockFrigo(ingredient_id=ingredient.id, quantite=10))
+        db.session.commit()
+        assert get_dashboard_data().stats_frigo.nb_items == 1
+
+    def test_invalidees_par_une_suppression_groupee(self, app, ingredient):
+        db.session.add(ListeCourses(ingredient_id=ingredient.id, quantite=10))
+        db.session.commit()
+        assert get_dashboard_data().stats_courses.nb_items == 1
+
+        supprimer_courses(achete=False)
+        db.session.commit()
+        assert get_dashboard_data().stats_courses.nb_items == 0
+
+
+    def test_disponibilites_calculees_une_fois(self, app, recette, ingredient_avec_stock, monkeypatch):
+        appels = []
+        calcul = Recette.disponibilite_multi
+        monkeypatch.setattr(Recette, 'disponibilite_multi',
+                            lambda: appels.append(1) or calcul())
+
+        data = get_dashboard_data()
+        assert data.stats_recettes.nb_realisables == 1
+        assert data.suggestions_recettes[0].score_disponibilite == 100
+        assert len(appels) == 1
+
+
+class TestCalculEnParallele:
+    def test_sequentiel_sous_sqlite(self, app):
+        assert _calculer_en_parallele(threading.current_thread, threading.current_thread) == \
+            [threading.current_thread()] * 2
+
+    def test_threads_avec_contexte_applicatif(self, app, monkeypatch):
+        monkeypatch.setattr(utils.dashboard, '_parallelisable', lambda: True)
+
+        def nom_app():
+            return current_app.name, threading.current_thread().name
+
+        resultats = _calculer_en_parallele(nom_app, lambda: 2)
+        assert resultats[1] == 2
+        assert resultats[0][0] == app.name
+        assert resultats[0][1].startswith('dashboard')
@@ -0,0 +1,36 @@
+"""Tests des helpers de transaction."""
+import pytest
+from sqlalchemy.exc import OperationalError
+from models.models import db, Ingredient
+from utils.database import with_db_retry
+
+
+class TestWithDbRetry:
+    @pytest.fixture(autouse=True)
+    def sans_attente(self, monkeypatch):
+        monkeypatch.setattr('time.sleep', lambda s: None)
+
+    def test_rejoue_la_fonction_apres_un_verrou(self, app):
+        appels = []
+
+        @with_db_retry(max_retries=3)
+        def ajouter():
+            appels.append(1)
+            if len(appels) < 3:
+                raise OperationalError('INSERT', {}, Exception('database is locked'))
+            db.session.add(Ingredient(nom='Sel', unite='g'))
+            return 'ok'
+
+        with app.test_request_context('/'):
+            assert ajouter() == 'ok'
+        assert len(appels) == 3
+        assert Ingredient.query.filter_by(nom='Sel').count() == 1
+
+    def test_releve_apres_la_derniere_tentative(self, app):
+        @with_db_retry(max_retries=2)
+        def toujours_verrouillee():
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+        with app.test_request_context('/'):
+            with pytest.raises(OperationalError):
+                toujours_verrouillee()
@@ -3,7 +3,7 @@ import pytest
 from utils.forms import (
     parse_float, parse_int, parse_int_or_none, parse_float_or_none,
     parse_positive_float, parse_positive_int, clean_string, clean_string_or_none,
-    parse_recette_form, parse_ingredients_list, parse_etapes_list,
+    parse_recette_form, parse_ingredients_list, parse_etapes_list, parse_indexed_form,
     validate_categorie, validate_type_recette,
     validate_unique_ingredient, validate_unique_recette,
     validate_quantite_positive,
@@ -164,6 +164,29 @@ class TestParseIngredientsList:
     def test_liste_vide(self):
         assert parse_ingredients_list({}) == []
 
+    def test_trou_dans_les_index(self):
+        data = {
+            'ingredient_0': '1', 'quantite_0': '100',
+            'ingredient_2': '2', 'quantite_2': '50',
+        }
+        assert parse_ingredients_list(data) == [(1, 100.0), (2, 50.0)]
+
+
+class TestParseIndexedForm:
+    def test_regroupe_par_indice(self):
+        data = {'ingredient_3': '2', 'quantite_3': '50', 'ingredient_0': '1',
+                'quantite_0': '100', 'nom': 'Soupe', 'autre_1': 'x'}
+        result = parse_indexed_form(data, ('ingredient', 'quantite'))
+        assert result == [
+            {'ingredient': '1', 'quantite': '100'},
+            {'ingredient': '2', 'quantite': '50'},
+        ]
+
+    def test_champ_avec_underscore(self):
+        data = {'etape_desc_1': 'Cuire', 'etape_duree_1': '10'}
+        result = parse_indexed_form(data, ('etape_desc', 'etape_duree'))
+        assert result == [{'etape_desc': 'Cuire', 'etape_duree': '10'}]
+
 
 class TestParseEtapesList:
     def test_parsing_une_etape(self):
@@ -193,6 +216,11 @@ class TestParseEtapesList:
     def test_liste_vide(self):
         assert list(parse_etapes_list({})) == []
 
+    def test_ordre_par_index(self):
+        data = {'etape_desc_10': 'Servir', 'etape_desc_2': 'Cuire', 'etape_desc_0': 'Préparer'}
+        result = [desc for desc, _ in parse_etapes_list(data)]
+        assert result == ['Préparer', 'Cuire', 'Servir']
+
 
 @pytest.fixture
 def request_ctx(app):
@@ -0,0 +1,81 @@
+"""Tests des miniatures d'images."""
+import io
+import os
+import pytest
+from werkzeug.datastructures import FileStorage
+from migration_image_thumb import generer_miniatures_manquantes
+from models.models import db, Recette
+from utils.files import get_thumbnail_if_exists
+from utils.images import creer_miniature, get_thumbnail_path, save_optimized_image
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def image_png(largeur=800, hauteur=400):
+    """Fichier uploadé contenant une image PNG unie."""
+    contenu = io.BytesIO()
+    Image.new('RGB', (largeur, hauteur), 'red').save(contenu, 'PNG')
+    contenu.seek(0)
+    return FileStorage(stream=contenu, filename='tarte.png', content_type='image/png')
+
+
+class TestGetThumbnailPath:
+    def test_remplace_l_extension(self):
+        assert get_thumbnail_path('static/uploads/rec_x.jpg') == 'static/uploads/rec_x_thumb.webp'
+
+    def test_nom_avec_points(self):
+        assert get_thumbnail_path('static/uploads/rec.v2.png') == 'static/uploads/rec.v2_thumb.webp'
+
+    def test_sans_chemin(self):
+        assert get_thumbnail_path(None) is None
+        assert get_thumbnail_path('') is None
+
+
+class TestCreerMiniature:
+    def test_webp_redimensionnee(self, tmp_path):
+        original = tmp_path / 'rec_x.png'
+        img = Image.new('RGBA', (600, 300))
+
+        thumb_path = creer_miniature(img, str(original), 150)
+
+        assert thumb_path == str(tmp_path / 'rec_x_thumb.webp')
+        with Image.open(thumb_path) as thumb:
+            assert thumb.format == 'WEBP'
+            assert thumb.size == (150, 75)
+        assert img.size == (600, 300)
+
+
+class TestSaveOptimizedImage:
+    @pytest.fixture
+    def dossier(self, app, tmp_path):
+        app.config['UPLOAD_FOLDER'] = str(tmp_path)
+        app.config['IMAGE_THUMB_SIZE'] = 100
+        return tmp_path
+
+    def test_image_et_miniature(self, app, dossier):
+        with app.test_request_context('/'):
+            chemin = save_optimized_image(image_png(), prefix='rec_', create_thumb=True)
+            assert get_thumbnail_if_exists(chemin) == get_thumbnail_path(chemin)
+
+        with Image.open(get_thumbnail_path(chemin)) as thumb:
+            assert max(thumb.size) == 100
+
+    def test_sans_miniature_repli_sur_l_original(self, app, dossier):
+        with app.test_request_context('/'):
+            chemin = save_optimized_image(image_png(), prefix='rec_')
+            assert os.path.exists(chemin)
+            assert get_thumbnail_if_exists(chemin) is None
+
+
+class TestGenererMiniaturesManquantes:
+    def test_image_existante_sans_miniature(self, app, tmp_path):
+        chemin = tmp_path / 'rec_ancienne.jpg'
+        Image.new('RGB', (900, 600), 'green').save(chemin, 'JPEG')
+        recette = Recette(nom='Ancienne', image=str(chemin))
+        db.session.add(recette)
+        db.session.commit()
+
+        assert generer_miniatures_manquantes(app)
+
+        assert recette.image_thumb == str(tmp_path / 'rec_ancienne_thumb.webp')
+        assert os.path.exists(recette.image_thumb)
@@ -1,9 +1,18 @@
 """Tests unitaires des modèles SQLAlchemy."""
 import pytest
+import models.models
+import utils.queries
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import joinedload
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm.attributes import set_committed_value
 from models.models import (
-    db, Ingredient, IngredientSaison, StockFrigo,
+    db, SQLITE_BUSY_TIMEOUT_MS, arrondi, Ingredient, IngredientSaison, StockFrigo,
     Recette, EtapeRecette, IngredientRecette, RecettePlanifiee
 )
+from utils.queries import _recherche_fts_disponible
+from utils.saisons import get_saison_actuelle
 
 
 class TestIngredientUnites:
@@ -110,6 +119,124 @@ class TestRecetteCalculs:
         db.session.commit()
         assert r.calculer_cout() == 0.0
 
+    def test_agreger_cout_nutrition_identique_au_calcul_python(self, app, recette):
+        oeuf = Ingredient(nom='Oeuf', unite='pièce', poids_piece=60, prix_unitaire=0.005,
+                          calories=140, proteines=12.5, sel=0.35)
+        base = Recette(nom='Base')
+        db.session.add_all([oeuf, base])
+        db.session.flush()
+        db.session.add(IngredientRecette(recette_id=base.id, ingredient_id=oeuf.id, quantite=3))
+        # Sous-recette référencée deux fois dans l'arbre : comptée une seule fois
+        intermediaire = Recette(nom='Intermédiaire', sous_recettes=[base])
+        db.session.add(intermediaire)
+        recette.sous_recettes.extend([base, intermediaire])
+        db.session.commit()
+
+        cout, nutrition = Recette.agreger_cout_nutrition(recette.id)
+        assert cout == pytest.approx(recette.calculer_cout())
+        assert nutrition == pytest.approx(recette.calculer_nutrition())
+
+    def test_agreger_cout_nutrition_recette_vide(self, app):
+        r = Recette(nom='Vide')
+        db.session.add(r)
+        db.session.commit()
+        cout, nutrition = Recette.agreger_cout_nutrition(r.id)
+        assert cout == 0.0
+        assert nutrition['calories'] == 0.0
+
+
+class TestRecetteCoutNutritionPrecalcules:
+    def test_colonnes_remplies_apres_ajout_ingredient(self, app, recette):
+        db.session.expire_all()
+        r = db.session.get(Recette, recette.id)
+        assert r.cout_cache == pytest.approx(100.0)
+        assert r.calories_cache is not None
+
+    def test_changement_de_prix_propage_aux_recettes_parentes(self, app, recette, ingredient):
+        parent = Recette(nom='Menu', sous_recettes=[recette])
+        db.session.add(parent)
+        db.session.commit()
+        assert parent.calculer_cout() == pytest.approx(100.0)
+
+        ingredient.prix_unitaire = 1.0
+        db.session.commit()
+
+        assert recette.cout_cache == pytest.approx(200.0)
+        assert db.session.get(Recette, parent.id).cout_cache == pytest.approx(200.0)
+
+    def test_calcul_python_identique_aux_colonnes(self, app, recette):
+        cout, nutrition = recette.cout_cache, recette.calculer_nutrition()
+        recette.cout_cache = None
+        recette.calories_cache = None
+        assert recette.calculer_cout() == pytest.approx(cout)
+        assert recette.calculer_nutrition() == pytest.approx(nutrition)
+
+    def test_calcul_python_ne_modifie_pas_la_recette(self, app, recette):
+        set_committed_value(recette, 'cout_cache', None)
+        set_committed_value(recette, 'calories_cache', None)
+        recette.calculer_cout()
+        recette.calculer_nutrition()
+        assert recette.cout_cache is None
+        assert recette not in db.session.dirty
+
+    def test_nutrition_recettes_utilisant_un_ingredient(self, app, recette, ingredient):
+        boeuf = Ingredient(nom='Boeuf', unite='g', calories=250, proteines=26)
+        autre = Recette(nom='Steak tomate')
+        db.session.add_all([boeuf, autre])
+        db.session.flush()
+        db.session.add_all([
+            IngredientRecette(recette_id=recette.id, ingredient_id=boeuf.id, quantite=150),
+            IngredientRecette(recette_id=autre.id, ingredient_id=boeuf.id, quantite=200),
+            IngredientRecette(recette_id=autre.id, ingredient_id=ingredient.id, quantite=50),
+        ])
+        db.session.commit()
+        db.session.expire_all()
+
+        # Recettes, lignes et ingrédients chargés en une seule requête
+        liens = db.session.execute(
+            select(IngredientRecette)
+            .where(IngredientRecette.ingredient_id == boeuf.id)
+            .options(joinedload(IngredientRecette.recette)
+                     .joinedload(Recette.ingredients)
+                     .joinedload(IngredientRecette.ingredient))
+        ).unique().scalars().all()
+
+        assert len(liens) == 2
+        for lien in liens:
+            lignes = lien.recette.ingredients
+            quantites = [ir.quantite for ir in lignes]
+            calories = [ir.ingredient.calories or 0 for ir in lignes]
+            attendu = sum(q * c for q, c in zip(quantites, calories)) / 100
+            assert lien.recette.calculer_nutrition()['calories'] == pytest.approx(attendu, abs=0.1)
+
+
+class TestCompatibilitePostgresql:
+    """round(x, n) n'existe que pour numeric sous PostgreSQL."""
+
+    def test_agregat_cout_nutrition(self, app, recette, monkeypatch):
+        requetes = []
+        monkeypatch.setattr(db.session, 'execute', lambda stmt, *a, **kw: requetes.append(stmt) or [])
+        Recette.agreger_cout_nutrition_multi([recette.id])
+
+        sql = str(requetes[0].compile(dialect=postgresql.dialect()))
+        assert 'round(CAST(' in sql and 'AS NUMERIC), ' in sql
+
+    def test_expression_prix(self):
+        sql = str(Ingredient.expression_prix(StockFrigo.quantite).compile(dialect=postgresql.dialect()))
+        assert 'round(CAST(' in sql and 'AS NUMERIC), ' in sql
+
+
+class TestArrondi:
+    """arrondi() et arrondi_sql() arrondissent les demis de la même façon."""
+
+    @pytest.mark.parametrize('valeur', [2.675, 1.005, 0.125, 0.285, -2.675])
+    def test_identique_au_sql(self, app, valeur):
+        attendu = db.session.execute(text('SELECT round(:v, 2)'), {'v': valeur}).scalar()
+        assert arrondi(valeur) == attendu
+
+    def test_decimales(self):
+        assert arrondi(12.25, 1) == 12.3
+
 
 class TestRecetteDisponibilite:
     def test_realisable_avec_stock_suffisant(self, app, recette, ingredient):
@@ -132,6 +259,15 @@ class TestRecetteDisponibilite:
         dispo = recette.calculer_disponibilite_ingredients()
         assert dispo['realisable'] is False
 
+    def test_from_map(self, app, recette, ingredient):
+        dispo = recette.calculer_disponibilite_ingredients_from_map({ingredient.id: 150})
+        assert dispo['realisable'] is False
+        assert dispo['ingredients_manquants'][0].quantite_manquante == pytest.approx(50)
+
+        dispo = recette.calculer_disponibilite_ingredients_from_map({ingredient.id: 200})
+        assert dispo['realisable'] is True
+        assert dispo['pourcentage_disponibilite'] == 100.0
+
 
 class TestCascadeDelete:
     def test_suppression_ingredient_supprime_stock(self, app, ingredient_avec_stock):
@@ -168,3 +304,95 @@ class TestCascadeDelete:
         db.session.delete(recette)
         db.session.commit()
         assert RecettePlanifiee.query.filter_by(recette_id=recette_id).count() == 0
+
+
+class TestDisponibiliteMulti:
+    def test_identique_au_calcul_python(self, app, recette, ingredient_avec_stock):
+        oeuf = Ingredient(nom='Oeuf', unite='pièce')
+        base = Recette(nom='Base')
+        plat = Recette(nom='Plat')
+        vide = Recette(nom='Vide')
+        db.session.add_all([oeuf, base, plat, vide])
+        db.session.flush()
+        db.session.add_all([
+            IngredientRecette(recette_id=base.id, ingredient_id=oeuf.id, quantite=2),
+            IngredientRecette(recette_id=plat.id, ingredient_id=ingredient_avec_stock.id, quantite=50),
+        ])
+        plat.sous_recettes.extend([base, recette])
+        db.session.commit()
+
+        disponibilites = Recette.disponibilite_multi()
+        for r in (recette, base, plat):
+            dispo = r.calculer_disponibilite_ingredients()
+            nb_disponibles = len(dispo['ingredients_disponibles'])
+            nb = nb_disponibles + len(dispo['ingredients_manquants'])
+            assert disponibilites[r.id] == (nb, nb_disponibles)
+        assert disponibilites[plat.id] == (3, 2)
+        assert vide.id not in disponibilites
+
+
+class TestScoresSaisonniersMulti:
+    def test_identique_au_calcul_python(self, app, recette, ingredient):
+        poireau = Ingredient(nom='Poireau', unite='g')
+        sel = Ingredient(nom='Sel', unite='g')
+        plat = Recette(nom='Plat')
+        db.session.add_all([poireau, sel, plat])
+        db.session.flush()
+        ingredient.set_saisons(['hiver'])
+        poireau.set_saisons(['automne', 'hiver'])
+        db.session.add_all([
+            IngredientRecette(recette_id=plat.id, ingredient_id=i.id, quantite=10)
+            for i in (ingredient, poireau, sel)
+        ])
+        plat.sous_recettes.append(recette)
+        db.session.commit()
+
+        scores = Recette.scores_saisonniers_multi(get_saison_actuelle())
+        for r in (recette, plat):
+            details = r.calculer_score_saisonnier()['details']
+            assert scores[r.id] == (details['total_ingredients'], details['ingredients_de_saison'])
+
+        assert Recette.scores_saisonniers_multi('automne')[plat.id] == (3, 2)
+        assert Recette.scores_saisonniers_multi('hiver')[plat.id] == (3, 3)
+        assert Recette.scores_saisonniers_multi('ete')[recette.id] == (1, 0)
+
+
+class TestConnexionSqlite:
+    def test_busy_timeout(self, app):
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == SQLITE_BUSY_TIMEOUT_MS
+
+    def test_busy_timeout_applique_a_la_connexion(self, monkeypatch):
+        # Le pilote sqlite3 attend 5 s par défaut : une autre valeur montre
+        # que le PRAGMA est bien exécuté à l'ouverture de la connexion
+        monkeypatch.setattr(models.models, 'SQLITE_BUSY_TIMEOUT_MS', 1234)
+        with create_engine('sqlite://').connect() as connexion:
+            assert connexion.execute(text('PRAGMA busy_timeout')).scalar() == 1234
+
+
+class TestRechercheFtsSqlite:
+    def test_table_creee_si_supportee(self):
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+        assert inspect(engine).has_table('recette_fts')
+
+    def test_creation_sans_fts_sur_sqlite_ancien(self, monkeypatch):
+        monkeypatch.setattr(models.models, 'SQLITE_VERSION_MIN_TRIGRAMME', (99, 0, 0))
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+        assert inspect(engine).has_table('recette')
+        assert not inspect(engine).has_table('recette_fts')
+
+    def test_table_ajoutee_apres_coup_detectee(self, monkeypatch):
+        monkeypatch.setattr(models.models, 'SQLITE_VERSION_MIN_TRIGRAMME', (99, 0, 0))
+        engine = create_engine('sqlite://', poolclass=StaticPool)
+        db.metadata.create_all(engine)
+        maintenant = [1000.0]
+        monkeypatch.setattr(utils.queries.time, 'monotonic', lambda: maintenant[0])
+        assert not _recherche_fts_disponible(engine)
+
+        with engine.begin() as connexion:
+            connexion.execute(text('CREATE VIRTUAL TABLE recette_fts USING fts5(nom)'))
+        assert not _recherche_fts_disponible(engine)
+
+        maintenant[0] += utils.queries.DELAI_VERIFICATION_FTS
+        assert _recherche_fts_disponible(engine)
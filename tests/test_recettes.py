@@ -1,6 +1,7 @@
 """Tests de non-régression des routes CRUD des recettes."""
 import pytest
-from models.models import db, Recette, EtapeRecette, IngredientRecette, RecettePlanifiee
+import routes.recettes
+from models.models import db, Recette, EtapeRecette, IngredientRecette, RecettePlanifiee, ListeCourses, StockFrigo
 
 
 BASE = '/recettes'
@@ -61,6 +62,7 @@ class TestCreationRecette:
             assert len(r.ingredients) == 1
             assert r.ingredients[0].quantite == pytest.approx(150)
             assert r.ingredients[0].ingredient_id == ingredient.id
+            assert r.cout_cache == pytest.approx(75.0)
 
     def test_creation_avec_plusieurs_ingredients(self, client, app, ingredient):
         ing2 = Ingredient_fixture(app, 'Huile', 'ml', 0.01)
@@ -96,6 +98,25 @@ class TestCreationRecette:
             assert Recette.query.filter_by(nom='Inconnue').first() is None
 
 
+class TestInvalidationCache:
+    """Le cache des recettes est invalidé une fois la transaction commitée."""
+
+    @pytest.fixture
+    def appels(self, monkeypatch):
+        appels = []
+        monkeypatch.setattr(routes.recettes, 'invalidate_recettes_cache',
+                            lambda: appels.append(db.session().in_transaction()))
+        return appels
+
+    def test_creation(self, client, app, appels):
+        client.post(f'{BASE}/', data=form_recette())
+        assert appels == [False]
+
+    def test_modification(self, client, app, recette, appels):
+        client.post(f'{BASE}/modifier/{recette.id}', data=form_recette(nom='Salade niçoise'))
+        assert appels == [False]
+
+
 class TestModificationRecette:
     def test_modification_nom(self, client, app, recette):
         client.post(f'{BASE}/modifier/{recette.id}', data=form_recette(nom='Salade niçoise'))
@@ -131,6 +152,17 @@ class TestModificationRecette:
             assert len(r.etapes) == 2
             assert r.etapes[0].description == 'Laver'
 
+    def test_modification_sous_recettes(self, client, app, recette):
+        sauce = Recette(nom='Vinaigrette')
+        db.session.add(sauce)
+        db.session.commit()
+        data = form_recette(nom='Salade tomate')
+        data['sous_recette_id'] = [str(sauce.id), str(sauce.id), str(recette.id), '9999', 'x']
+        client.post(f'{BASE}/modifier/{recette.id}', data=data)
+        with app.app_context():
+            r = db.session.get(Recette, recette.id)
+            assert [s.nom for s in r.sous_recettes] == ['Vinaigrette']
+
     def test_modification_supprime_etapes_si_aucune(self, client, app, recette):
         client.post(f'{BASE}/modifier/{recette.id}', data=form_recette(nom='Salade tomate'))
         with app.app_context():
@@ -192,6 +224,22 @@ class TestSuppressionRecette:
         assert resp.status_code == 404
 
 
+class TestPlanificationRapide:
+    def test_planifier_ajoute_quantite_manquante(self, client, app, recette, ingredient):
+        db.session.add(StockFrigo(ingredient_id=ingredient.id, quantite=50))
+        db.session.commit()
+        client.post(f'{BASE}/planifier-rapide/{recette.id}')
+        course = ListeCourses.query.filter_by(ingredient_id=ingredient.id).one()
+        assert course.quantite == 150
+        assert RecettePlanifiee.query.filter_by(recette_id=recette.id).count() == 1
+
+    def test_planifier_deux_fois_augmente_course_existante(self, client, app, recette, ingredient):
+        client.post(f'{BASE}/planifier-rapide/{recette.id}')
+        client.post(f'{BASE}/planifier-rapide/{recette.id}')
+        course = ListeCourses.query.filter_by(ingredient_id=ingredient.id).one()
+        assert course.quantite == 400
+
+
 class TestListeRecettes:
     def test_liste_retourne_200(self, client):
         assert client.get(f'{BASE}/').status_code == 200
@@ -199,6 +247,50 @@ class TestListeRecettes:
     def test_liste_filtre_par_type(self, client):
         assert client.get(f'{BASE}/?type=Entrée').status_code == 200
 
+    def test_liste_filtre_par_ingredient_sans_doublon(self, client, recette, ingredient):
+        db.session.add(IngredientRecette(recette_id=recette.id, ingredient_id=ingredient.id, quantite=50))
+        db.session.commit()
+
+        html = client.get(f'{BASE}/?ingredient={ingredient.id}').get_data(as_text=True)
+        lignes = html.split('<tbody>')[1].split('</tbody>')[0]
+        assert lignes.count('<tr>') == 1
+
+    def test_liste_filtre_ingredient_invalide_ignore(self, client):
+        assert client.get(f'{BASE}/?ingredient=abc').status_code == 200
+
+    def _lignes_recherche(self, client, terme):
+        html = client.get(f'{BASE}/?search={terme}').get_data(as_text=True)
+        return html.split('<tbody>')[1].split('</tbody>')[0] if '<tbody>' in html else ''
+
+    def test_liste_recherche_par_sous_chaine(self, client, recette):
+        db.session.add(Recette(nom='Soupe'))
+        db.session.commit()
+
+        for terme in ('TOMA', 'de t', 'to'):
+            lignes = self._lignes_recherche(client, terme)
+            assert 'Salade tomate' in lignes and 'Soupe' not in lignes
+
+    def test_liste_recherche_suit_le_renommage(self, client, recette):
+        recette.nom = 'Gaspacho'
+        db.session.commit()
+
+        assert 'Gaspacho' not in self._lignes_recherche(client, 'tomate')
+        assert 'Gaspacho' in self._lignes_recherche(client, 'spac')
+
+    def test_liste_pagination_par_curseur(self, client, app):
+        app.config['ITEMS_PER_PAGE_RECETTES'] = 2
+        db.session.add_all([Recette(nom=nom) for nom in ('Crêpes', 'Pizza', 'Soupe')])
+        db.session.commit()
+
+        page1 = client.get(f'{BASE}/').get_data(as_text=True).split('<tbody>')[1]
+        assert 'Crêpes' in page1 and 'Pizza' in page1 and 'Soupe' not in page1
+        assert 'after=Pizza' in page1
+
+        pizza = Recette.query.filter_by(nom='Pizza').one()
+        page2 = client.get(f'{BASE}/?after=Pizza&after_id={pizza.id}').get_data(as_text=True)
+        page2 = page2.split('<tbody>')[1]
+        assert 'Soupe' in page2 and 'Crêpes' not in page2
+
     def test_detail_recette(self, client, recette):
         assert client.get(f'{BASE}/{recette.id}').status_code == 200
 
@@ -206,6 +298,31 @@ class TestListeRecettes:
         assert client.get(f'{BASE}/9999').status_code == 404
 
 
+class TestCuisinerAvecFrigo:
+    def test_filtre_realisable(self, client, app, recette, ingredient):
+        db.session.add(Recette(nom='Recette sans ingrédient'))
+        db.session.commit()
+
+        html = client.get(f'{BASE}/cuisiner-avec-frigo?realisable=1').get_data(as_text=True)
+        assert 'Recette sans ingrédient' in html
+        assert 'Salade tomate' not in html
+
+        db.session.add(StockFrigo(ingredient_id=ingredient.id, quantite=500))
+        db.session.commit()
+        html = client.get(f'{BASE}/cuisiner-avec-frigo?realisable=1').get_data(as_text=True)
+        assert 'Salade tomate' in html
+
+    def test_resultat_en_cache_invalide_par_le_stock(self, client, recette, ingredient):
+        url = f'{BASE}/cuisiner-avec-frigo'
+        premier = client.get(url).get_data(as_text=True)
+        assert 'Salade tomate' in premier
+        assert client.get(url).get_data(as_text=True) == premier
+
+        db.session.add(StockFrigo(ingredient_id=ingredient.id, quantite=500))
+        db.session.commit()
+        assert client.get(url).get_data(as_text=True) != premier
+
+
 # Helper pour créer un ingrédient directement en base dans les tests
 from models.models import Ingredient
 
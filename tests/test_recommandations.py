@@ -0,0 +1,102 @@
+"""Tests de non-régression des routes de recommandations."""
+import pytest
+from models.models import db, StockFrigo, Recette, IngredientRecette
+import utils.recommandation
+from utils.recommandation import (creer_moteur_recommandation_standard, get_cout_max_recettes,
+                                   get_features_recettes, get_moteur_recommandation)
+
+
+BASE = '/recommandations'
+
+
+class TestPageRecommandations:
+    def test_index_retourne_200(self, client, recette):
+        resp = client.get(f'{BASE}/')
+        assert resp.status_code == 200
+        assert 'Salade tomate' in resp.get_data(as_text=True)
+
+    def test_preset_redirige(self, client):
+        assert client.get(f'{BASE}/presets/rapide').status_code == 302
+
+
+class TestApiRecommandations:
+    def test_api_retourne_recettes(self, client, recette):
+        data = client.get(f'{BASE}/api').get_json()
+        assert data['success'] is True
+        assert data['recommandations'][0]['recette']['nom'] == 'Salade tomate'
+        assert data['recommandations'][0]['recette']['nb_ingredients'] == 1
+
+    def test_api_poids_pris_en_compte(self, client, recette):
+        data = client.get(f'{BASE}/api?poids_cout=0.9').get_json()
+        assert data['criteres']['cout']['poids'] == pytest.approx(0.9)
+
+    def test_api_cache_invalide_par_le_stock(self, client, recette, ingredient):
+        url = f'{BASE}/api?realisable=1'
+        assert client.get(url).get_json()['count'] == 0
+
+        db.session.add(StockFrigo(ingredient_id=ingredient.id, quantite=500))
+        db.session.commit()
+        assert client.get(url).get_json()['count'] == 1
+
+
+class TestMoteurTopK:
+    def test_limit_egal_au_debut_du_classement_complet(self, app, ingredient_avec_stock):
+        for i, quantite in enumerate((100, 250, 400, 600, 50, 300)):
+            r = Recette(nom=f'Recette {i}', temps_preparation=10 * (i + 1))
+            db.session.add(r)
+            db.session.flush()
+            db.session.add(IngredientRecette(recette_id=r.id, ingredient_id=ingredient_avec_stock.id,
+                                             quantite=quantite))
+        db.session.commit()
+
+        moteur = creer_moteur_recommandation_standard()
+        recettes = Recette.query.all()
+        complet = [(r.recette.id, r.score_total) for r in moteur.recommander(recettes)]
+        top = [(r.recette.id, r.score_total) for r in moteur.recommander(recettes, limit=3)]
+
+        assert top == complet[:3]
+
+    def test_stock_map_fourni(self, app, recette, ingredient):
+        moteur = creer_moteur_recommandation_standard()
+        recettes = Recette.query.all()
+
+        assert moteur.recommander(recettes, filtre_realisable=True, stock_map={}) == []
+        resultat = moteur.recommander(recettes, filtre_realisable=True,
+                                      stock_map={ingredient.id: 500})
+        assert [r.recette.id for r in resultat] == [recette.id]
+
+
+class TestMoteurStandard:
+    def test_moteur_neuf_a_chaque_appel(self, app):
+        moteur = creer_moteur_recommandation_standard(saison='hiver')
+        assert creer_moteur_recommandation_standard() is not moteur
+        assert get_moteur_recommandation() is not moteur
+        assert moteur.contexte['saison'] == 'hiver'
+
+
+class TestFeaturesRecettes:
+    def test_sous_ensembles_partagent_le_cache(self, app, recette, monkeypatch):
+        autre = Recette(nom='Soupe')
+        db.session.add(autre)
+        db.session.commit()
+
+        appels = []
+        calcul = utils.recommandation.calculer_features_recettes
+        monkeypatch.setattr(utils.recommandation, 'calculer_features_recettes',
+                            lambda recettes: appels.append(1) or calcul(recettes))
+
+        features = get_features_recettes([recette])
+        assert get_features_recettes([autre]) is features
+        assert get_features_recettes([recette, autre]) is features
+        assert len(appels) == 1
+        assert features.cout[features.lignes[recette.id]] == pytest.approx(100.0)
+
+
+class TestCoutMax:
+    def test_cout_max_depuis_la_colonne(self, app, recette):
+        assert get_cout_max_recettes() == pytest.approx(100.0)
+
+    def test_defaut_sans_recette_chiffree(self, app):
+        db.session.add(Recette(nom='Vide'))
+        db.session.commit()
+        assert get_cout_max_recettes() == 50.0
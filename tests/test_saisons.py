@@ -0,0 +1,20 @@
+"""Tests des utilitaires de saisons."""
+from datetime import date, datetime
+import pytest
+from utils.saisons import get_saison_actuelle
+
+
+class TestSaisonActuelle:
+    @pytest.mark.parametrize('jour, attendu', [
+        (date(2024, 3, 19), 'hiver'),
+        (date(2024, 3, 20), 'printemps'),
+        (date(2024, 6, 21), 'ete'),
+        (date(2024, 9, 22), 'automne'),
+        (date(2024, 12, 21), 'hiver'),
+        (datetime(2024, 7, 1, 15, 30), 'ete'),
+    ])
+    def test_bornes(self, jour, attendu):
+        assert get_saison_actuelle(jour) == attendu
+
+    def test_par_defaut_aujourd_hui(self):
+        assert get_saison_actuelle() == get_saison_actuelle(date.today())
@@ -3,7 +3,7 @@ utils/cache.py
 Système de cache centralisé pour l'application
 
 ✅ OPTIMISATION TECHNIQUE - Flask-Caching
-- Cache en mémoire (SimpleCache) pour usage local
+- Cache en mémoire sans sérialisation (RefCache) pour usage local
 - Décorateurs pour mettre en cache les requêtes lourdes
 - Fonctions d'invalidation du cache
 
@@ -21,10 +21,22 @@ USAGE:
     # Invalider après modification
     invalidate_cache('ma_cle')
 """
-from functools import wraps
+from collections import namedtuple
+from functools import wraps, lru_cache
+import hashlib
+import os
+import tempfile
+import threading
 from flask import current_app
+from cachelib import SimpleCache
 from flask_caching import Cache
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
 from datetime import datetime, timedelta, timezone
+import time
+
+from models.models import (db, Ingredient, IngredientRecette, ListeCourses, Recette,
+                           RecettePlanifiee, StockFrigo)
 
 # Instance globale du cache
 cache = Cache()
@@ -39,14 +51,28 @@ def init_cache(app):
     Args:
         app: Instance Flask
     """
-    cache.init_app(app)
-    app.logger.info('✅ Flask-Caching initialisé')
+    config = get_cache_config(app.config)
+    cache.init_app(app, config=config)
+    _ingredients_options.cache_clear()
+    app.logger.info(f'✅ Flask-Caching initialisé ({config["CACHE_TYPE"]})')
 
 
 # ============================================
 # DÉCORATEURS DE CACHE
 # ============================================
 
+def _cle_arguments(prefixe, args, kwargs):
+    """
+    Construit une clé stable à partir des arguments d'un appel.
+
+    hash() est randomisé par processus (PYTHONHASHSEED) : la même fonction
+    appelée avec les mêmes arguments donnerait une clé différente dans
+    chaque worker. blake2b sur le repr canonique (kwargs triés) est stable.
+    """
+    payload = repr((args, sorted(kwargs.items()))).encode()
+    return f"{prefixe}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+
 def cached_query(key_prefix, timeout=300):
     """
     Décorateur pour mettre en cache le résultat d'une fonction.
@@ -63,8 +89,9 @@ def cached_query(key_prefix, timeout=300):
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            # Construire la clé avec les arguments
-            cache_key = f"{key_prefix}:{hash(str(args) + str(kwargs))}"
+            # Construire la clé avec les arguments ; la version du préfixe
+            # permet à invalidate_cache() d'écarter toutes les entrées d'un coup
+            cache_key = _cle_arguments(cle_versionnee(key_prefix, f'prefixe:{key_prefix}'), args, kwargs)
             
             # Essayer de récupérer du cache
             result = cache.get(cache_key)
@@ -96,7 +123,7 @@ def memoize_for_request(f):
     def wrapper(*args, **kwargs):
         from flask import g
         
-        cache_key = f"_memoize_{f.__name__}_{hash(str(args) + str(kwargs))}"
+        cache_key = _cle_arguments(f"_memoize_{f.__module__}.{f.__qualname__}", args, kwargs)
         
         if not hasattr(g, '_memoize_cache'):
             g._memoize_cache = {}
@@ -108,27 +135,108 @@ def memoize_for_request(f):
     return wrapper
 
 
+_verrous_swr = {}
+_verrous_swr_acces = threading.Lock()
+
+
+def _verrou_swr(cle):
+    """Retourne le verrou de rafraîchissement associé à une clé."""
+    with _verrous_swr_acces:
+        return _verrous_swr.setdefault(cle, threading.Lock())
+
+
+def _liberer_verrou_swr(cle, verrou):
+    """Oublie le verrou d'une clé rafraîchie puis le libère."""
+    with _verrous_swr_acces:
+        _verrous_swr.pop(cle, None)
+    verrou.release()
+
+
+def stale_while_revalidate(key_prefix, timeout=300, groupes=()):
+    """
+    Décorateur de cache « stale-while-revalidate ».
+
+    L'entrée stockée est (frais_jusqu_a, perime_jusqu_a, valeur) :
+    - avant frais_jusqu_a, la valeur est servie telle quelle ;
+    - jusqu'à perime_jusqu_a, la valeur périmée est servie immédiatement
+      et recalculée dans un thread d'arrière-plan (un seul par clé) ;
+    - au-delà, après invalidate_cache(key_prefix) ou une modification
+      d'un des groupes versionnés, le calcul est synchrone.
+
+    La fenêtre de péremption est CACHE_STALE_TTL (600 s par défaut),
+    comptée depuis le calcul.
+
+    Args:
+        key_prefix: Préfixe de la clé de cache
+        timeout: Durée de fraîcheur en secondes (défaut: 5 minutes)
+        groupes: Groupes de versions dont dépend la valeur (ex: 'ingredients')
+    """
+    def decorator(f):
+        def rafraichir(cle, args, kwargs, duree_perime):
+            valeur = f(*args, **kwargs)
+            maintenant = time.time()
+            duree_perime = max(duree_perime, timeout)
+            cache.set(cle, (maintenant + timeout, maintenant + duree_perime, valeur),
+                      timeout=duree_perime)
+            return valeur
+
+        def rafraichir_en_arriere_plan(app, cle, args, kwargs, duree_perime, verrou):
+            try:
+                with app.app_context():
+                    rafraichir(cle, args, kwargs, duree_perime)
+            except Exception:
+                app.logger.exception(f'Rafraîchissement du cache {key_prefix} impossible')
+            finally:
+                _liberer_verrou_swr(cle, verrou)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            cle = _cle_arguments(cle_versionnee(key_prefix, f'prefixe:{key_prefix}', *groupes),
+                                 args, kwargs)
+            duree_perime = current_app.config.get(
+                'CACHE_STALE_TTL', DEFAULT_CACHE_CONFIG['CACHE_STALE_TTL'])
+
+            entree = cache.get(cle)
+            if entree is not None:
+                frais_jusqu_a, perime_jusqu_a, valeur = entree
+                maintenant = time.time()
+                if maintenant < frais_jusqu_a:
+                    return valeur
+                if maintenant < perime_jusqu_a:
+                    verrou = _verrou_swr(cle)
+                    if verrou.acquire(blocking=False):
+                        threading.Thread(
+                            target=rafraichir_en_arriere_plan,
+                            args=(current_app._get_current_object(), cle, args, kwargs,
+                                  duree_perime, verrou),
+                            name=f'swr:{key_prefix}',
+                            daemon=True
+                        ).start()
+                    return valeur
+
+            return rafraichir(cle, args, kwargs, duree_perime)
+
+        wrapper._cache_prefix = key_prefix
+        return wrapper
+    return decorator
+
+
 # ============================================
 # INVALIDATION DU CACHE
 # ============================================
 
 def invalidate_cache(key_prefix):
     """
-    Invalide toutes les entrées de cache avec un préfixe donné.
-    
-    Note: Avec SimpleCache, on ne peut pas lister les clés,
-    donc on utilise cache.clear() pour un préfixe spécifique
-    via une approche par pattern.
+    Invalide toutes les entrées de cache d'un préfixe (voir cached_query).
+
+    Les clés étant hachées, elles ne peuvent pas être listées (SimpleCache,
+    FileSystemCache) : on incrémente la version du préfixe, les anciennes
+    entrées ne sont plus lues et expirent d'elles-mêmes.
     
     Args:
         key_prefix: Préfixe des clés à invalider
     """
-    # Avec SimpleCache, la meilleure approche est de supprimer
-    # les clés connues ou de clear tout le cache
-    try:
-        cache.delete_memoized(key_prefix)
-    except:
-        pass
+    incrementer_version_cache(f'prefixe:{key_prefix}')
 
 
 def clear_all_cache():
@@ -148,8 +256,9 @@ def invalidate_ingredients_cache():
         'ingredients_all',
         'dashboard_stats'
     ]
-    for key in keys:
-        cache.delete(key)
+    cache.delete_many(*keys)
+
+    invalidate_cache('categories_count')
 
 
 def invalidate_recettes_cache():
@@ -160,8 +269,10 @@ def invalidate_recettes_cache():
         'dashboard_stats',
         'recommendations'
     ]
-    for key in keys:
-        cache.delete(key)
+    cache.delete_many(*keys)
+
+    cache.delete_memoized(get_recettes_count_cached)
+    incrementer_version_cache('recettes')
 
 
 def invalidate_stock_cache():
@@ -172,8 +283,9 @@ def invalidate_stock_cache():
         'dashboard_stats',
         'recettes_realisables'
     ]
-    for key in keys:
-        cache.delete(key)
+    cache.delete_many(*keys)
+
+    cache.delete_memoized(get_stock_value_cached)
 
 
 def invalidate_courses_cache():
@@ -183,18 +295,18 @@ def invalidate_courses_cache():
         'courses_budget',
         'dashboard_stats'
     ]
-    for key in keys:
-        cache.delete(key)
+    cache.delete_many(*keys)
 
 
 # ============================================
 # FONCTIONS CACHÉES PRÊTES À L'EMPLOI
 # ============================================
 
-@cache.memoize(timeout=300)
+@stale_while_revalidate('categories_count', timeout=300, groupes=('ingredients',))
 def get_categories_count_cached():
     """
-    Retourne le comptage des ingrédients par catégorie (caché 5 min).
+    Retourne le comptage des ingrédients par catégorie (caché 5 min,
+    servi périmé pendant le recalcul au-delà).
 
     Retour:
         Dict {categorie: count}
@@ -203,83 +315,371 @@ def get_categories_count_cached():
     return get_categories_count()
 
 
-@cache.memoize(timeout=300)
-def get_all_ingredients_cached():
-    """
-    Retourne tous les ingrédients ordonnés par nom (caché 5 min).
-
-    Retour:
-        Liste d'Ingredient
-    """
-    from utils.queries import get_all_ingredients
-    return get_all_ingredients(with_stock=False, with_saisons=False)
-
-
 @cache.memoize(timeout=60)
 def get_stock_value_cached():
     """
     Calcule la valeur totale du stock (caché 1 min).
 
+    Agrégation SQL équivalente à la somme des
+    stock.ingredient.calculer_prix(stock.quantite), sans charger les lignes.
+
     Retour:
         float: Valeur totale en euros
     """
-    from sqlalchemy.orm import joinedload
-    from models.models import StockFrigo
+    from sqlalchemy import func
+
+    prix = Ingredient.expression_prix(StockFrigo.quantite)
 
-    stocks = StockFrigo.query.options(
-        joinedload(StockFrigo.ingredient)
-    ).all()
+    total = db.session.query(func.coalesce(func.sum(prix), 0.0)) \
+        .select_from(StockFrigo) \
+        .join(Ingredient, Ingredient.id == StockFrigo.ingredient_id) \
+        .filter(StockFrigo.quantite > 0, Ingredient.prix_unitaire > 0) \
+        .scalar()
 
-    return round(sum(
-        stock.ingredient.calculer_prix(stock.quantite)
-        for stock in stocks
-    ), 2)
+    return round(float(total), 2)
 
 
 @cache.memoize(timeout=120)
 def get_recettes_count_cached():
     """
-    Retourne les compteurs de recettes (caché 2 min).
+    Retourne les compteurs de recettes (caché 2 min, voir compter_recettes).
     """
-    from models.models import Recette, RecettePlanifiee
-    
-    return {
-        'total': Recette.query.count(),
-        'planifiees': RecettePlanifiee.query.filter_by(preparee=False).count()
-    }
+    from utils.queries import compter_recettes
+
+    return compter_recettes()
 
 
-@cache.memoize(timeout=300)
+@lru_cache(maxsize=2)
+def _day_bounds(jour_iso):
+    """
+    Retourne (debut_mois, debut_semaine) en UTC pour le jour donné.
+
+    Mémoïsé par jour : les bornes ne changent qu'à minuit.
+    """
+    jour = datetime.fromisoformat(jour_iso).replace(tzinfo=timezone.utc)
+    debut_mois = jour.replace(day=1)
+    debut_semaine = jour - timedelta(days=jour.weekday())
+    return debut_mois, debut_semaine
+
+
+@stale_while_revalidate('historique_stats', timeout=300, groupes=('planifications',))
 def get_historique_stats_cached():
     """
-    Calcule les statistiques de l'historique (caché 5 min).
+    Calcule les statistiques de l'historique (caché 5 min,
+    servi périmé pendant le recalcul au-delà).
     """
-    from sqlalchemy import func, desc
-    from datetime import datetime, timedelta
-    from models.models import db, RecettePlanifiee, Recette, IngredientRecette, Ingredient
-    
-    maintenant = datetime.now(timezone.utc)
-    debut_mois = maintenant.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    debut_semaine = maintenant - timedelta(days=maintenant.weekday())
+    from sqlalchemy import func, case
     
-    # Stats globales
-    total = RecettePlanifiee.query.filter_by(preparee=True).count()
+    debut_mois, debut_semaine = _day_bounds(datetime.now(timezone.utc).date().isoformat())
     
-    mois = RecettePlanifiee.query.filter(
-        RecettePlanifiee.preparee == True,
-        RecettePlanifiee.date_preparation >= debut_mois
-    ).count()
+    # Les trois compteurs en un seul parcours des préparations
+    date_prep = RecettePlanifiee.date_preparation
+    stats = db.session.query(
+        func.count().label('total'),
+        func.count(case((date_prep >= debut_mois, 1))).label('mois'),
+        func.count(case((date_prep >= debut_semaine, 1))).label('semaine')
+    ).filter(RecettePlanifiee.preparee == True).one()
     
-    semaine = RecettePlanifiee.query.filter(
-        RecettePlanifiee.preparee == True,
-        RecettePlanifiee.date_preparation >= debut_semaine
-    ).count()
-    
-    return {
-        'total': total,
-        'mois': mois,
-        'semaine': semaine
-    }
+    return stats._asdict()
+
+
+# ============================================
+# COÛT / NUTRITION DES RECETTES (VERSIONNÉS)
+# ============================================
+
+COUT_NUTRITION_TIMEOUT = 3600
+
+
+# Backends du processus (SimpleCache, RefCache) : les compteurs sont gardés
+# hors du cache, où l'élagage au-delà de CACHE_THRESHOLD les supprimerait
+_versions_locales = {}
+_versions_locales_verrou = threading.Lock()
+
+
+def _versions_hors_cache():
+    """Indique si les versions sont gardées en mémoire du processus."""
+    return isinstance(cache.cache, SimpleCache)
+
+
+def versions_partagees():
+    """
+    Indique si les versions sont communes à tous les processus (Redis...).
+
+    Avec un backend du processus, chaque worker a ses propres compteurs :
+    une version ne peut alors pas servir d'ETag, un autre worker pouvant
+    répondre 304 sur des données qu'il n'a pas vu changer.
+    """
+    return not _versions_hors_cache()
+
+
+def _graine_version():
+    """
+    Valeur initiale d'un compteur, en microsecondes : un compteur évincé
+    puis réinitialisé ne peut pas revenir à un numéro déjà utilisé (il
+    faudrait plus d'un incrément par microseconde depuis sa création).
+    """
+    return time.time_ns() // 1000
+
+
+def get_version_cache(nom):
+    """Retourne le numéro de version courant d'un groupe de clés."""
+    if _versions_hors_cache():
+        with _versions_locales_verrou:
+            return _versions_locales.setdefault(nom, _graine_version())
+
+    # Backend partagé (Redis...) : add() n'écrase pas un compteur
+    # initialisé entre-temps par un autre processus
+    cle = f'version:{nom}'
+    version = cache.get(cle)
+    if version is None:
+        graine = _graine_version()
+        cache.add(cle, graine, timeout=0)
+        version = cache.get(cle)
+        if version is None:
+            version = graine
+    return version
+
+
+def incrementer_version_cache(nom):
+    """
+    Incrémente la version d'un groupe de clés.
+
+    Les clés construites avec l'ancienne version ne sont plus jamais lues
+    et expirent d'elles-mêmes : pas besoin de lister les clés à supprimer.
+    L'incrément est atomique avec les backends du processus (verrou) et
+    Redis (INCR) ; avec FileSystemCache, inc() est une lecture puis une
+    écriture : deux incréments simultanés peuvent n'en compter qu'un.
+    """
+    try:
+        if _versions_hors_cache():
+            with _versions_locales_verrou:
+                _versions_locales[nom] = _versions_locales.get(nom, _graine_version()) + 1
+            return
+
+        get_version_cache(nom)
+        cache.cache.inc(f'version:{nom}')
+    except Exception:
+        current_app.logger.warning(f'Impossible d\'incrémenter la version {nom}')
+
+
+def cle_versionnee(prefixe, *groupes):
+    """Construit une clé de cache invalidée par chacun des groupes donnés."""
+    versions = '.'.join(str(get_version_cache(nom)) for nom in groupes)
+    return f'{prefixe}:v{versions}'
+
+
+def cle_versionnee_recettes(prefixe):
+    """
+    Construit une clé de cache liée au contenu des recettes.
+
+    Le coût et la nutrition dépendent de la recette, de ses sous-recettes
+    et des ingrédients : la clé inclut les versions 'recettes' et 'ingredients'.
+    """
+    return cle_versionnee(prefixe, 'recettes', 'ingredients')
+
+
+def get_ou_calculer(cle, calcul, timeout=COUT_NUTRITION_TIMEOUT):
+    """
+    Retourne la valeur en cache sous `cle`, ou la calcule et la stocke.
+
+    Args:
+        cle: Clé de cache (en général versionnée)
+        calcul: Fonction sans argument produisant la valeur
+        timeout: Durée de vie en secondes
+    """
+    valeur = cache.get(cle)
+    if valeur is None:
+        valeur = calcul()
+        cache.set(cle, valeur, timeout=timeout)
+    return valeur
+
+
+def _cle_recette(recette_id, champ):
+    """Clé d'un calcul portant sur une recette."""
+    return cle_versionnee_recettes(f'recette:{recette_id}:{champ}')
+
+
+def get_cout_recette_cached(recette):
+    """
+    Retourne recette.calculer_cout(), mis en cache jusqu'à la prochaine
+    modification d'une recette ou d'un ingrédient.
+
+    Retour:
+        float: Coût en euros
+    """
+    cle = _cle_recette(recette.id, 'cout')
+    cout = cache.get(cle)
+    if cout is None:
+        cout = recette.calculer_cout()
+        cache.set(cle, cout, timeout=COUT_NUTRITION_TIMEOUT)
+    return cout
+
+
+def get_nutrition_recette_cached(recette):
+    """
+    Retourne recette.calculer_nutrition(), mis en cache jusqu'à la prochaine
+    modification d'une recette ou d'un ingrédient.
+
+    Retour:
+        Dict des valeurs nutritionnelles
+    """
+    cle = _cle_recette(recette.id, 'nutrition')
+    nutrition = cache.get(cle)
+    if nutrition is None:
+        nutrition = recette.calculer_nutrition()
+        cache.set(cle, nutrition, timeout=COUT_NUTRITION_TIMEOUT)
+    return nutrition
+
+
+def get_cout_nutrition_recette_cached(recette):
+    """
+    Retourne (coût, nutrition) d'une recette, mis en cache comme
+    get_cout_recette_cached() / get_nutrition_recette_cached().
+
+    Les colonnes précalculées de la recette sont lues en priorité ;
+    à défaut, les deux valeurs sont calculées par une seule
+    agrégation SQL (Recette.agreger_cout_nutrition).
+
+    Retour:
+        Tuple (float, dict)
+    """
+    if recette.cout_cache is not None and recette.calories_cache is not None:
+        return recette.calculer_cout(), recette.calculer_nutrition()
+
+    cle_cout = _cle_recette(recette.id, 'cout')
+    cle_nutrition = _cle_recette(recette.id, 'nutrition')
+    valeurs = cache.get_many(cle_cout, cle_nutrition)
+    if any(v is None for v in valeurs):
+        cout, nutrition = Recette.agreger_cout_nutrition(recette.id)
+        cache.set_many({cle_cout: cout, cle_nutrition: nutrition},
+                       timeout=COUT_NUTRITION_TIMEOUT)
+        return cout, nutrition
+    return tuple(valeurs)
+
+
+# ============================================
+# CACHE PAR PROCESSUS (VERSIONNÉ)
+# ============================================
+
+IngredientOption = namedtuple('IngredientOption', 'id nom unite categorie')
+
+# Incrémenté à chaque création/modification/suppression d'ingrédient
+_ingredients_version = 0
+
+# Borne la durée de vie du cache pour les écritures faites par d'autres processus
+INGREDIENTS_OPTIONS_TTL = 60
+
+
+def _noter_version_a_incrementer(session, groupe):
+    """
+    Note un groupe de clés à invalider au prochain commit de la session.
+
+    Incrémenter pendant le flush laisserait une requête concurrente relire
+    les anciennes données et les mettre en cache sous la nouvelle version
+    (ou, après un rollback, mettre en cache des données jamais commitées).
+    """
+    if session is not None:
+        session.info.setdefault('versions_a_incrementer', set()).add(groupe)
+
+
+@event.listens_for(Ingredient, 'after_insert')
+@event.listens_for(Ingredient, 'after_update')
+@event.listens_for(Ingredient, 'after_delete')
+def _bump_ingredients_version(mapper, connection, target):
+    # Prix et valeurs nutritionnelles : invalide les coûts/nutritions mis en
+    # cache et la liste des ingrédients du processus (au commit)
+    _noter_version_a_incrementer(object_session(target), 'ingredients')
+
+
+@event.listens_for(RecettePlanifiee, 'after_insert')
+@event.listens_for(RecettePlanifiee, 'after_update')
+@event.listens_for(RecettePlanifiee, 'after_delete')
+def _bump_planifications_version(mapper, connection, target):
+    # Historique des recettes préparées (critère de variété), au commit
+    _noter_version_a_incrementer(object_session(target), 'planifications')
+
+
+@event.listens_for(StockFrigo, 'after_insert')
+@event.listens_for(StockFrigo, 'after_update')
+@event.listens_for(StockFrigo, 'after_delete')
+def _bump_stock_version(mapper, connection, target):
+    # Disponibilité des recettes (page "Cuisiner avec mon frigo"), au commit
+    _noter_version_a_incrementer(object_session(target), 'stock')
+
+
+@event.listens_for(ListeCourses, 'after_insert')
+@event.listens_for(ListeCourses, 'after_update')
+@event.listens_for(ListeCourses, 'after_delete')
+def _bump_courses_version(mapper, connection, target):
+    # Statistiques de la liste de courses (dashboard), au commit
+    _noter_version_a_incrementer(object_session(target), 'courses')
+
+
+# Groupe de version de chaque modèle pour les requêtes groupées
+_GROUPES_VERSION = {
+    Ingredient: 'ingredients',
+    StockFrigo: 'stock',
+    ListeCourses: 'courses',
+    RecettePlanifiee: 'planifications',
+    Recette: 'recettes',
+    IngredientRecette: 'recettes',
+}
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _noter_requete_groupee(orm_execute_state):
+    # Les INSERT/UPDATE/DELETE groupés (insert(), update(), Query.delete())
+    # ne déclenchent pas les événements de mapper ci-dessus : le groupe est
+    # noté s'ils modifient des lignes, et incrémenté au commit
+    if orm_execute_state.is_select or orm_execute_state.bind_mapper is None:
+        return None
+    groupe = _GROUPES_VERSION.get(orm_execute_state.bind_mapper.class_)
+    if not groupe:
+        return None
+
+    resultat = orm_execute_state.invoke_statement()
+    # rowcount inconnu (-1) : considéré comme une modification
+    if getattr(resultat, 'rowcount', -1) != 0:
+        _noter_version_a_incrementer(orm_execute_state.session, groupe)
+    return resultat
+
+
+@event.listens_for(db.session, 'after_commit')
+def _incrementer_versions_notees(session):
+    global _ingredients_version
+    for groupe in session.info.pop('versions_a_incrementer', ()):
+        if groupe == 'ingredients':
+            _ingredients_version += 1
+        incrementer_version_cache(groupe)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _oublier_versions_notees(session):
+    session.info.pop('versions_a_incrementer', None)
+
+
+@lru_cache(maxsize=1)
+def _ingredients_options(version, periode):
+    rows = db.session.query(
+        Ingredient.id, Ingredient.nom, Ingredient.unite, Ingredient.categorie
+    ).order_by(Ingredient.nom).all()
+    return tuple(IngredientOption(*row) for row in rows)
+
+
+def get_ingredients_options():
+    """
+    Retourne la liste des ingrédients pour les listes déroulantes.
+
+    Gardée en mémoire du processus tant qu'aucun ingrédient n'est modifié
+    (et au plus INGREDIENTS_OPTIONS_TTL secondes). Un hit ne passe ni par
+    Flask-Caching ni par la base : c'est la liste d'ingrédients à utiliser
+    sur les chemins chauds.
+
+    Retour:
+        Tuple d'IngredientOption (id, nom, unite, categorie) trié par nom
+    """
+    periode = int(time.monotonic() // INGREDIENTS_OPTIONS_TTL)
+    return _ingredients_options(_ingredients_version, periode)
 
 
 # ============================================
@@ -287,15 +687,19 @@ def get_historique_stats_cached():
 # ============================================
 
 DEFAULT_CACHE_CONFIG = {
-    'CACHE_TYPE': 'SimpleCache',  # Cache en mémoire (parfait pour local)
+    'CACHE_TYPE': 'utils.cache_backends.RefCache',  # Mémoire, sans pickle (local)
     'CACHE_DEFAULT_TIMEOUT': 300,  # 5 minutes par défaut
     'CACHE_THRESHOLD': 500,  # Nombre max d'items en cache
+    'CACHE_STALE_TTL': 600,  # Fenêtre stale-while-revalidate
 }
 
 
 def get_cache_config(app_config=None):
     """
     Retourne la configuration du cache adaptée à l'environnement.
+
+    RedisCache sans le paquet redis installé retombe sur FileSystemCache,
+    qui reste partagé entre les workers d'une même machine.
     
     Args:
         app_config: Configuration de l'application (optionnel)
@@ -306,16 +710,19 @@ def get_cache_config(app_config=None):
     config = DEFAULT_CACHE_CONFIG.copy()
     
     if app_config:
-        # En production, on pourrait utiliser Redis ou Memcached
-        if app_config.get('ENV') == 'production':
-            # Pour l'instant, on reste sur SimpleCache
-            # mais on pourrait configurer Redis ici
-            pass
-        
         # Permettre override via config
-        if 'CACHE_TYPE' in app_config:
-            config['CACHE_TYPE'] = app_config['CACHE_TYPE']
-        if 'CACHE_DEFAULT_TIMEOUT' in app_config:
-            config['CACHE_DEFAULT_TIMEOUT'] = app_config['CACHE_DEFAULT_TIMEOUT']
-    
+        for cle in ('CACHE_TYPE', 'CACHE_DEFAULT_TIMEOUT', 'CACHE_THRESHOLD',
+                    'CACHE_STALE_TTL', 'CACHE_REDIS_URL', 'CACHE_DIR'):
+            if app_config.get(cle) is not None:
+                config[cle] = app_config[cle]
+
+    if config['CACHE_TYPE'] == 'RedisCache':
+        try:
+            import redis  # noqa: F401
+        except ImportError:
+            config['CACHE_TYPE'] = 'FileSystemCache'
+
+    if config['CACHE_TYPE'] == 'FileSystemCache':
+        config.setdefault('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'frigo_cache'))
+
     return config
@@ -0,0 +1,30 @@
+"""
+utils/cache_backends.py
+Backends Flask-Caching propres à l'application.
+
+Utilisation : CACHE_TYPE = 'utils.cache_backends.RefCache'
+"""
+from flask_caching.backends.simplecache import SimpleCache
+
+
+class _SansSerialisation:
+    """Sérialiseur identité : la valeur est stockée telle quelle."""
+
+    def dumps(self, value):
+        return value
+
+    def loads(self, value):
+        return value
+
+
+class RefCache(SimpleCache):
+    """
+    Cache mémoire du processus qui conserve les références Python.
+
+    Identique à SimpleCache (verrou, expiration, seuil) mais sans
+    pickle à chaque get/set : un hit renvoie l'objet mis en cache
+    lui-même. Les valeurs mises en cache ne doivent donc pas être
+    modifiées par l'appelant.
+    """
+
+    serializer = _SansSerialisation()
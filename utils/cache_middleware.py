@@ -3,12 +3,28 @@ Middleware pour gérer le cache de manière plus avancée
 """
 from flask import request, make_response
 from functools import wraps
+from datetime import timezone
 import hashlib
 
-def add_cache_control(max_age=3600, public=True, must_revalidate=False):
+# ETag = empreinte non cryptographique : xxh3 si disponible, sinon BLAKE2b-128
+try:
+    import xxhash
+
+    def _empreinte(data):
+        return xxhash.xxh3_128_hexdigest(data)
+except ImportError:
+    def _empreinte(data):
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def add_cache_control(max_age=3600, public=True, must_revalidate=False, swr=0):
     """
     Décorateur pour ajouter des en-têtes de cache à une route spécifique
     
+    swr ajoute la directive stale-while-revalidate : le navigateur ou le CDN
+    sert la copie périmée pendant swr secondes tout en la revalidant.
+    Désactivée par défaut, et jamais émise avec must_revalidate (qui
+    interdit justement de servir une copie périmée).
+    
     Usage:
     @app.route('/ma-page')
     @add_cache_control(max_age=86400, public=True)
@@ -30,6 +46,10 @@ def add_cache_control(max_age=3600, public=True, must_revalidate=False):
             if must_revalidate:
                 response.cache_control.must_revalidate = True
             
+            if swr > 0 and not must_revalidate:
+                # Pas d'attribut dédié avant Werkzeug 3.1 : directive posée par clé
+                response.cache_control['stale-while-revalidate'] = str(swr)
+            
             return response
         return decorated_function
     return decorator
@@ -41,31 +61,88 @@ def generate_etag(data):
     """
     if isinstance(data, str):
         data = data.encode('utf-8')
-    return hashlib.md5(data).hexdigest()
+    return _empreinte(data)
+
+def _client_a_jour(etag, mtime=None):
+    """
+    Indique si la copie du client est à jour (réponse 304).
+    
+    If-None-Match est prioritaire ; If-Modified-Since n'est
+    consulté qu'en son absence et si mtime est connu.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return if_none_match == etag
+    if mtime is not None and request.if_modified_since is not None:
+        return mtime <= request.if_modified_since
+    return False
+
+def _normaliser_mtime(mtime):
+    """Date de modification en UTC, à la seconde (précision de l'en-tête HTTP)."""
+    if mtime is None:
+        return None
+    if mtime.tzinfo is None:
+        mtime = mtime.replace(tzinfo=timezone.utc)
+    return mtime.replace(microsecond=0)
+
+def _reponse_conditionnelle(etag, mtime, build_body):
+    """Construit la réponse 304 ou complète avec ETag et Last-Modified."""
+    mtime = _normaliser_mtime(mtime)
+    if _client_a_jour(etag, mtime):
+        response = make_response('', 304)
+    else:
+        response = make_response(build_body())
+    
+    response.headers['ETag'] = etag
+    if mtime is not None:
+        response.last_modified = mtime
+    return response
 
-def conditional_response(response_data, etag=None):
+def conditional_response(response_data, etag=None, raw_bytes=None, version=None, mtime=None):
     """
-    Gère les requêtes conditionnelles (If-None-Match)
+    Gère les requêtes conditionnelles (If-None-Match, If-Modified-Since)
     Retourne 304 Not Modified si le contenu n'a pas changé
     
+    Avec version (ex: version de cache ou max(updated_at) en epoch),
+    l'ETag faible W/"v{version}" est utilisé sans lire le corps.
+    Sinon, sans etag, l'empreinte est calculée sur les octets du corps
+    (raw_bytes, ou response_data.get_data()) sans conversion en str.
+    mtime (datetime) ajoute Last-Modified et la prise en charge
+    d'If-Modified-Since.
+    
     Usage:
     @app.route('/api/data')
     def get_data():
         data = get_my_data()
-        etag = generate_etag(str(data))
-        return conditional_response(jsonify(data), etag=etag)
+        return conditional_response(jsonify(data))
     """
+    if etag is None and version is not None:
+        etag = f'W/"v{version}"'
     if etag is None:
-        etag = generate_etag(str(response_data))
+        if raw_bytes is None:
+            if hasattr(response_data, 'get_data'):
+                raw_bytes = response_data.get_data()
+            else:
+                raw_bytes = response_data
+        etag = generate_etag(raw_bytes)
     
-    # Vérifier si le client a déjà cette version
-    if request.headers.get('If-None-Match') == etag:
-        response = make_response('', 304)
-    else:
-        response = make_response(response_data)
+    return _reponse_conditionnelle(etag, mtime, lambda: response_data)
+
+def conditional_response_lazy(etag, build_body, mtime=None):
+    """
+    Variante de conditional_response() où le corps n'est construit
+    que si le client n'a pas déjà la version courante.
     
-    response.headers['ETag'] = etag
-    return response
+    L'etag doit donc être calculable sans le corps (ex: version de cache
+    des données servies).
+    
+    Usage:
+    @app.route('/api/data')
+    def get_data():
+        etag = generate_etag(cle_versionnee('api_data', 'ingredients'))
+        return conditional_response_lazy(etag, lambda: jsonify(get_my_data()))
+    """
+    return _reponse_conditionnelle(etag, mtime, build_body)
 
 def no_cache():
     """
@@ -1,5 +1,7 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
+from sqlalchemy import case, func
+from models.models import db, arrondi, prix_ligne, Ingredient, ListeCourses
 
 
 @dataclass
@@ -10,7 +12,35 @@ class BudgetResult:
     total_estime: float = 0
     items_avec_prix: int = 0
     items_sans_prix: int = 0
-    details: List[dict] = field(default_factory=list)
+    details: List['BudgetDetail'] = field(default_factory=list)
+
+
+@dataclass(slots=True, frozen=True)
+class BudgetDetail:
+    """
+    Détail du prix d'une ligne de la liste de courses.
+
+    Plus léger qu'un dict par ligne ; to_dict() n'est appelé
+    qu'à la sérialisation (API).
+    """
+    id: int
+    ingredient_id: int
+    ingredient_nom: str
+    quantite: float
+    unite: str
+    prix_unitaire: float
+    prix_total: float
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'ingredient_id': self.ingredient_id,
+            'ingredient_nom': self.ingredient_nom,
+            'quantite': self.quantite,
+            'unite': self.unite,
+            'prix_unitaire': self.prix_unitaire,
+            'prix_total': self.prix_total
+        }
 
 
 def calculer_prix_item(item) -> float:
@@ -45,48 +75,66 @@ def calculer_budget_courses(items, include_details: bool = False) -> BudgetResul
     if not items:
         return result
     
+    total = 0.0
+    avec_prix = 0
+    sans_prix = 0
+    details = result.details
+    
     for item in items:
-        if not item.ingredient:
-            result.items_sans_prix += 1
+        ing = item.ingredient
+        if ing is None:
+            sans_prix += 1
             continue
         
-        ing = item.ingredient
-        prix_unitaire = ing.prix_unitaire
+        parametres = ing.parametres_prix()
+        prix_unitaire = parametres[0]
         
-        if prix_unitaire and prix_unitaire > 0:
-            # Utiliser la fonction centralisée
-            prix_total = calculer_prix_item(item)
-            result.total_estime += prix_total
-            result.items_avec_prix += 1
-            
-            if include_details:
-                result.details.append({
-                    'id': item.id,
-                    'ingredient_id': ing.id,
-                    'ingredient_nom': ing.nom,
-                    'quantite': item.quantite,
-                    'unite': ing.unite,
-                    'prix_unitaire': prix_unitaire,
-                    'prix_total': round(prix_total, 2)
-                })
+        if prix_unitaire > 0:
+            prix_total = prix_ligne(item.quantite, *parametres)
+            total += prix_total
+            avec_prix += 1
         else:
-            result.items_sans_prix += 1
-            
-            if include_details:
-                result.details.append({
-                    'id': item.id,
-                    'ingredient_id': ing.id,
-                    'ingredient_nom': ing.nom,
-                    'quantite': item.quantite,
-                    'unite': ing.unite,
-                    'prix_unitaire': 0,
-                    'prix_total': 0
-                })
+            prix_unitaire = prix_total = 0
+            sans_prix += 1
+        
+        if include_details:
+            details.append(BudgetDetail(item.id, ing.id, ing.nom, item.quantite,
+                                        ing.unite, prix_unitaire, prix_total))
     
-    result.total_estime = round(result.total_estime, 2)
+    result.total_estime = arrondi(total)
+    result.items_avec_prix = avec_prix
+    result.items_sans_prix = sans_prix
     return result
 
 
+def calculer_budget_courses_sql() -> BudgetResult:
+    """
+    Calcule le budget de la liste de courses (items non achetés)
+    par une seule agrégation SQL, sans charger les items.
+
+    Mêmes règles que calculer_budget_courses() (prix arrondi par ligne,
+    items sans ingrédient comptés sans prix) ; sans détails.
+
+    Returns:
+        BudgetResult: Objet contenant le total et les statistiques
+    """
+    avec_prix = Ingredient.prix_unitaire > 0
+    total, nb_avec_prix, nb_items = db.session.query(
+        func.coalesce(func.sum(Ingredient.expression_prix(ListeCourses.quantite)), 0.0),
+        func.count(case((avec_prix, 1))),
+        func.count()
+    ).select_from(ListeCourses) \
+        .outerjoin(Ingredient, Ingredient.id == ListeCourses.ingredient_id) \
+        .filter(ListeCourses.achete == False) \
+        .one()
+
+    return BudgetResult(
+        total_estime=arrondi(float(total)),
+        items_avec_prix=nb_avec_prix,
+        items_sans_prix=nb_items - nb_avec_prix
+    )
+
+
 def calculer_cout_recette(recette) -> float:
     """
     Calcule le coût total d'une recette.
@@ -100,10 +148,42 @@ def calculer_cout_recette(recette) -> float:
     if not recette or not recette.ingredients:
         return 0
 
-    return round(sum(
-        ing_rec.ingredient.calculer_prix(ing_rec.quantite)
-        for ing_rec in recette.ingredients
-    ), 2)
+    total = 0.0
+    for ing_rec in recette.ingredients:
+        total += prix_ligne(ing_rec.quantite, *ing_rec.ingredient.parametres_prix())
+    return arrondi(total)
+
+def _formater_pieces(quantite: float, unite: str) -> str:
+    # Afficher les pièces en entier ou demi
+    entier = int(quantite)
+    if quantite == entier:
+        return f"{entier} {'pièce' if entier == 1 else 'pièces'}"
+    return f"{quantite:.1f} pièces"
+
+
+def _formater_metrique(unite_base: str, unite_mille: str):
+    """Formateur g/kg ou ml/L : conversion au-delà de 1000 unités."""
+    def formater(quantite: float, unite: str) -> str:
+        if quantite >= 1000:
+            return f"{quantite / 1000:.2f}{unite_mille}"
+        entier = int(quantite)
+        if quantite == entier:
+            return f"{entier}{unite_base}"
+        return f"{quantite:.1f}{unite_base}"
+    return formater
+
+
+def _formater_autre(quantite: float, unite: str) -> str:
+    # Unité inconnue
+    return f"{quantite} {unite}"
+
+
+_FORMATEURS_QUANTITE = {
+    'pièce': _formater_pieces,
+    'g': _formater_metrique('g', 'kg'),
+    'ml': _formater_metrique('ml', 'L'),
+}
+
 
 def formater_quantite(quantite: float, ingredient) -> str:
     """
@@ -120,35 +200,18 @@ def formater_quantite(quantite: float, ingredient) -> str:
         return "0"
     
     unite = ingredient.unite if ingredient else 'g'
-    
-    if unite == 'pièce':
-        # Afficher les pièces en entier ou demi
-        if quantite == int(quantite):
-            return f"{int(quantite)} {'pièce' if quantite == 1 else 'pièces'}"
-        else:
-            return f"{quantite:.1f} pièces"
-    
-    elif unite == 'g':
-        # Convertir en kg si > 1000g
-        if quantite >= 1000:
-            return f"{quantite / 1000:.2f}kg"
-        elif quantite == int(quantite):
-            return f"{int(quantite)}g"
-        else:
-            return f"{quantite:.1f}g"
-    
-    elif unite == 'ml':
-        # Convertir en L si > 1000ml
-        if quantite >= 1000:
-            return f"{quantite / 1000:.2f}L"
-        elif quantite == int(quantite):
-            return f"{int(quantite)}ml"
-        else:
-            return f"{quantite:.1f}ml"
-    
-    else:
-        # Unité inconnue
-        return f"{quantite} {unite}"
+    return _FORMATEURS_QUANTITE.get(unite, _formater_autre)(quantite, unite)
+
+
+# Prix stocké en €/g (ou €/ml) : formateurs par (unité, poids de pièce connu)
+_FORMATS_PRIX = {
+    # Pour les pièces, reconvertir en €/pièce en multipliant par poids_piece
+    ('pièce', True): lambda prix, poids: f"{prix * poids:.2f}€/pièce",
+    # Sans poids_piece (cas anormal), prix brut
+    ('pièce', False): lambda prix, poids: f"{prix:.2f}€/pièce",
+    ('g', False): lambda prix, poids: f"{prix * 1000:.2f}€/kg",
+    ('ml', False): lambda prix, poids: f"{prix * 1000:.2f}€/L",
+}
 
 
 def formater_prix_unitaire(ingredient) -> str:
@@ -173,36 +236,17 @@ def formater_prix_unitaire(ingredient) -> str:
         return "Prix non renseigné"
     
     prix = ingredient.prix_unitaire
-    unite = ingredient.unite
-    poids_piece = getattr(ingredient, 'poids_piece', None)
-    
     if not prix or prix <= 0:
         return "Prix non renseigné"
     
-    if unite == 'pièce':
-        # ✅ CORRIGÉ : Pour les pièces, le prix est stocké en €/g
-        # On doit reconvertir en €/pièce en multipliant par poids_piece
-        if poids_piece and poids_piece > 0:
-            prix_piece = prix * poids_piece
-            return f"{prix_piece:.2f}€/pièce"
-        else:
-            # Si pas de poids_piece, on affiche le prix brut avec une note
-            # (cas anormal mais on gère)
-            return f"{prix:.2f}€/pièce"
-    
-    elif unite == 'g':
-        # Pour les grammes, convertir en €/kg pour l'affichage
-        prix_kg = prix * 1000
-        return f"{prix_kg:.2f}€/kg"
-    
-    elif unite == 'ml':
-        # Pour les millilitres, convertir en €/L pour l'affichage
-        prix_l = prix * 1000
-        return f"{prix_l:.2f}€/L"
-    
-    else:
+    unite = ingredient.unite
+    poids_piece = ingredient.poids_piece or 0
+    # Le poids ne compte que pour les pièces
+    formateur = _FORMATS_PRIX.get((unite, unite == 'pièce' and poids_piece > 0))
+    if formateur is None:
         # Unité inconnue, afficher tel quel
         return f"{prix:.4f}€/{unite}"
+    return formateur(prix, poids_piece)
 
 
 def calculer_prix_affichage_piece(ingredient) -> float:
@@ -223,7 +267,7 @@ def calculer_prix_affichage_piece(ingredient) -> float:
     if ingredient.unite != 'pièce':
         return ingredient.prix_unitaire
     
-    poids_piece = getattr(ingredient, 'poids_piece', None)
+    poids_piece = ingredient.poids_piece
     if poids_piece and poids_piece > 0:
         return ingredient.prix_unitaire * poids_piece
     
@@ -264,7 +308,7 @@ def get_prix_unitaire_affichage(ingredient) -> tuple:
     
     prix = ingredient.prix_unitaire
     unite = ingredient.unite
-    poids_piece = getattr(ingredient, 'poids_piece', None)
+    poids_piece = ingredient.poids_piece
     
     if unite == 'pièce':
         if poids_piece and poids_piece > 0:
@@ -15,7 +15,24 @@ Le problème était que la quantité_a_ajouter était correcte mais le calcul
 du coût pouvait créer des confusions d'affichage.
 """
 
-from models.models import db, Recette, IngredientRecette, StockFrigo, ListeCourses
+from sqlalchemy import bindparam, case, delete, insert, select, update
+from sqlalchemy.orm import lazyload, load_only, selectinload
+from models.models import db, prix_ligne, Recette, IngredientRecette, StockFrigo, ListeCourses
+
+
+def _charger_recette(recette_id: int):
+    """
+    Charge une recette avec ses ingrédients et ceux de ses sous-recettes directes.
+
+    Évite une requête par ligne (ing_rec.ingredient) et par sous-recette
+    lors du parcours de _get_tous_ingredients().
+    """
+    return db.session.get(Recette, recette_id, options=[
+        selectinload(Recette.ingredients).joinedload(IngredientRecette.ingredient),
+        selectinload(Recette.sous_recettes)
+        .selectinload(Recette.ingredients)
+        .joinedload(IngredientRecette.ingredient),
+    ])
 
 
 def _get_tous_ingredients(recette: Recette, visited: set = None) -> list:
@@ -32,7 +49,92 @@ def _get_tous_ingredients(recette: Recette, visited: set = None) -> list:
     return result
 
 
-def ajouter_ingredients_manquants_courses(recette_id: int) -> dict:
+# Requêtes de chargement par lot, construites une fois au chargement du module
+# (liste d'ids passée en paramètre « expanding » : IN (...) de taille variable)
+_IDS = bindparam('ids', expanding=True)
+
+_SELECT_QUANTITES_STOCK = select(StockFrigo.ingredient_id, StockFrigo.quantite) \
+    .where(StockFrigo.ingredient_id.in_(_IDS))
+
+# Seules les colonnes utiles aux calculs de quantités sont chargées ;
+# l'ingrédient (chargé en jointure par défaut pour le stock) ne l'est pas
+_SELECT_STOCKS = select(StockFrigo) \
+    .where(StockFrigo.ingredient_id.in_(_IDS)) \
+    .options(load_only(StockFrigo.ingredient_id, StockFrigo.quantite),
+             lazyload(StockFrigo.ingredient))
+
+_SELECT_COURSES_NON_ACHETEES = select(ListeCourses) \
+    .where(ListeCourses.ingredient_id.in_(_IDS), ListeCourses.achete == False) \
+    .options(load_only(ListeCourses.ingredient_id, ListeCourses.quantite)) \
+    .order_by(ListeCourses.id)
+
+
+def charger_stock_map(ingredient_ids) -> dict:
+    """
+    Charge en une requête les quantités en stock d'un ensemble d'ingrédients.
+
+    Returns:
+        Dict {ingredient_id: quantite}
+    """
+    if not ingredient_ids:
+        return {}
+    return dict(db.session.execute(_SELECT_QUANTITES_STOCK, {'ids': list(ingredient_ids)}).all())
+
+
+def charger_stocks(ingredient_ids) -> dict:
+    """
+    Charge en une requête les lignes de stock d'un ensemble d'ingrédients.
+
+    Returns:
+        Dict {ingredient_id: StockFrigo}
+    """
+    if not ingredient_ids:
+        return {}
+    stocks = db.session.scalars(_SELECT_STOCKS, {'ids': list(ingredient_ids)})
+    return {stock.ingredient_id: stock for stock in stocks}
+
+
+def charger_courses_map(ingredient_ids) -> dict:
+    """
+    Charge en une requête les items non achetés de la liste de courses
+    pour un ensemble d'ingrédients.
+
+    Returns:
+        Dict {ingredient_id: ListeCourses}
+    """
+    if not ingredient_ids:
+        return {}
+    courses_map = {}
+    courses = db.session.scalars(_SELECT_COURSES_NON_ACHETEES, {'ids': list(ingredient_ids)})
+    for course in courses:
+        courses_map.setdefault(course.ingredient_id, course)
+    return courses_map
+
+
+def _appliquer_quantites(modele, quantites: dict) -> None:
+    """
+    Écrit les nouvelles quantités {id: quantite} d'un modèle (StockFrigo,
+    ListeCourses) en deux instructions : un DELETE des lignes tombées à zéro
+    et un UPDATE ... CASE pour les autres, au lieu d'une instruction par ligne.
+
+    Les listeners d'ORM ne sont pas appelés (voir l'appelant).
+    """
+    a_supprimer = [id_ for id_, quantite in quantites.items() if quantite <= 0]
+    a_modifier = {id_: quantite for id_, quantite in quantites.items() if quantite > 0}
+
+    if a_supprimer:
+        db.session.execute(delete(modele).where(modele.id.in_(a_supprimer)))
+    if a_modifier:
+        db.session.execute(
+            update(modele)
+            .where(modele.id.in_(a_modifier))
+            .values(quantite=case(a_modifier, value=modele.id)),
+            execution_options={'synchronize_session': 'fetch'}
+        )
+
+
+def ajouter_ingredients_manquants_courses(recette_id: int, stock_map: dict = None,
+                                          courses_map: dict = None) -> dict:
     """
     Ajoute les ingrédients manquants d'une recette à la liste de courses.
     
@@ -49,6 +151,11 @@ def ajouter_ingredients_manquants_courses(recette_id: int) -> dict:
     
     Args:
         recette_id: L'ID de la recette à planifier
+        stock_map: {ingredient_id: quantite} préchargé (voir charger_stock_map)
+        courses_map: {ingredient_id: ListeCourses} préchargé
+                     (voir charger_courses_map) ; les nouveaux items sont
+                     insérés en une instruction en fin d'appel et n'y
+                     sont pas ajoutés
     
     Returns:
         dict avec les clés:
@@ -56,7 +163,7 @@ def ajouter_ingredients_manquants_courses(recette_id: int) -> dict:
             - maj: Nombre d'ingrédients dont la quantité a été augmentée
             - cout_total: Coût estimé des ingrédients ajoutés
     """
-    recette = Recette.query.get(recette_id)
+    recette = _charger_recette(recette_id)
     if not recette:
         return {'ajoutes': 0, 'maj': 0, 'cout_total': 0}
     
@@ -64,13 +171,28 @@ def ajouter_ingredients_manquants_courses(recette_id: int) -> dict:
     maj = 0
     cout_total = 0.0
 
-    for ing_rec in _get_tous_ingredients(recette):
+    tous_ingredients = _get_tous_ingredients(recette)
+
+    # Paramètres de prix extraits une fois par ingrédient (voir prix_ligne)
+    parametres_prix = {
+        ing_rec.ingredient_id: ing_rec.ingredient.parametres_prix()
+        for ing_rec in tous_ingredients
+    }
+
+    # Stock et courses chargés en 2 requêtes au lieu de 2 par ingrédient
+    ingredient_ids = parametres_prix.keys()
+    if stock_map is None:
+        stock_map = charger_stock_map(ingredient_ids)
+    if courses_map is None:
+        courses_map = charger_courses_map(ingredient_ids)
+    nouvelles_courses = {}  # {ingredient_id: ligne à insérer}
+
+    for ing_rec in tous_ingredients:
         ingredient_id = ing_rec.ingredient_id
         quantite_requise = ing_rec.quantite  # Quantité en unité native
         
         # Vérifier le stock disponible dans le frigo
-        stock = StockFrigo.query.filter_by(ingredient_id=ingredient_id).first()
-        quantite_disponible = stock.quantite if stock else 0
+        quantite_disponible = stock_map.get(ingredient_id, 0)
         
         # Calculer la quantité manquante
         # ✅ C'est ici que le calcul est crucial : on compare des unités natives
@@ -78,26 +200,32 @@ def ajouter_ingredients_manquants_courses(recette_id: int) -> dict:
         
         if quantite_manquante > 0:
             # L'ingrédient est-il déjà dans la liste de courses (non acheté) ?
-            course_existante = ListeCourses.query.filter_by(
-                ingredient_id=ingredient_id,
-                achete=False
-            ).first()
+            course_existante = courses_map.get(ingredient_id)
+            
+            nouvelle_course = nouvelles_courses.get(ingredient_id)
             
             if course_existante:
                 # Augmenter la quantité existante
                 course_existante.quantite += quantite_manquante
                 maj += 1
+            elif nouvelle_course:
+                # Ingrédient déjà ajouté par une autre ligne de la recette
+                nouvelle_course['quantite'] += quantite_manquante
+                maj += 1
             else:
                 # Ajouter un nouvel item à la liste de courses
-                nouvelle_course = ListeCourses(
-                    ingredient_id=ingredient_id,
-                    quantite=quantite_manquante,  # ✅ Quantité en unité native
-                    achete=False
-                )
-                db.session.add(nouvelle_course)
+                nouvelles_courses[ingredient_id] = {
+                    'ingredient_id': ingredient_id,
+                    'quantite': quantite_manquante,  # ✅ Quantité en unité native
+                    'achete': False
+                }
                 ajoutes += 1
             
-            cout_total += ing_rec.ingredient.calculer_prix(quantite_manquante)
+            cout_total += prix_ligne(quantite_manquante, *parametres_prix[ingredient_id])
+    
+    if nouvelles_courses:
+        # Un seul INSERT multi-lignes, sans passer par l'unité de travail
+        db.session.execute(insert(ListeCourses), list(nouvelles_courses.values()))
     
     return {
         'ajoutes': ajoutes,
@@ -120,34 +248,40 @@ def retirer_ingredients_courses(recette_id: int) -> dict:
             - supprimes: Nombre d'items complètement supprimés
             - reduits: Nombre d'items dont la quantité a été réduite
     """
-    recette = Recette.query.get(recette_id)
+    recette = _charger_recette(recette_id)
     if not recette:
         return {'supprimes': 0, 'reduits': 0}
     
     supprimes = 0
     reduits = 0
 
-    for ing_rec in _get_tous_ingredients(recette):
+    tous_ingredients = _get_tous_ingredients(recette)
+    # Items de courses chargés en une requête au lieu d'une par ingrédient
+    courses_map = charger_courses_map({ing_rec.ingredient_id for ing_rec in tous_ingredients})
+    restantes = {}  # {course.id: quantité restante}
+
+    for ing_rec in tous_ingredients:
         ingredient_id = ing_rec.ingredient_id
         quantite_recette = ing_rec.quantite
         
         # Chercher l'ingrédient dans la liste de courses (non acheté)
-        course = ListeCourses.query.filter_by(
-            ingredient_id=ingredient_id,
-            achete=False
-        ).first()
+        course = courses_map.get(ingredient_id)
         
         if course:
+            quantite = restantes.get(course.id, course.quantite)
             # Réduire la quantité ou supprimer
-            if course.quantite <= quantite_recette:
+            if quantite <= quantite_recette:
                 # Supprimer complètement
-                db.session.delete(course)
+                restantes[course.id] = 0
+                del courses_map[ingredient_id]
                 supprimes += 1
             else:
                 # Réduire la quantité
-                course.quantite -= quantite_recette
+                restantes[course.id] = quantite - quantite_recette
                 reduits += 1
     
+    _appliquer_quantites(ListeCourses, restantes)
+    
     return {
         'supprimes': supprimes,
         'reduits': reduits
@@ -166,26 +300,32 @@ def deduire_ingredients_frigo(recette_id: int) -> int:
     Returns:
         int: Nombre d'ingrédients déduits du stock
     """
-    recette = Recette.query.get(recette_id)
+    recette = _charger_recette(recette_id)
     if not recette:
         return 0
     
     nb_deduits = 0
 
-    for ing_rec in _get_tous_ingredients(recette):
+    tous_ingredients = _get_tous_ingredients(recette)
+    # Stocks chargés en une requête au lieu d'une par ingrédient
+    stocks = charger_stocks({ing_rec.ingredient_id for ing_rec in tous_ingredients})
+    restantes = {}  # {stock.id: quantité restante}
+
+    for ing_rec in tous_ingredients:
         ingredient_id = ing_rec.ingredient_id
         quantite_a_deduire = ing_rec.quantite
         
         # Récupérer le stock
-        stock = StockFrigo.query.filter_by(ingredient_id=ingredient_id).first()
+        stock = stocks.get(ingredient_id)
+        quantite = restantes.get(stock.id, stock.quantite) if stock else 0
         
-        if stock and stock.quantite > 0:
-            # Déduire la quantité (ne pas aller en négatif)
-            stock.quantite = max(0, stock.quantite - quantite_a_deduire)
+        if quantite > 0:
+            # Déduire la quantité (ne pas aller en négatif) ;
+            # le stock tombé à zéro est supprimé
+            restantes[stock.id] = max(0, quantite - quantite_a_deduire)
             nb_deduits += 1
-            
-            # Supprimer le stock s'il est à zéro
-            if stock.quantite == 0:
-                db.session.delete(stock)
+    
+    if restantes:
+        _appliquer_quantites(StockFrigo, restantes)
     
     return nb_deduits
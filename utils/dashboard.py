@@ -7,17 +7,25 @@ du tableau de bord de la page d'accueil.
 
 ✅ NOUVEAU : Créé pour le Dashboard Dynamique
 """
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func, desc
-from sqlalchemy.orm import joinedload
+from flask import current_app
+from sqlalchemy import func, desc, case, select
+from sqlalchemy.orm import joinedload, load_only
 
-from models.models import (
-    db, Ingredient, StockFrigo, Recette, RecettePlanifiee, 
-    ListeCourses, IngredientRecette
-)
+from models.models import db, Ingredient, StockFrigo, Recette, RecettePlanifiee
 from utils.saisons import get_saison_actuelle
+from utils.calculs import calculer_budget_courses_sql
+from utils.cache import cle_versionnee, get_ou_calculer
+from utils.queries import compter_recettes
+
+
+# Borne la durée de vie des statistiques pour les écritures faites hors ORM
+DASHBOARD_CACHE_TTL = 60
 
 
 # ============================================
@@ -98,23 +106,23 @@ def calculer_stats_frigo() -> StatsFrigo:
     Retour:
         StatsFrigo avec nb_items, valeur_totale, categories
     """
-    stocks = StockFrigo.query.options(
-        joinedload(StockFrigo.ingredient)
-    ).all()
-
-    valeur_totale = sum(
-        stock.ingredient.calculer_prix(stock.quantite)
-        for stock in stocks
-    )
-
-    categories = {}
-    for stock in stocks:
-        cat = stock.ingredient.categorie or 'Autres'
-        categories[cat] = categories.get(cat, 0) + 1
+    # Comptage et valeur par catégorie en une agrégation SQL : seules
+    # quelques lignes (une par catégorie) remontent côté Python.
+    categorie = func.coalesce(func.nullif(Ingredient.categorie, ''), 'Autres')
+    lignes = db.session.query(
+        categorie,
+        func.count(StockFrigo.id),
+        func.sum(Ingredient.expression_prix(StockFrigo.quantite))
+    ).select_from(StockFrigo) \
+        .join(Ingredient, Ingredient.id == StockFrigo.ingredient_id) \
+        .group_by(categorie) \
+        .all()
+
+    categories = {cat: nb for cat, nb, _ in lignes}
 
     return StatsFrigo(
-        nb_items=len(stocks),
-        valeur_totale=round(valeur_totale, 2),
+        nb_items=sum(categories.values()),
+        valeur_totale=round(sum(valeur or 0.0 for _, _, valeur in lignes), 2),
         categories=categories
     )
 
@@ -126,47 +134,38 @@ def calculer_stats_courses() -> StatsCourses:
     Retour:
         StatsCourses avec nb_items et cout_estime
     """
-    items = ListeCourses.query.options(
-        joinedload(ListeCourses.ingredient)
-    ).filter_by(achete=False).all()
-
-    cout_estime = sum(
-        item.ingredient.calculer_prix(item.quantite)
-        for item in items
-        if item.ingredient
-    )
+    budget = calculer_budget_courses_sql()
 
     return StatsCourses(
-        nb_items=len(items),
-        cout_estime=round(cout_estime, 2)
+        nb_items=budget.items_avec_prix + budget.items_sans_prix,
+        cout_estime=budget.total_estime
     )
 
 
-def calculer_stats_recettes() -> StatsRecettes:
+def calculer_stats_recettes(disponibilites: Optional[Dict] = None) -> StatsRecettes:
     """
     Calcule les statistiques des recettes.
     
+    Args:
+        disponibilites: Résultat de Recette.disponibilite_multi() déjà
+                        calculé dans la requête (None = le calculer)
+    
     Returns:
         StatsRecettes avec nb_total, nb_realisables, nb_planifiees
     """
-    # Nombre total de recettes
-    nb_total = Recette.query.count()
-    
-    # Nombre de recettes planifiées (non préparées)
-    nb_planifiees = RecettePlanifiee.query.filter_by(preparee=False).count()
+    # Nombre total de recettes et de recettes planifiées (non préparées)
+    # en un SELECT ; non mémorisé : les statistiques ont leur propre cache
+    compteurs = compter_recettes()
+    nb_total, nb_planifiees = compteurs['total'], compteurs['planifiees']
     
-    # Nombre de recettes réalisables avec le stock actuel
-    # On charge les recettes avec leurs ingrédients
-    recettes = Recette.query.options(
-        joinedload(Recette.ingredients).joinedload(IngredientRecette.ingredient)
-    ).all()
-    
-    nb_realisables = 0
-    for recette in recettes:
-        if recette.ingredients:
-            disponibilite = recette.calculer_disponibilite_ingredients()
-            if disponibilite['realisable']:
-                nb_realisables += 1
+    # Nombre de recettes réalisables avec le stock actuel, sous-recettes
+    # incluses, sans charger les recettes (une agrégation SQL)
+    if disponibilites is None:
+        disponibilites = Recette.disponibilite_multi()
+    nb_realisables = sum(
+        1 for nb_ingredients, nb_disponibles in disponibilites.values()
+        if nb_disponibles == nb_ingredients
+    )
     
     return StatsRecettes(
         nb_total=nb_total,
@@ -187,31 +186,24 @@ def calculer_stats_activite() -> StatsActivite:
     debut_semaine = debut_semaine.replace(hour=0, minute=0, second=0, microsecond=0)
     debut_mois = maintenant.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
-    # Recettes préparées cette semaine
-    recettes_semaine_query = RecettePlanifiee.query.filter(
-        RecettePlanifiee.preparee == True,
-        RecettePlanifiee.date_preparation >= debut_semaine
-    ).options(
-        joinedload(RecettePlanifiee.recette_ref).joinedload(Recette.ingredients)
-    ).all()
-    
-    recettes_semaine = len(recettes_semaine_query)
-    cout_semaine = sum(
-        r.recette_ref.calculer_cout() for r in recettes_semaine_query
-    )
-    
-    # Recettes préparées ce mois
-    recettes_mois_query = RecettePlanifiee.query.filter(
-        RecettePlanifiee.preparee == True,
-        RecettePlanifiee.date_preparation >= debut_mois
-    ).options(
-        joinedload(RecettePlanifiee.recette_ref).joinedload(Recette.ingredients)
-    ).all()
-    
-    recettes_mois = len(recettes_mois_query)
-    cout_mois = sum(
-        r.recette_ref.calculer_cout() for r in recettes_mois_query
-    )
+    # Compteurs et coûts (colonne précalculée Recette.cout_cache) de la
+    # semaine et du mois en une seule agrégation. La semaine peut commencer
+    # le mois précédent : les deux périodes sont filtrées par CASE.
+    date_prep = RecettePlanifiee.date_preparation
+    dans_semaine = date_prep >= debut_semaine
+    dans_mois = date_prep >= debut_mois
+    cout = func.coalesce(Recette.cout_cache, 0.0)
+
+    stats = db.session.query(
+        func.count(case((dans_semaine, 1))).label('recettes_semaine'),
+        func.count(case((dans_mois, 1))).label('recettes_mois'),
+        func.coalesce(func.sum(case((dans_semaine, cout), else_=0.0)), 0.0).label('cout_semaine'),
+        func.coalesce(func.sum(case((dans_mois, cout), else_=0.0)), 0.0).label('cout_mois')
+    ).select_from(RecettePlanifiee) \
+        .join(Recette, Recette.id == RecettePlanifiee.recette_id) \
+        .filter(RecettePlanifiee.preparee == True,
+                date_prep >= min(debut_semaine, debut_mois)) \
+        .one()
     
     # Dernière recette préparée
     derniere = RecettePlanifiee.query.filter_by(preparee=True).options(
@@ -219,10 +211,10 @@ def calculer_stats_activite() -> StatsActivite:
     ).order_by(desc(RecettePlanifiee.date_preparation)).first()
     
     return StatsActivite(
-        recettes_semaine=recettes_semaine,
-        recettes_mois=recettes_mois,
-        cout_semaine=round(cout_semaine, 2),
-        cout_mois=round(cout_mois, 2),
+        recettes_semaine=stats.recettes_semaine,
+        recettes_mois=stats.recettes_mois,
+        cout_semaine=round(stats.cout_semaine, 2),
+        cout_mois=round(stats.cout_mois, 2),
         derniere_recette=derniere
     )
 
@@ -245,97 +237,95 @@ def detecter_alertes_stock(seuils_defaut: Dict[str, float] = None) -> List[Alert
             'pièce': 2     # Alerter si < 2 pièces
         }
     
-    stocks = StockFrigo.query.options(
-        joinedload(StockFrigo.ingredient)
-    ).all()
+    # Seuil, filtre, tri et limite en SQL : seules les 5 alertes
+    # les plus urgentes sont chargées
+    seuil = case(seuils_defaut, value=Ingredient.unite, else_=100)
+    pourcentage = StockFrigo.quantite * 100.0 / seuil
+
+    lignes = db.session.query(Ingredient, StockFrigo.quantite, seuil, pourcentage) \
+        .join(StockFrigo, StockFrigo.ingredient_id == Ingredient.id) \
+        .filter(StockFrigo.quantite > 0, StockFrigo.quantite < seuil) \
+        .order_by(pourcentage, Ingredient.id) \
+        .limit(5) \
+        .all()
     
-    alertes = []
-    
-    for stock in stocks:
-        ing = stock.ingredient
-        seuil = seuils_defaut.get(ing.unite, 100)
-        
-        if stock.quantite < seuil and stock.quantite > 0:
-            pourcentage = (stock.quantite / seuil) * 100 if seuil > 0 else 0
-            
-            alertes.append(AlerteStock(
-                ingredient=ing,
-                quantite_actuelle=stock.quantite,
-                seuil_alerte=seuil,
-                unite=ing.unite,
-                pourcentage_restant=round(pourcentage, 1)
-            ))
-    
-    # Trier par pourcentage restant (plus bas = plus urgent)
-    alertes.sort(key=lambda a: a.pourcentage_restant)
-    
-    return alertes[:5]  # Retourner les 5 plus urgentes
-
-
-def get_suggestions_recettes(limite: int = 3) -> List[RecetteRecommandee]:
+    return [
+        AlerteStock(
+            ingredient=ing,
+            quantite_actuelle=quantite,
+            seuil_alerte=seuil_alerte,
+            unite=ing.unite,
+            pourcentage_restant=round(pourcentage_restant, 1)
+        )
+        for ing, quantite, seuil_alerte, pourcentage_restant in lignes
+    ]
+
+
+def get_suggestions_recettes(limite: int = 3,
+                             disponibilites: Optional[Dict] = None) -> List[RecetteRecommandee]:
     """
     Suggère des recettes basées sur le stock actuel et la saison.
     
     Args:
         limite: Nombre max de suggestions
+        disponibilites: Résultat de Recette.disponibilite_multi() déjà
+                        calculé dans la requête (None = le calculer)
     
     Returns:
         Liste de RecetteRecommandee triée par pertinence
     """
     saison_actuelle = get_saison_actuelle()
     
-    # Charger toutes les recettes avec leurs ingrédients
-    recettes = Recette.query.options(
-        joinedload(Recette.ingredients).joinedload(IngredientRecette.ingredient)
-    ).all()
-    
     # Récupérer l'historique récent pour éviter les répétitions
-    historique_recent = set()
-    recettes_recentes = RecettePlanifiee.query.filter(
-        RecettePlanifiee.preparee == True,
-        RecettePlanifiee.date_preparation >= datetime.utcnow() - timedelta(days=14)
-    ).all()
-    for rp in recettes_recentes:
-        historique_recent.add(rp.recette_id)
+    historique_recent = set(db.session.scalars(
+        select(RecettePlanifiee.recette_id).distinct().where(
+            RecettePlanifiee.preparee == True,
+            RecettePlanifiee.date_preparation >= datetime.utcnow() - timedelta(days=14)
+        )
+    ))
     
-    suggestions = []
+    # Disponibilité de toutes les recettes (sous-recettes incluses) en une requête
+    if disponibilites is None:
+        disponibilites = Recette.disponibilite_multi()
     
-    for recette in recettes:
-        if not recette.ingredients:
-            continue
-        
+    # Saisonnalité de toutes les recettes ayant des ingrédients directs :
+    # le classement se fait sur ces seuls nombres, sans charger les recettes
+    scores_saison = Recette.scores_saisonniers_multi(saison_actuelle)
+    
+    candidats = []
+    for recette_id, (nb_directs, nb_de_saison) in scores_saison.items():
         # Calculer la disponibilité
-        disponibilite = recette.calculer_disponibilite_ingredients()
-        score_dispo = disponibilite['pourcentage_disponibilite']
-        nb_manquants = len(disponibilite['ingredients_manquants'])
-        
-        # Calculer le score saisonnier
-        score_saison = recette.calculer_score_saisonnier()
-        est_de_saison = score_saison['score'] >= 70
-        
-        # Calculer le coût
-        cout = recette.calculer_cout()
+        nb_ingredients, nb_disponibles = disponibilites[recette_id]
+        score_dispo = round(nb_disponibles / nb_ingredients * 100, 1)
         
         # Pénaliser les recettes récemment préparées
-        if recette.id in historique_recent:
+        if recette_id in historique_recent:
             score_dispo *= 0.5  # Réduire le score de moitié
         
+        est_de_saison = round(nb_de_saison / nb_directs * 100, 1) >= 70
+        candidats.append((score_dispo, est_de_saison, nb_ingredients - nb_disponibles, recette_id))
+    
+    # Meilleurs scores de disponibilité, puis de saison (à égalité, ordre
+    # des identifiants) : sélection partielle plutôt qu'un tri complet
+    candidats = heapq.nsmallest(limite, candidats, key=lambda c: (-c[0], not c[1], c[2], c[3]))
+    
+    # Seules les recettes retenues sont chargées
+    ids = [recette_id for *_, recette_id in candidats]
+    recettes = {r.id: r for r in Recette.query.filter(Recette.id.in_(ids))} if ids else {}
+    
+    suggestions = []
+    for score_dispo, est_de_saison, nb_manquants, recette_id in candidats:
+        recette = recettes[recette_id]
         suggestions.append(RecetteRecommandee(
             recette=recette,
             score_disponibilite=score_dispo,
             nb_ingredients_manquants=nb_manquants,
-            cout_estime=cout,
+            cout_estime=recette.calculer_cout(),
             est_de_saison=est_de_saison,
             temps_preparation=recette.temps_preparation
         ))
     
-    # Trier par score de disponibilité décroissant, puis par saison
-    suggestions.sort(
-        key=lambda s: (s.score_disponibilite, s.est_de_saison, -s.nb_ingredients_manquants),
-        reverse=True
-    )
-    
-    return suggestions[:limite]
+    return suggestions
 
 
 def get_recettes_planifiees_a_venir() -> List[RecettePlanifiee]:
@@ -345,8 +335,11 @@ def get_recettes_planifiees_a_venir() -> List[RecettePlanifiee]:
     Returns:
         Liste des recettes planifiées
     """
+    # Seules les colonnes affichées par le dashboard sont chargées
     return RecettePlanifiee.query.filter_by(preparee=False).options(
-        joinedload(RecettePlanifiee.recette_ref)
+        load_only(RecettePlanifiee.id, RecettePlanifiee.recette_id,
+                  RecettePlanifiee.date_planification),
+        joinedload(RecettePlanifiee.recette_ref).load_only(Recette.id, Recette.nom)
     ).order_by(RecettePlanifiee.date_planification).limit(5).all()
 
 
@@ -354,6 +347,44 @@ def get_recettes_planifiees_a_venir() -> List[RecettePlanifiee]:
 # FONCTION PRINCIPALE
 # ============================================
 
+def _parallelisable() -> bool:
+    """
+    Indique si les statistiques peuvent être calculées en parallèle.
+
+    SQLite sérialise les accès au fichier (et une base ':memory:' n'est
+    pas partagée entre connexions) : le calcul reste alors séquentiel.
+    """
+    return db.engine.dialect.name != 'sqlite'
+
+
+def _calculer_en_parallele(*fonctions) -> list:
+    """
+    Exécute des fonctions de statistiques indépendantes, en parallèle
+    quand la base le permet.
+
+    Chaque thread ouvre son propre contexte d'application, donc sa propre
+    session et sa propre connexion. Les fonctions ne doivent renvoyer
+    aucun objet ORM : leur session est fermée à la sortie du thread.
+
+    Args:
+        *fonctions: Fonctions sans argument
+
+    Returns:
+        Liste des résultats, dans l'ordre des fonctions
+    """
+    if len(fonctions) < 2 or not _parallelisable():
+        return [fonction() for fonction in fonctions]
+
+    app = current_app._get_current_object()
+
+    def executer(fonction):
+        with app.app_context():
+            return fonction()
+
+    with ThreadPoolExecutor(max_workers=len(fonctions), thread_name_prefix='dashboard') as executor:
+        return list(executor.map(executer, fonctions))
+
+
 def get_dashboard_data() -> DashboardData:
     """
     Récupère toutes les données nécessaires au dashboard.
@@ -364,13 +395,31 @@ def get_dashboard_data() -> DashboardData:
     Returns:
         DashboardData contenant toutes les statistiques
     """
+    # Disponibilité des recettes : une seule agrégation partagée par les
+    # suggestions et (hors cache) les statistiques des recettes
+    disponibilites = Recette.disponibilite_multi()
+
+    # Statistiques purement numériques : calculables dans d'autres threads
+    # et mises en cache jusqu'à la prochaine modification des tables sources.
+    # Les fonctions renvoyant des objets ORM restent sur la session courante.
+    cle = cle_versionnee('dashboard:stats', 'stock', 'ingredients', 'courses',
+                         'recettes', 'planifications')
+    stats_frigo, stats_courses, stats_recettes = get_ou_calculer(
+        cle,
+        lambda: tuple(_calculer_en_parallele(
+            calculer_stats_frigo, calculer_stats_courses,
+            partial(calculer_stats_recettes, disponibilites)
+        )),
+        timeout=DASHBOARD_CACHE_TTL
+    )
+
     return DashboardData(
-        stats_frigo=calculer_stats_frigo(),
-        stats_courses=calculer_stats_courses(),
-        stats_recettes=calculer_stats_recettes(),
+        stats_frigo=stats_frigo,
+        stats_courses=stats_courses,
+        stats_recettes=stats_recettes,
         stats_activite=calculer_stats_activite(),
         alertes_stock=detecter_alertes_stock(),
-        suggestions_recettes=get_suggestions_recettes(limite=3),
+        suggestions_recettes=get_suggestions_recettes(limite=3, disponibilites=disponibilites),
         saison_actuelle=get_saison_actuelle(),
         date_mise_a_jour=datetime.utcnow()
     )
@@ -1,7 +1,7 @@
 from contextlib import contextmanager
 from functools import wraps
 from flask import flash, current_app
-from sqlalchemy import func
+from sqlalchemy import func, and_, or_, text
 from models.models import db
 import logging
 
@@ -54,50 +54,6 @@ def db_transaction_with_flash(success_message=None, error_message=None):
         raise
 
 
-@contextmanager
-def db_transaction_with_retry(max_retries=3, success_message=None):
-    """
-    Context manager avec système de retry automatique.
-
-    Args:
-        max_retries: Nombre maximum de tentatives
-        success_message: Message de succès (optionnel)
-    """
-    from sqlalchemy.exc import OperationalError, IntegrityError
-    import time
-
-    last_exception = None
-
-    for attempt in range(max_retries):
-        try:
-            yield db.session
-            db.session.commit()
-
-            if success_message:
-                flash(success_message, 'success')
-
-            logger.debug(f"Transaction réussie (tentative {attempt + 1}/{max_retries})")
-            return
-
-        except (OperationalError, IntegrityError) as e:
-            db.session.rollback()
-            last_exception = e
-
-            logger.warning(f"Tentative {attempt + 1}/{max_retries} échouée : {e}")
-
-            if attempt < max_retries - 1:
-                time.sleep(0.1 * (attempt + 1))
-            else:
-                flash(f"Erreur après {max_retries} tentatives", 'danger')
-                raise last_exception
-
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Erreur non-récupérable : {e}")
-            flash(f"Erreur : {str(e)}", 'danger')
-            raise
-
-
 def with_db_transaction(success_message=None, error_message=None):
     """
     Décorateur pour entourer une route d'une transaction automatique.
@@ -132,6 +88,56 @@ def with_db_transaction(success_message=None, error_message=None):
     return decorator
 
 
+def with_db_retry(max_retries=3, success_message=None):
+    """
+    Décorateur de transaction avec retry automatique.
+
+    La fonction décorée est ré-exécutée à chaque tentative : un context
+    manager ne peut pas rejouer le corps de son bloc with.
+
+    Args:
+        max_retries: Nombre maximum de tentatives
+        success_message: Message de succès (optionnel)
+    """
+    from sqlalchemy.exc import OperationalError, IntegrityError
+    import random
+    import time
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_retries):
+                try:
+                    result = func(*args, **kwargs)
+                    db.session.commit()
+
+                    if success_message:
+                        flash(success_message, 'success')
+
+                    logger.debug(f"Transaction de {func.__name__} réussie (tentative {attempt + 1}/{max_retries})")
+                    return result
+
+                except (OperationalError, IntegrityError) as e:
+                    db.session.rollback()
+                    logger.warning(f"Tentative {attempt + 1}/{max_retries} échouée : {e}")
+
+                    if attempt == max_retries - 1:
+                        flash(f"Erreur après {max_retries} tentatives", 'danger')
+                        raise
+
+                    # Backoff exponentiel avec gigue : 5-20 ms, puis x2 à chaque tentative
+                    time.sleep(random.uniform(0.005, 0.02) * (2 ** attempt))
+
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Erreur non-récupérable : {e}")
+                    flash(f"Erreur : {str(e)}", 'danger')
+                    raise
+
+        return wrapper
+    return decorator
+
+
 def safe_commit():
     """
     Effectue un commit sécurisé.
@@ -199,7 +205,38 @@ def db_delete_with_check(obj, check_relationships=None, success_message=None):
         logger.error(f"Suppression échouée : {e}")
         raise
 
-def paginate_query(query, page, per_page=None):
+def estimer_nombre_lignes(table_name):
+    """
+    Estime le nombre de lignes d'une table sans la parcourir.
+
+    Utilise les statistiques du planificateur PostgreSQL (pg_class.reltuples),
+    lecture O(1) au lieu d'un COUNT(*) qui parcourt toute la table.
+
+    Args:
+        table_name: Nom de la table (ex: 'ingredient')
+
+    Returns:
+        Estimation (int) ou None si indisponible (SQLite, table jamais analysée)
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return None
+
+    try:
+        estimation = db.session.execute(
+            text("SELECT reltuples::BIGINT FROM pg_class WHERE relname = :table"),
+            {'table': table_name}
+        ).scalar()
+    except Exception as e:
+        logger.warning(f"Estimation du nombre de lignes impossible ({table_name}): {e}")
+        return None
+
+    if estimation is None or estimation < 0:
+        return None
+
+    return int(estimation)
+
+
+def paginate_query(query, page, per_page=None, total_estime=None):
     """
     Pagine une requête SQLAlchemy.
 
@@ -207,9 +244,12 @@ def paginate_query(query, page, per_page=None):
         query: Requête SQLAlchemy à paginer
         page: Numéro de page (commence à 1)
         per_page: Nombre d'items par page (None = valeur depuis la config)
+        total_estime: Nombre total approximatif à utiliser à la place du COUNT
+                      (voir estimer_nombre_lignes) ; None = COUNT exact
 
     Returns:
-        Dict avec items, total, page, pages, per_page, has_prev, has_next, prev_page, next_page
+        Dict avec items, total, total_estime, page, pages, per_page, has_prev,
+        has_next, prev_page, next_page
     """
     if per_page is None:
         per_page = current_app.config.get('ITEMS_PER_PAGE_DEFAULT', 24)
@@ -217,14 +257,22 @@ def paginate_query(query, page, per_page=None):
     per_page = max(1, per_page)
     page = max(1, page)
 
-    total = db.session.query(func.count()).select_from(query.subquery()).scalar()
+    est_estime = total_estime is not None
+    if est_estime:
+        total = total_estime
+    else:
+        total = db.session.query(func.count()).select_from(query.subquery()).scalar()
 
     if total > 0:
         pages = (total + per_page - 1) // per_page
     else:
         pages = 1
 
-    page = min(page, pages)
+    # Une estimation peut être trop basse : ne pas ramener la page demandée
+    if est_estime:
+        pages = max(pages, page)
+    else:
+        page = min(page, pages)
 
     offset = (page - 1) * per_page
     items = query.limit(per_page).offset(offset).all()
@@ -232,6 +280,7 @@ def paginate_query(query, page, per_page=None):
     return {
         'items': items,
         'total': total,
+        'total_estime': est_estime,
         'page': page,
         'pages': pages,
         'per_page': per_page,
@@ -242,6 +291,54 @@ def paginate_query(query, page, per_page=None):
     }
 
 
+def paginate_keyset(query, colonne_tri, colonne_id, after=None, after_id=None,
+                    per_page=None):
+    """
+    Pagine une requête par curseur (keyset) plutôt que par OFFSET.
+
+    La base saute directement au curseur via l'index (colonne_tri, id) :
+    le coût d'une page ne dépend plus de sa position, et aucun COUNT n'est fait.
+
+    Args:
+        query: Requête SQLAlchemy à paginer (sans order_by)
+        colonne_tri: Colonne de tri (ex: Recette.nom)
+        colonne_id: Colonne unique départageant les ex-aequo (ex: Recette.id)
+        after: Valeur de colonne_tri du dernier élément de la page précédente
+        after_id: Valeur de colonne_id du dernier élément de la page précédente
+        per_page: Nombre d'items par page (None = valeur depuis la config)
+
+    Returns:
+        Dict avec items, per_page, has_prev, has_next, next_after, next_after_id
+    """
+    if per_page is None:
+        per_page = current_app.config.get('ITEMS_PER_PAGE_DEFAULT', 24)
+
+    per_page = max(1, per_page)
+    curseur = after is not None and after_id is not None
+
+    if curseur:
+        query = query.filter(or_(
+            colonne_tri > after,
+            and_(colonne_tri == after, colonne_id > after_id)
+        ))
+
+    # Un élément de plus pour savoir s'il existe une page suivante
+    items = query.order_by(colonne_tri, colonne_id).limit(per_page + 1).all()
+
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    dernier = items[-1] if has_next else None
+
+    return {
+        'items': items,
+        'per_page': per_page,
+        'has_prev': curseur,
+        'has_next': has_next,
+        'next_after': getattr(dernier, colonne_tri.key) if dernier else None,
+        'next_after_id': getattr(dernier, colonne_id.key) if dernier else None
+    }
+
+
 def paginate_list(items, page, per_page):
     """
     Pagine une liste Python (pas une query SQLAlchemy).
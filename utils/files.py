@@ -1,12 +1,16 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from flask import current_app
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, scoped_session
 
 try:
     from utils.images import (
         save_optimized_image,
         allowed_file,
+        get_thumbnail_path,
         PILLOW_AVAILABLE
     )
     IMAGES_MODULE_AVAILABLE = True
@@ -118,6 +122,25 @@ def save_uploaded_file(file, prefix='', optimize=True):
         return None
 
 
+def get_thumbnail_if_exists(filepath):
+    """
+    Retourne le chemin de la miniature d'une image si elle a été générée.
+
+    Args:
+        filepath: Chemin relatif de l'image originale
+
+    Returns:
+        Chemin relatif de la miniature ou None
+    """
+    if not filepath or not IMAGES_MODULE_AVAILABLE:
+        return None
+
+    thumb_path = get_thumbnail_path(filepath)
+    if os.path.exists(os.path.join(current_app.root_path, thumb_path)):
+        return thumb_path
+    return None
+
+
 def delete_file(filepath):
     """
     Supprime un fichier du système de fichiers.
@@ -145,9 +168,10 @@ def delete_file(filepath):
             os.remove(full_path)
             current_app.logger.info(f'Fichier supprimé: {filepath}')
 
-            thumb_path = full_path.replace('.', '_thumb.', 1)
-            if os.path.exists(thumb_path):
-                os.remove(thumb_path)
+            base, ext = os.path.splitext(full_path)
+            for thumb_path in (f'{base}_thumb{ext}', f'{base}_thumb.webp'):
+                if os.path.exists(thumb_path):
+                    os.remove(thumb_path)
 
             return True
         else:
@@ -159,6 +183,65 @@ def delete_file(filepath):
         return False
 
 
+# ============================================
+# SUPPRESSION DIFFÉRÉE (APRÈS COMMIT)
+# ============================================
+
+# Un seul thread : les suppressions sont rares et n'ont pas besoin d'être parallèles
+_suppressions_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='delete_file')
+
+
+def delete_file_after_commit(session, filepath):
+    """
+    Programme la suppression d'un fichier après le commit de la transaction.
+
+    Le fichier est supprimé en arrière-plan une fois le commit réussi, hors
+    du chemin de la requête. En cas de rollback, il est conservé (la ligne
+    qui le référence existe toujours).
+
+    Args:
+        session: Session SQLAlchemy (ex: db.session)
+        filepath: Chemin relatif du fichier (ex: 'static/uploads/image.jpg')
+    """
+    if not filepath:
+        return
+
+    if isinstance(session, scoped_session):
+        session = session()
+
+    # Rattache la suppression à une transaction ouverte pour que
+    # commit/rollback la déclenchent ou l'annulent
+    if not session.in_transaction():
+        session.begin()
+
+    session.info.setdefault('fichiers_a_supprimer', []).append(filepath)
+
+
+def _supprimer_en_arriere_plan(app, fichiers):
+    with app.app_context():
+        for filepath in fichiers:
+            delete_file(filepath)
+
+
+@event.listens_for(Session, 'after_commit')
+def _supprimer_fichiers_apres_commit(session):
+    fichiers = session.info.pop('fichiers_a_supprimer', None)
+    if not fichiers:
+        return
+
+    if not has_app_context():
+        return
+
+    app = current_app._get_current_object()
+    _suppressions_executor.submit(_supprimer_en_arriere_plan, app, fichiers)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _annuler_suppressions(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('fichiers_a_supprimer', None)
+
+
 def get_file_size(filepath):
     """
     Retourne la taille d'un fichier en octets.
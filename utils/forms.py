@@ -1,6 +1,8 @@
+import re
 from typing import Optional, Any, List, Tuple, Generator
 from flask import flash
-from models.models import Ingredient, Recette
+from sqlalchemy import func
+from models.models import db, Ingredient, Recette, RecettePlanifiee
 
 
 def parse_float(value: Any, default: float = 0.0) -> float:
@@ -252,65 +254,103 @@ def parse_recette_form(form_data: dict) -> dict:
     }
 
 
-def parse_ingredients_list(form_data: dict) -> List[Tuple[int, float]]:
+_INDEXED_KEY_RE = re.compile(r'^(\w+)_(\d+)$')
+
+_CHAMPS_ENFANTS_RECETTE = ('ingredient', 'quantite', 'etape_desc', 'etape_duree')
+
+
+def parse_indexed_form(form_data: dict, fields) -> List[dict]:
     """
-    Parse la liste des ingrédients depuis un formulaire de recette.
+    Regroupe en un seul parcours les champs indexés d'un formulaire.
 
-    Attend des champs nommés ingredient_0, quantite_0, ingredient_1, quantite_1, etc.
+    Les clés de la forme <champ>_<n> (ex: ingredient_0, quantite_0) sont
+    rangées par indice. Les indices n'ont pas besoin d'être contigus.
 
     Args:
         form_data: Dictionnaire du formulaire
+        fields: Noms de champs à retenir (sans le suffixe _<n>)
 
     Returns:
-        Liste de tuples (ingredient_id, quantite)
+        Liste de dicts {champ: valeur}, un par indice, triée par indice
+    """
+    fields = frozenset(fields)
+    rows = {}
+
+    for key, value in form_data.items():
+        match = _INDEXED_KEY_RE.match(key)
+        if match and match.group(1) in fields:
+            rows.setdefault(int(match.group(2)), {})[match.group(1)] = value
+
+    return [rows[index] for index in sorted(rows)]
+
+
+def parse_recette_children(form_data: dict) -> Tuple[List[Tuple[int, float]], List[Tuple[str, Optional[int]]]]:
+    """
+    Parse en un seul parcours les ingrédients et les étapes d'un formulaire de recette.
+
+    Attend des champs nommés ingredient_0, quantite_0, ... et etape_desc_0,
+    etape_duree_0, ... Les indices n'ont pas besoin d'être contigus (lignes
+    supprimées côté client) : l'ordre des indices est conservé.
+
+    Args:
+        form_data: Dictionnaire du formulaire
+
+    Returns:
+        Tuple (ingredients, etapes) :
+            - ingredients : liste de tuples (ingredient_id, quantite)
+            - etapes : liste de tuples (description, duree_minutes) non vides
     """
     ingredients = []
-    i = 0
+    etapes = []
+
+    for row in parse_indexed_form(form_data, _CHAMPS_ENFANTS_RECETTE):
+        if 'ingredient' in row:
+            try:
+                ing_id = int(row['ingredient'])
+                quantite = parse_float(row.get('quantite'))
+                if ing_id and quantite > 0:
+                    ingredients.append((ing_id, quantite))
+            except (ValueError, TypeError):
+                pass
+
+        description = (row.get('etape_desc') or '').strip()
+        if description:
+            duree_str = (row.get('etape_duree') or '').strip()
+            duree_minutes = int(duree_str) if duree_str.isdigit() else None
+            etapes.append((description, duree_minutes))
 
-    while True:
-        ing_id = form_data.get(f'ingredient_{i}')
+    return ingredients, etapes
 
-        if not ing_id:
-            break
 
-        try:
-            ing_id = int(ing_id)
-            quantite = parse_float(form_data.get(f'quantite_{i}'))
+def parse_ingredients_list(form_data: dict) -> List[Tuple[int, float]]:
+    """
+    Parse la liste des ingrédients depuis un formulaire de recette.
 
-            if ing_id and quantite > 0:
-                ingredients.append((ing_id, quantite))
-        except (ValueError, TypeError):
-            pass
+    Attend des champs nommés ingredient_0, quantite_0, ingredient_1, quantite_1, etc.
 
-        i += 1
+    Args:
+        form_data: Dictionnaire du formulaire
 
-    return ingredients
+    Returns:
+        Liste de tuples (ingredient_id, quantite)
+    """
+    return parse_recette_children(form_data)[0]
 
 
-def parse_etapes_list(form_data: dict, max_index: int = 100) -> Generator[Tuple[str, Optional[int]], None, None]:
+def parse_etapes_list(form_data: dict) -> Generator[Tuple[str, Optional[int]], None, None]:
     """
     Parse la liste des étapes depuis un formulaire de recette.
 
     Attend des champs nommés etape_desc_0, etape_duree_0, etc.
-    Parcourt jusqu'à max_index pour gérer les indices manquants.
 
     Args:
         form_data: Dictionnaire du formulaire
-        max_index: Index maximum à vérifier (défaut 100)
 
     Yields:
         Tuple (description, duree_minutes) pour chaque étape non vide
     """
-    for i in range(max_index):
-        desc_key = f'etape_desc_{i}'
-        duree_key = f'etape_duree_{i}'
-
-        description = form_data.get(desc_key, '').strip()
+    yield from parse_recette_children(form_data)[1]
 
-        if description:
-            duree_str = form_data.get(duree_key, '').strip()
-            duree_minutes = int(duree_str) if duree_str and duree_str.isdigit() else None
-            yield (description, duree_minutes)
 
 def validate_unique_ingredient(nom: str, exclude_id: Optional[int] = None) -> bool:
     """
@@ -404,7 +444,10 @@ def validate_recette_not_planned(recette: Recette) -> Tuple[bool, int]:
     Returns:
         Tuple (peut_supprimer: bool, nb_planifications: int)
     """
-    nb_planifications = len([p for p in recette.planifications if not p.preparee])
+    nb_planifications = db.session.query(func.count(RecettePlanifiee.id)).filter(
+        RecettePlanifiee.recette_id == recette.id,
+        RecettePlanifiee.preparee.is_(False)
+    ).scalar()
 
     if nb_planifications > 0:
         flash(
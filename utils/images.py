@@ -0,0 +1,154 @@
+"""
+utils/images.py
+Optimisation des images uploadées (redimensionnement + miniatures WebP).
+
+Pillow est optionnel : si absent, utils.files retombe sur un simple file.save().
+"""
+import os
+from flask import current_app
+
+try:
+    from PIL import Image, ImageOps
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+
+# ============================================
+# CONSTANTES
+# ============================================
+
+THUMB_SUFFIX = '_thumb'
+THUMB_FORMAT = 'webp'
+
+FORMATS_PILLOW = {
+    'jpg': 'JPEG',
+    'jpeg': 'JPEG',
+    'png': 'PNG',
+    'webp': 'WEBP',
+    'gif': 'GIF',
+}
+
+
+# ============================================
+# CHEMINS
+# ============================================
+
+def allowed_file(filename):
+    """
+    Vérifie si l'extension est autorisée et supportée par Pillow.
+    """
+    if not filename or '.' not in filename:
+        return False
+
+    allowed = current_app.config.get(
+        'ALLOWED_EXTENSIONS',
+        {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    )
+    ext = filename.rsplit('.', 1)[1].lower()
+    return ext in allowed and ext in FORMATS_PILLOW
+
+
+def get_thumbnail_path(filepath):
+    """
+    Retourne le chemin de la miniature associée à une image.
+
+    Args:
+        filepath: Chemin de l'image originale (ex: 'static/uploads/rec_x.jpg')
+
+    Returns:
+        Chemin de la miniature (ex: 'static/uploads/rec_x_thumb.webp') ou None
+    """
+    if not filepath:
+        return None
+    base, _ = os.path.splitext(filepath)
+    return f"{base}{THUMB_SUFFIX}.{THUMB_FORMAT}"
+
+
+# ============================================
+# TRAITEMENT
+# ============================================
+
+def _preparer_pour_format(img, format_pillow):
+    """Convertit le mode de l'image si le format cible ne le supporte pas."""
+    if format_pillow == 'JPEG' and img.mode not in ('RGB', 'L'):
+        return img.convert('RGB')
+    if format_pillow == 'WEBP' and img.mode not in ('RGB', 'RGBA'):
+        return img.convert('RGBA' if 'A' in img.getbands() or img.mode == 'P' else 'RGB')
+    return img
+
+
+def creer_miniature(img, filepath, size, quality=85):
+    """
+    Écrit la miniature WebP d'une image déjà décodée.
+
+    Args:
+        img: Image Pillow (non modifiée)
+        filepath: Chemin absolu de l'image originale
+        size: Taille maximale (côté le plus long) en pixels
+        quality: Qualité WebP
+
+    Returns:
+        Chemin absolu de la miniature
+    """
+    thumb = img.copy()
+    thumb.thumbnail((size, size))
+    thumb = _preparer_pour_format(thumb, 'WEBP')
+
+    thumb_path = get_thumbnail_path(filepath)
+    thumb.save(thumb_path, 'WEBP', quality=quality, method=4)
+    return thumb_path
+
+
+def save_optimized_image(file, prefix='', max_size=1200, quality=85,
+                         create_thumb=False):
+    """
+    Sauvegarde une image redimensionnée et, optionnellement, sa miniature.
+
+    L'image n'est décodée qu'une seule fois : la miniature est dérivée
+    de l'image en mémoire, sans relire le fichier.
+
+    Args:
+        file: Fichier uploadé (FileStorage)
+        prefix: Préfixe pour le nom du fichier
+        max_size: Côté maximal de l'image sauvegardée
+        quality: Qualité JPEG/WebP
+        create_thumb: Générer la miniature '<nom>_thumb.webp'
+
+    Returns:
+        Chemin relatif du fichier sauvegardé ou None si erreur
+    """
+    from utils.files import generate_unique_filename, get_upload_folder
+
+    try:
+        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'static/uploads')
+        new_filename = generate_unique_filename(file.filename, prefix)
+        filepath = os.path.join(get_upload_folder(), new_filename)
+
+        ext = new_filename.rsplit('.', 1)[1].lower()
+        format_pillow = FORMATS_PILLOW.get(ext, 'JPEG')
+
+        with Image.open(file.stream) as source:
+            if format_pillow == 'GIF' and getattr(source, 'is_animated', False):
+                # Les GIF animés sont conservés tels quels
+                file.stream.seek(0)
+                file.save(filepath)
+                img = source.copy()
+            else:
+                img = ImageOps.exif_transpose(source)
+                img.thumbnail((max_size, max_size))
+                img = _preparer_pour_format(img, format_pillow)
+                img.save(filepath, format_pillow, quality=quality, optimize=True)
+
+        if create_thumb:
+            thumb_size = current_app.config.get('IMAGE_THUMB_SIZE', 300)
+            creer_miniature(img, filepath, thumb_size, quality=quality)
+
+        relative_path = os.path.join(upload_folder, new_filename)
+        current_app.logger.info(f'Image optimisée sauvegardée: {relative_path}')
+
+        return relative_path
+
+    except Exception as e:
+        current_app.logger.error(f'Erreur optimisation image: {e}')
+        return None
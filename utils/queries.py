@@ -1,11 +1,14 @@
+from collections import Counter
 from sqlalchemy.orm import joinedload, selectinload, contains_eager
-from sqlalchemy import func, desc, and_, or_
+from sqlalchemy import func, desc, and_, or_, exists, text, column, inspect, Integer
 from models.models import (
     db, Ingredient, StockFrigo, Recette, IngredientRecette,
     RecettePlanifiee, ListeCourses, EtapeRecette, IngredientSaison
 )
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
+from weakref import WeakKeyDictionary
+import time
 
 
 def get_stocks_with_ingredients(order_by='nom', filter_empty=True):
@@ -261,6 +264,105 @@ def get_recettes_realisables():
     return realisables
 
 
+def filtre_ingredients_directs_en_stock():
+    """
+    Condition SQL : aucun ingrédient direct de la recette ne manque au frigo.
+
+    Condition nécessaire (mais pas suffisante, les sous-recettes ne sont pas
+    parcourues) pour que la recette soit réalisable : elle sert de pré-filtre
+    avant calculer_disponibilite_ingredients().
+
+    Returns:
+        Expression NOT EXISTS utilisable dans .filter()
+    """
+    manquant = exists().where(
+        IngredientRecette.recette_id == Recette.id
+    ).where(
+        ~exists().where(
+            StockFrigo.ingredient_id == IngredientRecette.ingredient_id,
+            StockFrigo.quantite >= IngredientRecette.quantite
+        )
+    )
+    return ~manquant
+
+
+def get_recettes_candidates(*options, type_recette=None, realisable_only=False):
+    """
+    Requête des recettes à soumettre au moteur de recommandation.
+
+    Le moteur trie par score composite (saison, coût, historique...), qui
+    n'a pas d'équivalent SQL : seuls les filtres sont appliqués ici.
+
+    Args:
+        *options: Options de chargement (joinedload, selectinload...)
+        type_recette: Ne garder que ce type de recette
+        realisable_only: Écarter les recettes dont un ingrédient direct manque
+
+    Returns:
+        Query de Recette ordonnée par id
+    """
+    query = Recette.query.options(*options)
+
+    if type_recette:
+        query = query.filter(Recette.type_recette == type_recette)
+    if realisable_only:
+        query = query.filter(filtre_ingredients_directs_en_stock())
+
+    return query.order_by(Recette.id)
+
+
+# Taille minimale d'un terme servi par l'index trigramme
+LONGUEUR_MIN_TRIGRAMME = 3
+
+# Délai avant de revérifier une base SQLite sans table recette_fts
+DELAI_VERIFICATION_FTS = 60
+
+# {engine: (disponible, instant de la vérification)} présence de la table
+# recette_fts (absente d'une base créée avant son ajout, jusqu'à la migration)
+_recherche_fts = WeakKeyDictionary()
+
+
+def _recherche_fts_disponible(engine) -> bool:
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    maintenant = time.monotonic()
+    disponible, verifie_a = _recherche_fts.get(engine, (False, None))
+    if disponible or (verifie_a is not None and maintenant - verifie_a < DELAI_VERIFICATION_FTS):
+        return disponible
+
+    # Table absente : revérifiée au plus une fois par délai, la migration
+    # pouvant la créer sans redémarrage
+    disponible = inspect(engine).has_table('recette_fts')
+    _recherche_fts[engine] = (disponible, maintenant)
+    return disponible
+
+
+def filtre_nom_recette(terme: str):
+    """
+    Filtre "nom contient terme" (insensible à la casse) sur Recette.
+
+    Sur SQLite, passe par l'index FTS5 trigramme recette_fts quand il
+    existe ; ailleurs (et pour les termes trop courts) ILIKE, servi par
+    idx_recette_nom_trgm sur PostgreSQL.
+
+    Args:
+        terme: Texte recherché
+
+    Returns:
+        Expression utilisable dans Query.filter()
+    """
+    motif = f'%{terme}%'
+    if len(terme) >= LONGUEUR_MIN_TRIGRAMME and _recherche_fts_disponible(db.engine):
+        ids = (
+            text('SELECT rowid FROM recette_fts WHERE nom LIKE :motif')
+            .bindparams(motif=motif)
+            .columns(column('rowid', Integer))
+        )
+        return Recette.id.in_(ids)
+    return Recette.nom.ilike(motif)
+
+
 def search_recettes(search_query, type_filter=None, ingredient_id=None):
     """
     Recherche de recettes avec filtres multiples.
@@ -278,14 +380,14 @@ def search_recettes(search_query, type_filter=None, ingredient_id=None):
     )
 
     if search_query:
-        query = query.filter(Recette.nom.ilike(f'%{search_query}%'))
+        query = query.filter(filtre_nom_recette(search_query))
 
     if type_filter:
         query = query.filter(Recette.type_recette == type_filter)
 
     if ingredient_id:
-        query = query.join(IngredientRecette).filter(
-            IngredientRecette.ingredient_id == ingredient_id
+        query = query.filter(
+            Recette.ingredients.any(IngredientRecette.ingredient_id == ingredient_id)
         )
 
     return query.order_by(Recette.nom).all()
@@ -324,12 +426,15 @@ def get_courses_non_achetees():
     """
     Récupère la liste de courses non achetée, en excluant les items orphelins.
 
+    La jointure qui exclut les orphelins charge aussi l'ingrédient
+    (contains_eager) : le calcul du budget n'émet aucune requête par item.
+
     Returns:
-        Liste de ListeCourses avec ingredient et saisons préchargés
+        Liste de ListeCourses avec ingredient préchargé
     """
     return ListeCourses.query\
         .join(Ingredient, ListeCourses.ingredient_id == Ingredient.id)\
-        .options(joinedload(ListeCourses.ingredient).joinedload(Ingredient.saisons))\
+        .options(contains_eager(ListeCourses.ingredient))\
         .filter(ListeCourses.achete == False)\
         .order_by(ListeCourses.id)\
         .all()
@@ -339,22 +444,37 @@ def nettoyer_courses_orphelines() -> int:
     """
     Supprime les items de la liste de courses dont l'ingrédient n'existe plus.
 
+    Le commit est laissé à l'appelant. Sans orphelin, seul un SELECT est
+    émis : un DELETE, même sans ligne, ouvrirait une transaction d'écriture
+    (verrou SQLite jusqu'au commit) et invaliderait le cache des courses.
+
     Returns:
         Nombre d'items supprimés
     """
-    orphelins = ListeCourses.query\
-        .outerjoin(Ingredient, ListeCourses.ingredient_id == Ingredient.id)\
-        .filter(Ingredient.id == None)\
-        .all()
+    ingredient_existe = exists().where(Ingredient.id == ListeCourses.ingredient_id)
+    orphelins = ListeCourses.query.filter(~ingredient_existe)
+    if not db.session.query(orphelins.exists()).scalar():
+        return 0
+    return orphelins.delete(synchronize_session=False)
+
 
-    count = len(orphelins)
-    for item in orphelins:
-        db.session.delete(item)
+def supprimer_courses(achete: bool) -> int:
+    """
+    Supprime en une instruction les items de la liste de courses
+    achetés (historique) ou non achetés, sans les charger.
 
-    if count > 0:
-        db.session.commit()
+    Le commit est laissé à l'appelant.
+
+    Args:
+        achete: True pour l'historique, False pour la liste en cours
+
+    Returns:
+        Nombre d'items supprimés
+    """
+    return ListeCourses.query\
+        .filter(ListeCourses.achete == achete)\
+        .delete(synchronize_session=False)
 
-    return count
 
 def get_historique_courses(limit: int = 10) -> List[ListeCourses]:
     """
@@ -540,10 +660,7 @@ def get_stock_stats():
         for stock in stocks
     )
 
-    by_category = {}
-    for stock in stocks:
-        cat = stock.ingredient.categorie or 'Autres'
-        by_category[cat] = by_category.get(cat, 0) + 1
+    by_category = Counter(stock.ingredient.categorie or 'Autres' for stock in stocks)
 
     return {
         'nb_items': len(stocks),
@@ -552,6 +669,27 @@ def get_stock_stats():
     }
 
 
+def compter_recettes() -> Dict[str, int]:
+    """
+    Compte les recettes et les recettes planifiées (non préparées).
+
+    Les deux compteurs sont des sous-requêtes scalaires d'un même SELECT
+    (un seul aller-retour ; index sur RecettePlanifiee.preparee).
+
+    Returns:
+        Dict {'total': int, 'planifiees': int}
+    """
+    from sqlalchemy import select
+
+    total = select(func.count(Recette.id)).scalar_subquery()
+    planifiees = select(func.count(RecettePlanifiee.id)) \
+        .where(RecettePlanifiee.preparee == False) \
+        .scalar_subquery()
+
+    compteurs = db.session.query(total.label('total'), planifiees.label('planifiees')).one()
+    return compteurs._asdict()
+
+
 def get_recettes_stats():
     """
     Calcule les statistiques des recettes.
@@ -1,6 +1,7 @@
+from sqlalchemy import delete, insert
 from models.models import db, Recette, IngredientRecette, EtapeRecette, Ingredient
-from utils.files import save_uploaded_file, delete_file
-from utils.forms import parse_recette_form, parse_ingredients_list, parse_etapes_list
+from utils.files import save_uploaded_file, delete_file_after_commit, get_thumbnail_if_exists
+from utils.forms import parse_recette_form, parse_recette_children
 from constants import ML_PAR_CS, CATEGORIE_HUILES, G_PAR_PINCEE, CATEGORIES_PINCEES
 
 
@@ -22,54 +23,86 @@ def sauvegarder_sous_recettes(recette: Recette, form_data: dict):
         except (ValueError, TypeError):
             pass
 
-    recette.sous_recettes.clear()
+    # Une seule requête IN ; l'ORM écrit ensuite les lignes d'association
+    # ajoutées/retirées en executemany
+    sous_recettes = {
+        sous.id: sous
+        for sous in Recette.query.filter(Recette.id.in_(ids_valides))
+    } if ids_valides else {}
 
-    for sid in ids_valides:
-        sous = Recette.query.get(sid)
-        if sous:
-            recette.sous_recettes.append(sous)
+    recette.sous_recettes = [sous_recettes[sid] for sid in dict.fromkeys(ids_valides) if sid in sous_recettes]
 
 
-def sauvegarder_ingredients(recette_id: int, form_data: dict):
+def sauvegarder_ingredients(recette_id: int, form_data: dict, ingredients=None):
     """
     Remplace les ingrédients d'une recette depuis les données du formulaire.
 
+    Suppression et insertion en une instruction chacune (executemany).
+
     Args:
         recette_id: ID de la recette
         form_data: Données du formulaire (request.form)
+        ingredients: Liste (ingredient_id, quantite) déjà parsée (optionnel)
     """
-    IngredientRecette.query.filter_by(recette_id=recette_id).delete()
+    db.session.execute(
+        delete(IngredientRecette).where(IngredientRecette.recette_id == recette_id)
+    )
+
+    if ingredients is None:
+        ingredients = parse_recette_children(form_data)[0]
+    if not ingredients:
+        return
+
+    ids = {ing_id for ing_id, _ in ingredients}
+    categories = dict(
+        db.session.query(Ingredient.id, Ingredient.categorie)
+        .filter(Ingredient.id.in_(ids))
+    )
 
-    for ing_id, quantite in parse_ingredients_list(form_data):
-        ing = Ingredient.query.get(ing_id)
-        if ing and ing.categorie == CATEGORIE_HUILES:
+    rows = []
+    for ing_id, quantite in ingredients:
+        categorie = categories.get(ing_id)
+        if categorie == CATEGORIE_HUILES:
             quantite = quantite * ML_PAR_CS
-        elif ing and ing.categorie in CATEGORIES_PINCEES:
+        elif categorie in CATEGORIES_PINCEES:
             quantite = quantite * G_PAR_PINCEE
-        db.session.add(IngredientRecette(
-            recette_id=recette_id,
-            ingredient_id=ing_id,
-            quantite=quantite
-        ))
+        rows.append({
+            'recette_id': recette_id,
+            'ingredient_id': ing_id,
+            'quantite': quantite
+        })
 
+    db.session.execute(insert(IngredientRecette), rows)
 
-def sauvegarder_etapes(recette_id: int, form_data: dict):
+
+def sauvegarder_etapes(recette_id: int, form_data: dict, etapes=None):
     """
     Remplace les étapes d'une recette depuis les données du formulaire.
 
     Args:
         recette_id: ID de la recette
         form_data: Données du formulaire (request.form)
+        etapes: Liste (description, duree_minutes) déjà parsée (optionnel)
     """
-    EtapeRecette.query.filter_by(recette_id=recette_id).delete()
+    if etapes is None:
+        etapes = parse_recette_children(form_data)[1]
+
+    db.session.execute(
+        delete(EtapeRecette).where(EtapeRecette.recette_id == recette_id)
+    )
 
-    for ordre, (description, duree_minutes) in enumerate(parse_etapes_list(form_data), start=1):
-        db.session.add(EtapeRecette(
-            recette_id=recette_id,
-            ordre=ordre,
-            description=description,
-            duree_minutes=duree_minutes
-        ))
+    rows = [
+        {
+            'recette_id': recette_id,
+            'ordre': ordre,
+            'description': description,
+            'duree_minutes': duree_minutes
+        }
+        for ordre, (description, duree_minutes) in enumerate(etapes, start=1)
+    ]
+
+    if rows:
+        db.session.execute(insert(EtapeRecette), rows)
 
 
 def gerer_image_recette(recette: Recette, files: dict):
@@ -87,36 +120,50 @@ def gerer_image_recette(recette: Recette, files: dict):
     if not file or not file.filename:
         return
 
-    if recette.image:
-        delete_file(recette.image)
-
     filepath = save_uploaded_file(file, prefix=f'rec_{recette.nom}')
     if filepath:
+        if recette.image:
+            delete_file_after_commit(db.session, recette.image)
         recette.image = filepath
+        recette.image_thumb = get_thumbnail_if_exists(filepath)
 
 
-def creer_recette(form_data: dict, files: dict) -> Recette:
+def creer_recette(form_data: dict, files: dict, recette_data: dict = None) -> Recette:
     """
     Crée une nouvelle recette complète (métadonnées + ingrédients + étapes + image).
 
+    Le formulaire est entièrement parsé et l'image traitée avant la
+    première écriture : la transaction n'est pas ouverte pendant le
+    redimensionnement.
+
     Args:
         form_data: Données du formulaire (request.form)
         files: Fichiers uploadés (request.files)
+        recette_data: Résultat de parse_recette_form() s'il est déjà connu
+
+    Le commit et l'invalidation du cache des recettes (après le commit)
+    sont laissés à l'appelant.
 
     Returns:
         L'instance de Recette créée
     """
-    recette_data = parse_recette_form(form_data)
+    if recette_data is None:
+        recette_data = parse_recette_form(form_data)
     recette = Recette(**recette_data)
+    ingredients, etapes = parse_recette_children(form_data)
+    gerer_image_recette(recette, files)
 
     db.session.add(recette)
     db.session.flush()
 
-    gerer_image_recette(recette, files)
-    sauvegarder_ingredients(recette.id, form_data)
-    sauvegarder_etapes(recette.id, form_data)
+    sauvegarder_ingredients(recette.id, form_data, ingredients)
+    sauvegarder_etapes(recette.id, form_data, etapes)
     sauvegarder_sous_recettes(recette, form_data)
 
+    # Les lignes enfants ont été écrites hors ORM
+    db.session.expire(recette, ['ingredients', 'etapes'])
+    Recette.recalculer_cout_nutrition([recette.id])
+
     return recette
 
 
@@ -128,6 +175,9 @@ def modifier_recette(recette: Recette, form_data: dict, files: dict):
         recette: Instance existante de la recette
         form_data: Données du formulaire (request.form)
         files: Fichiers uploadés (request.files)
+
+    Le commit et l'invalidation du cache des recettes (après le commit)
+    sont laissés à l'appelant.
     """
     recette_data = parse_recette_form(form_data)
 
@@ -137,7 +187,12 @@ def modifier_recette(recette: Recette, form_data: dict, files: dict):
     recette.temps_preparation = recette_data['temps_preparation']
     recette.temps_cuisson = recette_data['temps_cuisson']
 
+    ingredients, etapes = parse_recette_children(form_data)
     gerer_image_recette(recette, files)
-    sauvegarder_ingredients(recette.id, form_data)
-    sauvegarder_etapes(recette.id, form_data)
+    sauvegarder_ingredients(recette.id, form_data, ingredients)
+    sauvegarder_etapes(recette.id, form_data, etapes)
     sauvegarder_sous_recettes(recette, form_data)
+
+    # Les lignes enfants ont été écrites hors ORM
+    db.session.expire(recette, ['ingredients', 'etapes'])
+    Recette.recalculer_cout_nutrition([recette.id])
@@ -2,6 +2,8 @@ from typing import List, Dict, Optional, Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from functools import lru_cache
+import heapq
+import threading
 
 
 @dataclass
@@ -43,47 +45,91 @@ class ScoreRecette:
     meta: Dict[str, any] = field(default_factory=dict)
 
 
-def score_saison(recette, saison: str = None) -> tuple[float, dict]:
+def score_saison(recette, saison: str = None,
+                 saisons_map: Dict[int, frozenset] = None) -> tuple[float, dict]:
     """
     Calcule le score saisonnier d'une recette.
 
+    Args:
+        saison: Saison de référence (défaut: saison actuelle)
+        saisons_map: Table {ingredient_id: saisons} préchargée
+                     (voir get_saisons_ingredients_map). Évite de charger
+                     les saisons de chaque ingrédient une à une.
+
     Returns:
         Tuple (score 0-100, métadonnées)
     """
-    saison_info = recette.calculer_score_saisonnier(saison)
-    return saison_info['score'], {
-        'ingredients_saison': len(saison_info['ingredients_saison']),
-        'ingredients_hors_saison': len(saison_info['ingredients_hors_saison']),
-        'ingredients_toute_annee': len(saison_info['ingredients_toute_annee'])
+    if saisons_map is None:
+        from utils.saisons import calculer_score_saisonnier_recette
+
+        saison_info = calculer_score_saisonnier_recette(recette, saison)
+        return saison_info['score'], {
+            'ingredients_saison': len(saison_info['ingredients_saison']),
+            'ingredients_hors_saison': len(saison_info['ingredients_hors_saison']),
+            'ingredients_toute_annee': len(saison_info['ingredients_toute_annee'])
+        }
+
+    if saison is None:
+        from utils.saisons import get_saison_actuelle
+        saison = get_saison_actuelle()
+
+    total = 0
+    nb_saison = 0
+    nb_toute_annee = 0
+
+    for ing_rec in recette.ingredients:
+        total += 1
+        saisons_ing = saisons_map.get(ing_rec.ingredient_id)
+        if not saisons_ing:
+            nb_toute_annee += 1
+        elif saison in saisons_ing:
+            nb_saison += 1
+
+    score = round((nb_saison + nb_toute_annee) / total * 100, 1) if total > 0 else 0
+
+    return score, {
+        'ingredients_saison': nb_saison,
+        'ingredients_hors_saison': total - nb_saison - nb_toute_annee,
+        'ingredients_toute_annee': nb_toute_annee
     }
 
 
-def score_disponibilite(recette) -> tuple[float, dict]:
+def score_disponibilite(recette, stock_map: Dict[int, float] = None) -> tuple[float, dict]:
     """
     Calcule le score de disponibilité des ingrédients.
 
+    Args:
+        stock_map: Stock {ingredient_id: quantite} préchargé (optionnel)
+
     Returns:
         Tuple (score 0-100, métadonnées)
     """
-    dispo = recette.calculer_disponibilite_ingredients()
-    return dispo['pourcentage'], {
+    if stock_map is not None:
+        dispo = recette.calculer_disponibilite_ingredients_from_map(stock_map)
+    else:
+        dispo = recette.calculer_disponibilite_ingredients()
+    return dispo['pourcentage_disponibilite'], {
         'realisable': dispo['realisable'],
         'nb_disponibles': len(dispo['ingredients_disponibles']),
         'nb_manquants': len(dispo['ingredients_manquants'])
     }
 
 
-def score_cout(recette, cout_max: float = None) -> tuple[float, dict]:
+def score_cout(recette, cout_max: float = None,
+               cout: float = None) -> tuple[float, dict]:
     """
     Calcule le score de coût (inversé : moins cher = meilleur score).
 
     Args:
         cout_max: Coût maximum de référence pour normalisation
+        cout: Coût déjà calculé de la recette (optionnel)
 
     Returns:
         Tuple (score 0-100, métadonnées)
     """
-    cout = recette.calculer_cout()
+    if cout is None:
+        from utils.cache import get_cout_recette_cached
+        cout = get_cout_recette_cached(recette)
 
     if cout <= 0:
         return 50.0, {'cout': 0, 'cout_max': cout_max, 'sans_prix': True}
@@ -130,16 +176,22 @@ def score_temps(recette, temps_max: int = 120) -> tuple:
     }
 
 
-def score_nutrition_equilibre(recette) -> tuple[float, dict]:
+def score_nutrition_equilibre(recette, nutrition: dict = None) -> tuple[float, dict]:
     """
     Calcule un score d'équilibre nutritionnel basé sur les macronutriments.
 
     Cibles : protéines 15-25%, glucides 45-55%, lipides 25-35% des calories.
 
+    Args:
+        nutrition: Valeurs nutritionnelles déjà calculées (optionnel)
+
     Returns:
         Tuple (score 0-100, métadonnées)
     """
-    nutrition = recette.calculer_nutrition()
+    if nutrition is None:
+        from utils.cache import get_nutrition_recette_cached
+        nutrition = get_nutrition_recette_cached(recette)
+
     calories = nutrition.get('calories', 0)
 
     if calories <= 0:
@@ -183,7 +235,8 @@ def score_nutrition_equilibre(recette) -> tuple[float, dict]:
 
 
 def score_variete(recette, historique_recettes: List[int] = None,
-                  jours_penalite: int = 14) -> tuple[float, dict]:
+                  jours_penalite: int = 14,
+                  positions: Dict[int, int] = None) -> tuple[float, dict]:
     """
     Calcule un score de variété (pénalise les recettes récemment cuisinées).
 
@@ -191,6 +244,8 @@ def score_variete(recette, historique_recettes: List[int] = None,
         historique_recettes: Liste des IDs de recettes cuisinées récemment
                             (ordonnées de la plus récente à la plus ancienne)
         jours_penalite: Nombre de jours de pénalité
+        positions: Index {recette_id: position} de l'historique
+                   (voir indexer_historique), pour une recherche en O(1)
 
     Returns:
         Tuple (score 0-100, métadonnées)
@@ -198,12 +253,14 @@ def score_variete(recette, historique_recettes: List[int] = None,
     if not historique_recettes:
         return 100.0, {'dans_historique': False, 'position': None}
 
-    recette_id = recette.id
+    if positions is None:
+        positions = indexer_historique(historique_recettes)
+
+    position = positions.get(recette.id)
 
-    if recette_id not in historique_recettes:
+    if position is None:
         return 100.0, {'dans_historique': False, 'position': None}
 
-    position = historique_recettes.index(recette_id)
     nb_recettes = len(historique_recettes)
 
     score = 20 + (position / max(1, nb_recettes - 1)) * 70
@@ -211,6 +268,115 @@ def score_variete(recette, historique_recettes: List[int] = None,
     return round(score, 1), {'dans_historique': True, 'position': position + 1}
 
 
+def indexer_historique(historique_recettes: List[int]) -> Dict[int, int]:
+    """
+    Construit l'index {recette_id: position} d'un historique.
+
+    Seule la première occurrence (la plus récente) est retenue.
+    """
+    positions = {}
+    for position, recette_id in enumerate(historique_recettes):
+        positions.setdefault(recette_id, position)
+    return positions
+
+
+def get_saisons_ingredients_map() -> Dict[int, frozenset]:
+    """
+    Charge les saisons de tous les ingrédients en une seule requête.
+
+    Returns:
+        Dict {ingredient_id: frozenset(saisons)} ; un ingrédient absent
+        est disponible toute l'année
+    """
+    from models.models import db, IngredientSaison
+
+    saisons = {}
+    for ingredient_id, saison in db.session.query(
+        IngredientSaison.ingredient_id, IngredientSaison.saison
+    ):
+        saisons.setdefault(ingredient_id, set()).add(saison)
+
+    return {ingredient_id: frozenset(s) for ingredient_id, s in saisons.items()}
+
+
+def get_stock_map() -> Dict[int, float]:
+    """
+    Charge tout le stock du frigo en une seule requête.
+
+    Returns:
+        Dict {ingredient_id: quantite}
+    """
+    from models.models import db, StockFrigo
+
+    return dict(db.session.query(StockFrigo.ingredient_id, StockFrigo.quantite))
+
+
+@dataclass
+class FeaturesRecettes:
+    """
+    Caractéristiques des recettes indépendantes du contexte, rangées par colonne.
+
+    Recalculées uniquement quand une recette ou un ingrédient change
+    (clé de cache versionnée), puis partagées par toutes les requêtes :
+    une lecture de cache par requête au lieu d'une par recette et par critère.
+
+    Attributes:
+        lignes: Index {recette_id: ligne}
+        cout: Coût de chaque recette
+        nutrition: Score d'équilibre nutritionnel (score, meta) de chaque recette
+    """
+    lignes: Dict[int, int] = field(default_factory=dict)
+    cout: List[float] = field(default_factory=list)
+    nutrition: List[tuple] = field(default_factory=list)
+
+
+def calculer_features_recettes(recettes) -> FeaturesRecettes:
+    """
+    Calcule les colonnes de FeaturesRecettes pour une liste de recettes.
+    """
+    features = FeaturesRecettes()
+
+    for recette in recettes:
+        features.lignes[recette.id] = len(features.cout)
+        features.cout.append(recette.calculer_cout())
+        features.nutrition.append(
+            score_nutrition_equilibre(recette, recette.calculer_nutrition())
+        )
+
+    return features
+
+
+def get_features_recettes(recettes) -> FeaturesRecettes:
+    """
+    Retourne les caractéristiques des recettes depuis le cache,
+    recalculées si une recette demandée n'y figure pas.
+
+    Le cache couvre toutes les recettes (une seule entrée) : les appelants
+    qui passent des sous-ensembles différents lisent la même entrée au lieu
+    de l'écraser tour à tour.
+
+    Args:
+        recettes: Liste des recettes à scorer
+
+    Returns:
+        FeaturesRecettes (contient au moins les recettes demandées)
+    """
+    from models.models import Recette
+    from utils.cache import cache, cle_versionnee_recettes, COUT_NUTRITION_TIMEOUT
+
+    cle = cle_versionnee_recettes('recettes_features')
+    features = cache.get(cle)
+
+    if features is None or any(r.id not in features.lignes for r in recettes):
+        # Coût et nutrition sont lus dans les colonnes précalculées
+        toutes = {r.id: r for r in Recette.query}
+        toutes.update((r.id, r) for r in recettes)
+        features = calculer_features_recettes(toutes.values())
+        cache.set(cle, features, timeout=COUT_NUTRITION_TIMEOUT)
+
+    return features
+
+
 class MoteurRecommandation:
     """
     Moteur de recommandation de recettes avec critères pondérables.
@@ -269,6 +435,23 @@ class MoteurRecommandation:
                 emoji=config['emoji']
             )
 
+    def reinitialiser(self) -> 'MoteurRecommandation':
+        """
+        Remet les poids par défaut et vide le contexte (données préchargées
+        comprises), pour réutiliser le moteur sur une nouvelle requête.
+
+        Returns:
+            self pour chaînage
+        """
+        self.contexte.clear()
+
+        for nom, config in self.CRITERES_DISPONIBLES.items():
+            critere = self.criteres[nom]
+            critere.poids = config['poids_defaut']
+            critere.actif = True
+
+        return self
+
     def configurer_critere(self, nom: str, poids: float = None, actif: bool = None) -> 'MoteurRecommandation':
         """
         Configure un critère de recommandation.
@@ -323,104 +506,214 @@ class MoteurRecommandation:
             cout_max: Coût maximum pour normalisation
             temps_max: Temps maximum pour normalisation
             historique_recettes: Liste des IDs de recettes récentes
+            saisons_map: Table {ingredient_id: saisons} préchargée
+            stock_map: Stock {ingredient_id: quantite} préchargé
 
         Returns:
             self pour chaînage
         """
         self.contexte.update(kwargs)
+
+        if 'historique_recettes' in kwargs:
+            self.contexte['historique_positions'] = indexer_historique(
+                kwargs['historique_recettes'] or []
+            )
+
         return self
 
-    def _calculer_score_recette(self, recette) -> ScoreRecette:
+    def _vecteur_poids(self) -> List[tuple]:
+        """
+        Retourne les critères actifs avec leur poids normalisé (somme = 1).
+
+        Calculé une seule fois par appel à recommander(), le score total
+        d'une recette est alors un simple produit scalaire.
+
+        Returns:
+            Liste de tuples (nom_critere, poids_normalise)
+        """
+        actifs = [
+            (nom, critere.poids)
+            for nom, critere in self.criteres.items()
+            if critere.actif and critere.poids > 0
+        ]
+        somme_poids = sum(poids for _, poids in actifs)
+
+        if somme_poids <= 0:
+            return []
+
+        return [(nom, poids / somme_poids) for nom, poids in actifs]
+
+    def _calculer_critere(self, nom: str, recette) -> tuple[float, dict]:
+        """
+        Calcule le score d'une recette pour un critère.
+
+        Returns:
+            Tuple (score 0-100, métadonnées) ; 50 en cas d'erreur
+        """
+        calculateur = self.CRITERES_DISPONIBLES[nom]['calculateur']
+
+        features = self.contexte.get('features')
+        ligne = features.lignes.get(recette.id) if features else None
+
+        try:
+            if nom == 'cout' and ligne is not None:
+                return calculateur(
+                    recette,
+                    self.contexte.get('cout_max'),
+                    cout=features.cout[ligne]
+                )
+            elif nom == 'nutrition' and ligne is not None:
+                return features.nutrition[ligne]
+            elif nom == 'saison':
+                return calculateur(
+                    recette,
+                    self.contexte.get('saison'),
+                    self.contexte.get('saisons_map')
+                )
+            elif nom == 'disponibilite':
+                return calculateur(recette, self.contexte.get('stock_map'))
+            elif nom == 'cout':
+                return calculateur(recette, self.contexte.get('cout_max'))
+            elif nom == 'temps':
+                return calculateur(recette, self.contexte.get('temps_max'))
+            elif nom == 'variete':
+                return calculateur(
+                    recette,
+                    self.contexte.get('historique_recettes', []),
+                    positions=self.contexte.get('historique_positions')
+                )
+            return calculateur(recette)
+
+        except Exception as e:
+            return 50.0, {'erreur': str(e)}
+
+    def _calculer_score_recette(self, recette, vecteur_poids: List[tuple] = None,
+                                filtre_realisable: bool = False) -> Optional[ScoreRecette]:
         """
         Calcule le score total d'une recette.
 
+        Args:
+            recette: Recette à évaluer
+            vecteur_poids: Résultat de _vecteur_poids() (recalculé si absent)
+            filtre_realisable: Abandonner le calcul dès que la recette
+                               s'avère non réalisable
+
         Returns:
-            ScoreRecette avec tous les détails
+            ScoreRecette avec tous les détails, ou None si écartée par le filtre
         """
+        if vecteur_poids is None:
+            vecteur_poids = self._vecteur_poids()
+
         result = ScoreRecette(recette=recette)
-        somme_ponderee = 0.0
-        somme_poids = 0.0
-
-        for nom, critere in self.criteres.items():
-            if not critere.actif or critere.poids <= 0:
-                continue
-
-            config = self.CRITERES_DISPONIBLES[nom]
-            calculateur = config['calculateur']
-
-            try:
-                if nom == 'saison':
-                    score, meta = calculateur(recette, self.contexte.get('saison'))
-                elif nom == 'cout':
-                    score, meta = calculateur(recette, self.contexte.get('cout_max'))
-                elif nom == 'temps':
-                    score, meta = calculateur(recette, self.contexte.get('temps_max'))
-                elif nom == 'variete':
-                    score, meta = calculateur(
-                        recette,
-                        self.contexte.get('historique_recettes', [])
-                    )
-                else:
-                    score, meta = calculateur(recette)
 
+        if filtre_realisable:
+            score, meta = self._calculer_critere('disponibilite', recette)
+            if not meta.get('realisable', False):
+                return None
+            result.scores_details['disponibilite'] = score
+            result.meta['disponibilite'] = meta
+
+        score_total = 0.0
+        for nom, poids in vecteur_poids:
+            if nom not in result.scores_details:
+                score, meta = self._calculer_critere(nom, recette)
                 result.scores_details[nom] = score
                 result.meta[nom] = meta
+            score_total += result.scores_details[nom] * poids
 
-                somme_ponderee += score * critere.poids
-                somme_poids += critere.poids
-
-            except Exception as e:
-                result.scores_details[nom] = 50.0
-                result.meta[nom] = {'erreur': str(e)}
-                somme_ponderee += 50.0 * critere.poids
-                somme_poids += critere.poids
-
-        if somme_poids > 0:
-            result.score_total = round(somme_ponderee / somme_poids, 1)
-        else:
-            result.score_total = 0.0
+        result.score_total = round(score_total, 1)
 
         return result
 
     def recommander(self, recettes, limit: int = None,
                     filtre_realisable: bool = False,
                     filtre_type: str = None,
-                    score_minimum: float = None) -> List[ScoreRecette]:
+                    score_minimum: float = None,
+                    stock_map: Dict[int, float] = None) -> List[ScoreRecette]:
         """
         Génère les recommandations triées par score.
 
+        Le stock n'est lu qu'une fois par appel (une requête) puis partagé
+        par toutes les vérifications de disponibilité.
+
         Args:
             recettes: Liste ou Query de recettes
             limit: Nombre maximum de résultats
             filtre_realisable: Ne garder que les recettes réalisables
             filtre_type: Filtrer par type de recette
             score_minimum: Score minimum pour être inclus
+            stock_map: Stock {ingredient_id: quantite} déjà chargé (optionnel)
 
         Returns:
             Liste de ScoreRecette triée par score décroissant
         """
-        resultats = []
-
-        for recette in recettes:
-            if filtre_type and recette.type_recette != filtre_type:
-                continue
-
-            score_recette = self._calculer_score_recette(recette)
-
-            if filtre_realisable:
-                dispo = score_recette.meta.get('disponibilite', {})
-                if not dispo.get('realisable', False):
-                    continue
-
-            if score_minimum is not None and score_recette.score_total < score_minimum:
-                continue
-
-            resultats.append(score_recette)
-
-        resultats.sort(key=lambda x: x.score_total, reverse=True)
+        recettes = list(recettes)
+        vecteur_poids = self._vecteur_poids()
+        criteres_actifs = {nom for nom, _ in vecteur_poids}
+
+        if criteres_actifs & {'cout', 'nutrition'}:
+            self.contexte['features'] = get_features_recettes(recettes)
+
+        if 'saisons_map' not in self.contexte and 'saison' in criteres_actifs:
+            self.contexte['saisons_map'] = get_saisons_ingredients_map()
+
+        if stock_map is not None:
+            self.contexte['stock_map'] = stock_map
+        elif 'stock_map' not in self.contexte and (filtre_realisable or 'disponibilite' in criteres_actifs):
+            self.contexte['stock_map'] = get_stock_map()
+
+        candidats = [
+            recette for recette in recettes
+            if not filtre_type or recette.type_recette == filtre_type
+        ]
+
+        # Une colonne (score, meta) par critère : chaque calculateur parcourt
+        # toutes les recettes, au lieu de tous les critères recette par recette
+        colonnes = {}
+
+        if filtre_realisable:
+            dispo = [self._calculer_critere('disponibilite', r) for r in candidats]
+            gardes = [i for i, (_, meta) in enumerate(dispo) if meta.get('realisable', False)]
+            candidats = [candidats[i] for i in gardes]
+            colonnes['disponibilite'] = [dispo[i] for i in gardes]
+
+        for nom, _ in vecteur_poids:
+            if nom not in colonnes:
+                colonnes[nom] = [self._calculer_critere(nom, r) for r in candidats]
+
+        totaux = [0.0] * len(candidats)
+        for nom, poids in vecteur_poids:
+            totaux = [
+                total + score * poids
+                for total, (score, _) in zip(totaux, colonnes[nom])
+            ]
+        totaux = [round(total, 1) for total in totaux]
+
+        indices = range(len(candidats))
+        if score_minimum is not None:
+            indices = [i for i in indices if totaux[i] >= score_minimum]
+
+        # Tri lexicographique (score, disponibilité) ; stable, il conserve
+        # l'ordre d'entrée (ex: tri SQL) pour les ex-aequo restants
+        colonne_dispo = colonnes.get('disponibilite')
+        if colonne_dispo:
+            cle = lambda i: (totaux[i], colonne_dispo[i][0])
+        else:
+            cle = totaux.__getitem__
 
+        # Sélection partielle O(R log limit) ; nlargest est stable comme sorted()
         if limit:
-            resultats = resultats[:limit]
+            ordre = heapq.nlargest(limit, indices, key=cle)
+        else:
+            ordre = sorted(indices, key=cle, reverse=True)
+
+        # Détails assemblés uniquement pour les recettes retenues
+        resultats = []
+        for i in ordre:
+            result = ScoreRecette(recette=candidats[i], score_total=totaux[i])
+            for nom, colonne in colonnes.items():
+                result.scores_details[nom], result.meta[nom] = colonne[i]
+            resultats.append(result)
 
         return resultats
 
@@ -446,10 +739,116 @@ class MoteurRecommandation:
         }
 
 
+def options_chargement_recettes() -> tuple:
+    """
+    Options de chargement des recettes à scorer.
+
+    selectinload plutôt que joinedload : une requête IN par relation au lieu
+    d'un produit cartésien recettes × ingrédients, et seules les colonnes
+    de Recette utiles au scoring et à l'affichage sont chargées.
+
+    Returns:
+        Tuple d'options à passer à Query.options()
+    """
+    from sqlalchemy.orm import load_only, selectinload
+    from models.models import Recette, IngredientRecette
+
+    return (
+        load_only(
+            Recette.id, Recette.nom, Recette.type_recette,
+            Recette.temps_preparation, Recette.temps_cuisson,
+            Recette.image, Recette.image_thumb
+        ),
+        selectinload(Recette.ingredients)
+        .selectinload(IngredientRecette.ingredient),
+        selectinload(Recette.sous_recettes)
+    )
+
+
+def cle_recommandations(prefixe: str, moteur: MoteurRecommandation, **filtres) -> str:
+    """
+    Construit la clé de cache d'un jeu de recommandations.
+
+    La clé dépend de la saison et des poids effectifs du moteur, des filtres
+    de la requête, et des versions des données utilisées par le scoring
+    (recettes, ingrédients, stock, planifications pour la variété).
+
+    Args:
+        prefixe: Préfixe propre à la page / l'API
+        moteur: Moteur configuré (saison dans le contexte, poids des critères)
+        **filtres: Paramètres de la requête influant sur le résultat
+
+    Returns:
+        Clé de cache versionnée
+    """
+    from utils.cache import cle_versionnee
+
+    poids = ','.join(
+        f'{nom}={critere.poids if critere.actif else 0}'
+        for nom, critere in sorted(moteur.criteres.items())
+    )
+    params = ','.join(f'{nom}={valeur}' for nom, valeur in sorted(filtres.items()))
+
+    return cle_versionnee(
+        f"{prefixe}:{moteur.contexte.get('saison')}:{poids}:{params}",
+        'recettes', 'ingredients', 'stock', 'planifications'
+    )
+
+
+def get_recommandations_cached(cle: str, calcul: Callable[[], List[ScoreRecette]],
+                               timeout: int = 600) -> List[ScoreRecette]:
+    """
+    Retourne des recommandations mises en cache sous une clé versionnée.
+
+    Seuls les IDs, scores et métadonnées sont stockés ; les recettes sont
+    rechargées (une requête) pour l'affichage.
+
+    Args:
+        cle: Clé de cache, versionnée sur les données dont dépend le calcul
+             (voir cle_recommandations)
+        calcul: Fonction sans argument produisant les recommandations
+        timeout: Durée de vie en secondes
+
+    Returns:
+        Liste de ScoreRecette dans l'ordre d'origine
+    """
+    from models.models import Recette
+    from utils.cache import cache
+
+    lignes = cache.get(cle)
+    if lignes is None:
+        recommandations = calcul()
+        cache.set(cle, [
+            (r.recette.id, r.score_total, r.scores_details, r.meta)
+            for r in recommandations
+        ], timeout=timeout)
+        return recommandations
+
+    ids = [recette_id for recette_id, *_ in lignes]
+    recettes = {
+        r.id: r for r in Recette.query.options(*options_chargement_recettes())
+        .filter(Recette.id.in_(ids))
+    }
+
+    return [
+        ScoreRecette(recette=recettes[recette_id], score_total=score,
+                     scores_details=details, meta=meta)
+        for recette_id, score, details, meta in lignes
+        if recette_id in recettes
+    ]
+
+
+# Durée de vie de l'historique en cache : la fenêtre glisse avec le temps
+HISTORIQUE_TIMEOUT = 300
+
+
 def get_historique_recettes_ids(jours: int = 14) -> List[int]:
     """
     Récupère les IDs des recettes cuisinées récemment.
 
+    Mis en cache jusqu'à la prochaine modification d'une planification
+    ou d'une recette (et au plus HISTORIQUE_TIMEOUT secondes).
+
     Args:
         jours: Nombre de jours à considérer
 
@@ -457,61 +856,98 @@ def get_historique_recettes_ids(jours: int = 14) -> List[int]:
         Liste d'IDs ordonnée de la plus récente à la plus ancienne
     """
     from models.models import RecettePlanifiee
+    from utils.cache import cle_versionnee, get_ou_calculer
 
-    date_limite = datetime.utcnow() - timedelta(days=jours)
+    def calcul():
+        date_limite = datetime.utcnow() - timedelta(days=jours)
 
-    recettes = RecettePlanifiee.query\
-        .filter(RecettePlanifiee.preparee == True)\
-        .filter(RecettePlanifiee.date_preparation >= date_limite)\
-        .order_by(RecettePlanifiee.date_preparation.desc())\
-        .all()
+        lignes = RecettePlanifiee.query\
+            .with_entities(RecettePlanifiee.recette_id)\
+            .filter(RecettePlanifiee.preparee == True)\
+            .filter(RecettePlanifiee.date_preparation >= date_limite)\
+            .order_by(RecettePlanifiee.date_preparation.desc())\
+            .all()
 
-    return [r.recette_id for r in recettes]
+        return [recette_id for recette_id, in lignes]
+
+    cle = cle_versionnee(f'historique_recettes:{jours}', 'planifications', 'recettes')
+    return get_ou_calculer(cle, calcul, timeout=HISTORIQUE_TIMEOUT)
 
 
 def get_cout_max_recettes() -> float:
     """
     Calcule le coût maximum parmi toutes les recettes.
 
+    Mis en cache jusqu'à la prochaine modification d'une recette ou d'un ingrédient.
+
     Returns:
         Coût maximum ou 50.0 par défaut
     """
-    from models.models import Recette
-
-    recettes = Recette.query.all()
-    if not recettes:
-        return 50.0
+    from models.models import db, Recette
+    from sqlalchemy import func
+    from utils.cache import cle_versionnee_recettes, get_ou_calculer
 
-    couts = [r.calculer_cout() for r in recettes]
-    couts = [c for c in couts if c > 0]
+    def calcul():
+        # Colonne précalculée (cout_cache) : pas de chargement des recettes
+        cout_max = db.session.query(func.max(Recette.cout_cache))\
+            .filter(Recette.cout_cache > 0)\
+            .scalar()
+        return cout_max or 50.0
 
-    return max(couts) if couts else 50.0
+    return get_ou_calculer(cle_versionnee_recettes('recettes:cout_max'), calcul)
 
 
 def get_temps_max_recettes() -> int:
     """
     Calcule le temps maximum parmi toutes les recettes.
 
+    Mis en cache jusqu'à la prochaine modification d'une recette.
+
     Returns:
         Temps maximum en minutes ou 120 par défaut
     """
-    from models.models import Recette
+    from models.models import db, Recette
+    from sqlalchemy import func
+    from utils.cache import cle_versionnee, get_ou_calculer
 
-    temps = Recette.query\
-        .with_entities(Recette.temps_preparation)\
-        .filter(Recette.temps_preparation.isnot(None))\
-        .filter(Recette.temps_preparation > 0)\
-        .all()
+    def calcul():
+        temps_max = db.session.query(func.max(Recette.temps_preparation))\
+            .filter(Recette.temps_preparation > 0)\
+            .scalar()
+        return temps_max or 120
 
-    temps_values = [t[0] for t in temps]
+    return get_ou_calculer(cle_versionnee('recettes:temps_max', 'recettes'), calcul)
 
-    return max(temps_values) if temps_values else 120
+
+# Un moteur par thread : le serveur WSGI peut traiter plusieurs requêtes
+# en parallèle, chacune modifiant poids et contexte.
+_moteurs = threading.local()
+
+
+def get_moteur_recommandation() -> MoteurRecommandation:
+    """
+    Retourne le moteur du thread courant, réinitialisé.
+
+    Évite de reconstruire les critères à chaque requête ; poids et contexte
+    sont remis à zéro pour ne rien hériter de la requête précédente.
+
+    Returns:
+        MoteurRecommandation avec la configuration par défaut
+    """
+    moteur = getattr(_moteurs, 'moteur', None)
+    if moteur is None:
+        moteur = _moteurs.moteur = MoteurRecommandation()
+    return moteur.reinitialiser()
 
 
 def creer_moteur_recommandation_standard(saison: str = None) -> MoteurRecommandation:
     """
     Crée un moteur de recommandation avec une configuration standard.
 
+    Le moteur est neuf, propre à l'appelant : contrairement à celui de
+    get_moteur_recommandation(), il peut être conservé ou partagé sans
+    qu'une requête suivante du thread ne le réinitialise.
+
     Args:
         saison: Saison à utiliser (défaut: saison actuelle)
 
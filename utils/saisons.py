@@ -1,3 +1,5 @@
+import heapq
+from functools import lru_cache
 from datetime import date, datetime
 from typing import List, Optional, Dict, Tuple
 from sqlalchemy import func
@@ -18,9 +20,12 @@ def get_saison_actuelle(date_ref: date = None) -> str:
     if date_ref is None:
         date_ref = date.today()
 
-    jour = date_ref.day
-    mois = date_ref.month
+    return _saison_du_jour(date_ref.month, date_ref.day)
 
+
+@lru_cache(maxsize=None)
+def _saison_du_jour(mois: int, jour: int) -> str:
+    """Saison d'un jour de l'année (au plus 366 entrées mémoïsées)."""
     date_num = mois * 100 + jour
 
     if 320 <= date_num < 621:
@@ -268,11 +273,10 @@ def get_recettes_de_saison(saison: str = None,
         if score_info['score'] >= score_minimum:
             recettes_avec_score.append((recette, score_info))
 
-    recettes_avec_score.sort(key=lambda x: x[1]['score'], reverse=True)
-
     if limit:
-        recettes_avec_score = recettes_avec_score[:limit]
+        return heapq.nlargest(limit, recettes_avec_score, key=lambda x: x[1]['score'])
 
+    recettes_avec_score.sort(key=lambda x: x[1]['score'], reverse=True)
     return recettes_avec_score
 
 
@@ -318,9 +322,11 @@ def get_recettes_recommandees(saison: str = None,
             'disponibilite': dispo
         })
 
-    recommandations.sort(key=lambda x: x['score_combine'], reverse=True)
+    if limit:
+        return heapq.nlargest(limit, recommandations, key=lambda x: x['score_combine'])
 
-    return recommandations[:limit]
+    recommandations.sort(key=lambda x: x['score_combine'], reverse=True)
+    return recommandations
 
 
 def get_contexte_saison() -> Dict:
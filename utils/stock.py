@@ -208,6 +208,6 @@ def vider_frigo() -> int:
     Returns:
         Nombre d'items supprimés
     """
-    count = StockFrigo.query.count()
-    StockFrigo.query.delete()
-    return count
+    # Le DELETE renvoie lui-même le nombre de lignes supprimées ; la version
+    # 'stock' du cache est incrémentée au commit (voir utils.cache)
+    return StockFrigo.query.delete()